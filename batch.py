@@ -0,0 +1,258 @@
+# coding: utf-8
+
+"""
+    Headless batch window correction: corrects many spectrum files at once, without the UI.
+
+    How to use:
+        python batch.py "campaign/*.txt" other_spectra_dir --windows 2 --correction extended --jobs 8
+
+    Inputs are files, globs or directories (their .txt, .csv and .tsv files). Each spectrum is corrected with
+    the transmission preset or file given by --transmission (sapphire window preset by default) and written next
+    to it, or in --output-dir, as <stem>_wincor<suffix>, exactly as the UI exports it. In --output-dir, the files keep
+    their directories relative to the common directory of all the spectra (files of the same name do not collide).
+
+    With --jacobian the uncertainty columns are first-order propagations of the reflectance & transmission
+    uncertainties (see core.CorrectionPlan.jacobian_uncertainty), with --monte-carlo DRAWS Monte Carlo ones
+    (see core.window_correction_monte_carlo), instead of ratio-scaled ones.
+"""
+
+# PACKAGES
+import os
+import sys
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# MODULES
+from tools.data_pars import DataPars
+from tools.export_tools import export_header, export_table
+from core import reflectance_columns, window_correction_columns, window_correction_columns_monte_carlo
+from presets.transmission_sapphire_window import (SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION,
+                                                  SAPPHIRE_WINDOW_TRANSMISSION_ERROR)
+
+# GLOBALS
+TRANSMISSION_PRESETS = {"sapphire window": (SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION)}
+TRANSMISSION_UNCERTAINTIES = {"sapphire window": SAPPHIRE_WINDOW_TRANSMISSION_ERROR}
+CORRECTION_TYPES = {"parasitic": "parasitic reflections", "extended": "extended correction"}
+SPECTRUM_EXTENSIONS = [".txt", ".csv", ".tsv"]
+OUTPUT_SUFFIX = "_wincor"
+# correction parameters of a worker process, set once by set_batch_parameters
+batch_parameters = {}
+
+
+# files, globs & directories -> sorted spectrum files, without the already corrected ones
+def collect_spectrum_files(inputs, output_suffix=OUTPUT_SUFFIX):
+    try:
+        files_list = []
+        for spectrum_input in inputs:
+            if os.path.isdir(spectrum_input):
+                paths_list = [os.path.join(spectrum_input, name) for name in os.listdir(spectrum_input)
+                              if os.path.splitext(name)[1].lower() in SPECTRUM_EXTENSIONS]
+            else:
+                paths_list = glob.glob(spectrum_input) if glob.has_magic(spectrum_input) else [spectrum_input]
+            for file_path in paths_list:
+                if os.path.isfile(file_path) and not os.path.splitext(file_path)[0].endswith(output_suffix):
+                    files_list.append(os.path.normpath(file_path))
+        return sorted(set(files_list))
+    except Exception as e:
+        raise Exception(f"Critical error in collect_spectrum_files: {str(e)}") from e
+
+
+# preset name or transmission file (wavelengths & transmission in the first two columns)
+# -> window wavelengths, window transmission, window material
+def load_transmission(transmission):
+    try:
+        if transmission in TRANSMISSION_PRESETS:
+            window_wavelength, window_transmission = TRANSMISSION_PRESETS[transmission]
+            return window_wavelength, window_transmission, transmission
+        if not os.path.isfile(transmission):
+            raise ValueError(f"{transmission} is neither a transmission preset ({', '.join(TRANSMISSION_PRESETS)}) nor a file")
+        data_read = DataPars(transmission)
+        data_read.file_pars_f()
+        if data_read.file_body.ndim != 2 or data_read.file_body.shape[1] < 2:
+            raise ValueError(f"no transmission data in {transmission}")
+        return data_read.file_body[:, 0], data_read.file_body[:, 1], os.path.basename(transmission)
+    except Exception as e:
+        raise Exception(f"Critical error in load_transmission: {str(e)}") from e
+
+
+# preset name or transmission file -> transmission uncertainty (third column of a file), None if unknown
+def load_transmission_uncertainty(transmission):
+    try:
+        if transmission in TRANSMISSION_PRESETS:
+            return TRANSMISSION_UNCERTAINTIES.get(transmission)
+        data_read = DataPars(transmission)
+        data_read.file_pars_f()
+        if data_read.file_body.ndim != 2 or data_read.file_body.shape[1] < 3:
+            return None
+        return data_read.file_body[:, 2]
+    except Exception as e:
+        raise Exception(f"Critical error in load_transmission_uncertainty: {str(e)}") from e
+
+
+# spectrum path -> its export path: original name stem + suffix + original file extension (as in the UI)
+def export_path_for(file_path, output_dir=None, output_suffix=OUTPUT_SUFFIX):
+    stem, extension = os.path.splitext(os.path.basename(file_path))
+    return os.path.join(output_dir or os.path.dirname(file_path), stem + output_suffix + extension)
+
+
+# spectrum paths -> their export paths; in output_dir, each file keeps its directory relative to the common directory
+# of all of them, so that files of the same name in different directories are not exported to the same path
+def export_paths_for(files_list, output_dir=None, output_suffix=OUTPUT_SUFFIX):
+    if not output_dir or not files_list:
+        return {file_path: export_path_for(file_path, output_dir, output_suffix) for file_path in files_list}
+    common_dir = os.path.commonpath([os.path.dirname(os.path.abspath(file_path)) for file_path in files_list])
+    export_paths = {}
+    for file_path in files_list:
+        relative_dir = os.path.relpath(os.path.dirname(os.path.abspath(file_path)), common_dir)
+        export_paths[file_path] = export_path_for(file_path, os.path.normpath(os.path.join(output_dir, relative_dir)), output_suffix)
+    return export_paths
+
+
+# one spectrum file -> its corrected export; returns the number of corrected rows
+# (Monte Carlo uncertainties with monte_carlo_draws draws, else those of uncertainty_method; roots solved by the core executor)
+def correct_file(file_path, export_path, window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                 window_transmission_uncertainty=None, monte_carlo_draws=0, monte_carlo_seed=None, uncertainty_method="ratio",
+                 executor="serial", max_workers=None):
+    try:
+        data_read = DataPars(file_path)
+        data_read.file_pars_f()
+        spectrum_data = data_read.file_body
+        if spectrum_data.ndim != 2 or spectrum_data.shape[1] < 2:
+            raise ValueError(f"no spectrum data in {file_path}")
+        if spectrum_data[:, 0].min() < window_wavelength.min() or spectrum_data[:, 0].max() > window_wavelength.max():
+            raise ValueError("the wavelengths of the spectrum exceed the transmission wavelengths")
+        reflectance_columns_list = reflectance_columns(spectrum_data.shape[1], data_read.file_header)
+        if monte_carlo_draws > 0:
+            corrected_spectrum = window_correction_columns_monte_carlo(spectrum_data, reflectance_columns_list, window_wavelength,
+                                                                       window_transmission, window_transmission_uncertainty,
+                                                                       windows_quantity, correction_type, monte_carlo_draws, monte_carlo_seed)
+            uncertainty_info = f"Monte Carlo, {monte_carlo_draws} draws"
+        else:
+            corrected_spectrum = window_correction_columns(spectrum_data, reflectance_columns_list, window_wavelength, window_transmission,
+                                                           windows_quantity, correction_type, uncertainty_method=uncertainty_method,
+                                                           window_material_transmission_uncertainty=window_transmission_uncertainty,
+                                                           executor=executor, max_workers=max_workers)
+            uncertainty_info = "first-order propagation" if uncertainty_method == "jacobian" else None
+        header_str = export_header(data_read.file_header, reflectance_columns_list, window_material, windows_quantity, correction_type,
+                                   uncertainty_info)
+        export_table(export_path, header_str, corrected_spectrum, data_read.file_accuracy, data_read.file_separator)
+        return len(corrected_spectrum)
+    except Exception as e:
+        raise Exception(f"Critical error in correct_file: {str(e)}") from e
+
+
+# worker process initializer: the correction parameters are sent once per process, not once per file
+def set_batch_parameters(window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                         window_transmission_uncertainty=None, monte_carlo_draws=0, monte_carlo_seed=None, uncertainty_method="ratio",
+                         executor="serial", max_workers=None):
+    batch_parameters.update(window_wavelength=window_wavelength, window_transmission=window_transmission,
+                            windows_quantity=windows_quantity, correction_type=correction_type, window_material=window_material,
+                            window_transmission_uncertainty=window_transmission_uncertainty, monte_carlo_draws=monte_carlo_draws,
+                            monte_carlo_seed=monte_carlo_seed, uncertainty_method=uncertainty_method, executor=executor,
+                            max_workers=max_workers)
+
+
+def correct_file_job(file_path, export_path):
+    return correct_file(file_path, export_path, **batch_parameters)
+
+
+# corrects the files with jobs worker processes (in this process if jobs is 1), each file solved by the core executor;
+# yields (file path, export path, number of rows or None, error message or None) as the files are done
+def run_batch(files_list, window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+              jobs=1, output_dir=None, output_suffix=OUTPUT_SUFFIX, window_transmission_uncertainty=None, monte_carlo_draws=0,
+              monte_carlo_seed=None, uncertainty_method="ratio", executor="serial", max_workers=None):
+    batch_arguments = (window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                       window_transmission_uncertainty, monte_carlo_draws, monte_carlo_seed, uncertainty_method, executor,
+                       max_workers)
+    export_paths = export_paths_for(files_list, output_dir, output_suffix)
+    if output_dir:
+        for export_dir in set(os.path.dirname(export_path) for export_path in export_paths.values()):
+            os.makedirs(export_dir, exist_ok=True)
+    if jobs == 1:
+        set_batch_parameters(*batch_arguments)
+        for file_path in files_list:
+            try:
+                yield file_path, export_paths[file_path], correct_file_job(file_path, export_paths[file_path]), None
+            except Exception as e:
+                yield file_path, export_paths[file_path], None, str(e)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=set_batch_parameters, initargs=batch_arguments) as executor:
+        futures = {executor.submit(correct_file_job, file_path, export_paths[file_path]): file_path for file_path in files_list}
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                yield file_path, export_paths[file_path], future.result(), None
+            except Exception as e:
+                yield file_path, export_paths[file_path], None, str(e)
+
+
+# correction arguments shared by the batch & watch command lines
+def add_correction_arguments(parser):
+    parser.add_argument("-t", "--transmission", default=list(TRANSMISSION_PRESETS.keys())[0],
+                        help=f"transmission preset ({', '.join(TRANSMISSION_PRESETS)}) or transmission file")
+    parser.add_argument("-w", "--windows", type=int, choices=[1, 2], default=1, help="windows quantity")
+    parser.add_argument("-c", "--correction", choices=list(CORRECTION_TYPES.keys()), default="parasitic",
+                        help="parasitic: SHINE collimated beam, extended: SHADOWS or SHINE in Gognito mode")
+    parser.add_argument("-o", "--output-dir", default=None, help="export directory (next to each spectrum by default)")
+    parser.add_argument("--suffix", default=OUTPUT_SUFFIX, help="added to the exported file names")
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Window reflection correction of many spectrum files.")
+    parser.add_argument("inputs", nargs="+", help="spectrum files, globs or directories")
+    add_correction_arguments(parser)
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes")
+    executor_group = parser.add_mutually_exclusive_group()
+    executor_group.add_argument("--threads", type=int, default=0, help="threads solving the columns of each file")
+    executor_group.add_argument("--processes", type=int, default=0,
+                                help="processes solving the columns of each file (shared memory, for the per-point solver)")
+    uncertainty_group = parser.add_mutually_exclusive_group()
+    uncertainty_group.add_argument("--jacobian", action="store_true",
+                                   help="first-order uncertainties (reflectance & transmission uncertainties propagated)")
+    uncertainty_group.add_argument("--monte-carlo", type=int, default=0, metavar="DRAWS",
+                                   help="Monte Carlo uncertainties with DRAWS draws (ratio-scaled uncertainties if 0)")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the Monte Carlo draws, for reproducible uncertainties")
+    return parser.parse_args(arguments)
+
+
+# --threads / --processes -> (executor, max_workers) of the core
+def executor_arguments(batch_arguments):
+    if batch_arguments.processes > 1:
+        return "processes", batch_arguments.processes
+    if batch_arguments.threads > 1:
+        return "threads", batch_arguments.threads
+    return "serial", None
+
+
+# returns the exit code: 0 if every file has been corrected, 1 otherwise
+def main(arguments=None):
+    batch_arguments = parse_arguments(arguments)
+    files_list = collect_spectrum_files(batch_arguments.inputs, batch_arguments.suffix)
+    if not files_list:
+        print("No spectrum file to correct.", file=sys.stderr)
+        return 1
+    window_wavelength, window_transmission, window_material = load_transmission(batch_arguments.transmission)
+    window_transmission_uncertainty = None
+    if batch_arguments.monte_carlo > 0 or batch_arguments.jacobian:
+        window_transmission_uncertainty = load_transmission_uncertainty(batch_arguments.transmission)
+    failed_number = 0
+    for file_path, export_path, rows_number, error in run_batch(files_list, window_wavelength, window_transmission,
+                                                                batch_arguments.windows, CORRECTION_TYPES[batch_arguments.correction],
+                                                                window_material, max(batch_arguments.jobs, 1),
+                                                                batch_arguments.output_dir, batch_arguments.suffix,
+                                                                window_transmission_uncertainty, batch_arguments.monte_carlo,
+                                                                batch_arguments.seed, "jacobian" if batch_arguments.jacobian else "ratio",
+                                                                *executor_arguments(batch_arguments)):
+        if error is None:
+            print(f"{file_path} -> {export_path} ({rows_number} rows)")
+        else:
+            failed_number += 1
+            print(f"{file_path}: {error}", file=sys.stderr)
+    print(f"{len(files_list) - failed_number} of {len(files_list)} files corrected.")
+    return 0 if failed_number == 0 else 1
+
+
+# BATCH RUN
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,22 +1,59 @@
 # coding: utf-8
 
 # PACKAGES
+import os
 import numpy as np
+from itertools import chain
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# optional numba: compiles the per-point kernel of the "compiled" solver (batch_real_roots is used without it)
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
 
 # MODULES
-from tools.data_pars import DataPars # for demo_f only
+from tools.data_pars import DataPars
+from tools.export_tools import export_header, export_blocks
 from presets.transmission_sapphire_window import SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION # preset for demo_f only
 
+# GLOBALS
+SERIES_TERMS = 9  # number of reflections kept in the window series (polynomial degree)
+# "polynomial" is the per-point reference solver, "compiled" needs numba (it is "batch" without it),
+# "newton" is the vectorized bracketed Newton solver
+SOLVERS = ["batch", "polynomial", "closed_form", "compiled", "newton"]
+CORRECTION_TYPES = ["parasitic reflections", "extended correction"]  # post-transforms of the same root
+# "ratio": corrected * uncertainty / R0, "jacobian": first-order propagation of the reflectance & transmission uncertainties
+UNCERTAINTY_METHODS = ["ratio", "jacobian"]
+# "serial": one solve of the whole block, "threads": its columns (or rows) split between threads,
+# "processes": (column, rows) tasks solved by a persistent process pool on shared memory; same results
+EXECUTORS = ["serial", "threads", "processes"]
+BATCH_CHUNK = 65536  # companion matrices per eigenvalue call, keeps the N x 9 x 9 stack bounded in memory
+MONTE_CARLO_DRAWS = 1000  # perturbed realizations of the reflectance & the transmission
+MONTE_CARLO_PERCENTILES = (15.865525393145708, 84.13447460685429)  # the +-1 sigma interval of a normal distribution
+MONTE_CARLO_CHUNK = 1 << 20  # perturbed points solved at once (draws x rows x columns), keeps the draws bounded in memory
+NEWTON_TOLERANCE = 1e-14  # last Newton step relative to the root, for the "newton" solver to stop
+NEWTON_ITERATIONS = 50  # Newton (or bisection) steps before a point is reported as not converged
+PROCESS_POOLS = {}  # max_workers -> process pool of the "processes" executor, started once and kept for the next solves
+
 
 class CoreWindowCorrection:
     def __init__(self, spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty,
-                 window_material_wavelengths, window_material_transmission, windows_quantity, correction_type):
-        self.class_setter(spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty, window_material_wavelengths, window_material_transmission, windows_quantity, correction_type)
+                 window_material_wavelengths, window_material_transmission, windows_quantity, correction_type,
+                 solver="batch", uncertainty_method="ratio", window_material_transmission_uncertainty=None, executor="serial",
+                 max_workers=None):
+        self.class_setter(spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty, window_material_wavelengths, window_material_transmission, windows_quantity, correction_type, solver,
+                          uncertainty_method, window_material_transmission_uncertainty, executor, max_workers)
         self.globals()
 
     # class setter
     def class_setter(self, spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty,
-                     window_material_wavelengths, window_material_transmission, windows_quantity, correction_type):
+                     window_material_wavelengths, window_material_transmission, windows_quantity, correction_type,
+                     solver="batch", uncertainty_method="ratio", window_material_transmission_uncertainty=None, executor="serial",
+                     max_workers=None):
         self.spectrum_wavelength = spectrum_wavelength
         self.spectrum_reflectance = spectrum_reflectance
         self.spectrum_reflectance_uncertainty = spectrum_reflectance_uncertainty
@@ -24,12 +61,21 @@ class CoreWindowCorrection:
         self.window_material_transmission = window_material_transmission
         self.windows_quantity = windows_quantity
         self.correction_type = correction_type
+        self.solver = solver
+        self.uncertainty_method = uncertainty_method
+        self.window_material_transmission_uncertainty = window_material_transmission_uncertainty  # jacobian only
+        self.executor = executor
+        self.max_workers = max_workers
 
     # class globals
     def globals(self):
         # OUTPUT
         self.corrected_reflectance = np.zeros(len(self.spectrum_wavelength))
         self.corrected_reflectance_uncertainty = np.zeros(len(self.spectrum_wavelength))
+        # largest |closed form - 9-term polynomial| over the spectrum, set by the closed_form solver only
+        self.closed_form_deviation = np.nan
+        # points of the spectrum left unconverged, set by the newton solver only
+        self.unconverged_points = 0
 
     # class getters
     def class_getter_reflectance(self):
@@ -38,8 +84,40 @@ class CoreWindowCorrection:
     def class_getter_reflectance_uncertainty(self):
         return self.corrected_reflectance_uncertainty
 
+    def class_getter_closed_form_deviation(self):
+        return self.closed_form_deviation
+
+    def class_getter_unconverged_points(self):
+        return self.unconverged_points
+
     # main function window_correction
     def window_correction(self):
+        try:
+            # the reference loop has the ratio-scaled uncertainties only and runs serially, the plan does the rest
+            if self.solver == "polynomial" and self.uncertainty_method == "ratio" and self.executor == "serial":
+                self.window_correction_polynomial()
+            else:
+                self.window_correction_plan()
+        except Exception as e:
+            raise Exception(f"Critical error in CoreWindowCorrection::window_correction: {str(e)}") from e
+
+    # window_correction -> window_correction_plan
+    # vectorized solvers: the whole spectrum goes through a CorrectionPlan built on its wavelength grid
+    def window_correction_plan(self):
+        try:
+            plan = CorrectionPlan(self.spectrum_wavelength, self.window_material_wavelengths, self.window_material_transmission,
+                                  self.windows_quantity, self.correction_type, self.solver, self.uncertainty_method,
+                                  self.window_material_transmission_uncertainty, self.executor, self.max_workers)
+            self.corrected_reflectance, self.corrected_reflectance_uncertainty = plan.apply(self.spectrum_reflectance, self.spectrum_reflectance_uncertainty)
+            if self.solver == "closed_form":
+                self.closed_form_deviation = plan.closed_form_deviation(self.spectrum_reflectance)
+            if self.solver == "newton":
+                self.unconverged_points = int(np.count_nonzero(plan.unconverged))
+        except Exception as e:
+            raise Exception(f"Critical error in CoreWindowCorrection::window_correction_plan: {str(e)}") from e
+
+    # window_correction -> window_correction_polynomial (reference solver, point by point)
+    def window_correction_polynomial(self):
         try:
             for index, wavelength in enumerate(self.spectrum_wavelength):
                 transmission = np.interp(wavelength, self.window_material_wavelengths, self.window_material_transmission)
@@ -47,13 +125,13 @@ class CoreWindowCorrection:
                 self.corrected_reflectance[index] = self.get_corrected_reflectance_value(polynomial_roots)
                 self.corrected_reflectance_uncertainty[index] = self.corrected_reflectance[index] * self.spectrum_reflectance_uncertainty[index] / self.spectrum_reflectance[index]
         except Exception as e:
-            raise Exception(f"Critical error in CoreWindowCorrection::window_correction: {str(e)}") from e
+            raise Exception(f"Critical error in CoreWindowCorrection::window_correction_polynomial: {str(e)}") from e
 
     # window_correction -> get_polynomial_roots
     def get_polynomial_roots(self, R0, T):
         try:
             coefficients = [-R0]
-            for i in range(1, 10):
+            for i in range(1, SERIES_TERMS + 1):
                 coefficients.append(T ** (2 * self.windows_quantity) * ((1 - T) ** (i - 1)))
             polynom = np.polynomial.Polynomial(coefficients)
             root = polynom.roots()
@@ -79,6 +157,891 @@ class CoreWindowCorrection:
             raise Exception(f"Critical error in CoreWindowCorrection::get_corrected_reflectance_value: {str(e)}") from e
 
 
+class CorrectionPlan:
+    """
+        Everything that depends only on the wavelength grid and the window: interpolated transmission, T^(2n)
+        and the series coefficients. Built once, then apply() corrects any number of reflectance columns
+        or files sharing the same spectrum wavelengths.
+
+        Reflectance can be a single column (N,) or a block of columns (N, M): row i is always wavelength i.
+
+        The uncertainties are ratio-scaled (corrected * uncertainty / R0) or, with the "jacobian" uncertainty method,
+        propagated to first order from the reflectance uncertainty and the (optional) transmission uncertainty.
+
+        With the "threads" executor, the block is solved by max_workers threads (every core if None): each one
+        solves a part of the columns, or of the rows of a narrow block, in a preallocated output.
+        With the "processes" executor, the block, the grid quantities and the output are placed in shared memory and
+        (column, rows) tasks are solved by a persistent pool of max_workers processes: the per-point "polynomial"
+        solver scales with the cores without any change of its numerical path.
+
+        The "newton" solver stops at newton_tolerance or after newton_max_iterations steps; unconverged is the mask
+        of the points of the last real_roots call it did not converge (their roots are the last bracketed iterates).
+    """
+    def __init__(self, spectrum_wavelength, window_material_wavelengths, window_material_transmission,
+                 windows_quantity, correction_type, solver="batch", uncertainty_method="ratio",
+                 window_material_transmission_uncertainty=None, executor="serial", max_workers=None,
+                 newton_tolerance=NEWTON_TOLERANCE, newton_max_iterations=NEWTON_ITERATIONS):
+        self.class_setter(spectrum_wavelength, window_material_wavelengths, window_material_transmission,
+                          windows_quantity, correction_type, solver, uncertainty_method, window_material_transmission_uncertainty,
+                          executor, max_workers, newton_tolerance, newton_max_iterations)
+        self.precompute()
+
+    # class setter
+    def class_setter(self, spectrum_wavelength, window_material_wavelengths, window_material_transmission,
+                     windows_quantity, correction_type, solver="batch", uncertainty_method="ratio",
+                     window_material_transmission_uncertainty=None, executor="serial", max_workers=None,
+                     newton_tolerance=NEWTON_TOLERANCE, newton_max_iterations=NEWTON_ITERATIONS):
+        if solver not in SOLVERS:
+            raise ValueError(f"unknown solver '{solver}', expected one of {SOLVERS}")
+        if uncertainty_method not in UNCERTAINTY_METHODS:
+            raise ValueError(f"unknown uncertainty method '{uncertainty_method}', expected one of {UNCERTAINTY_METHODS}")
+        if executor not in EXECUTORS:
+            raise ValueError(f"unknown executor '{executor}', expected one of {EXECUTORS}")
+        self.spectrum_wavelength = np.asarray(spectrum_wavelength, dtype=np.double)
+        self.window_material_wavelengths = window_material_wavelengths
+        self.window_material_transmission = window_material_transmission
+        self.windows_quantity = windows_quantity
+        self.correction_type = correction_type
+        self.solver = solver
+        self.uncertainty_method = uncertainty_method
+        self.window_material_transmission_uncertainty = window_material_transmission_uncertainty
+        self.executor = executor
+        self.max_workers = max_workers
+        self.newton_tolerance = newton_tolerance
+        self.newton_max_iterations = newton_max_iterations
+        self.unconverged = None
+
+    # grid-dependent quantities
+    def precompute(self):
+        try:
+            self.transmission = np.interp(self.spectrum_wavelength, self.window_material_wavelengths, self.window_material_transmission)
+            self.transmission_power = self.transmission ** (2 * self.windows_quantity)  # T^(2n)
+            self.coefficients = series_coefficients(self.transmission, self.windows_quantity)
+            if self.uncertainty_method == "jacobian":
+                if self.window_material_transmission_uncertainty is None:
+                    self.transmission_uncertainty = np.zeros(self.transmission.shape)
+                else:
+                    self.transmission_uncertainty = np.interp(self.spectrum_wavelength, self.window_material_wavelengths,
+                                                              self.window_material_transmission_uncertainty)
+                self.transmission_coefficients = series_transmission_coefficients(self.transmission, self.windows_quantity)
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::precompute: {str(e)}") from e
+
+    # main function apply: corrected reflectance & its uncertainty (ratio-scaled as in the reference solver)
+    def apply(self, spectrum_reflectance, spectrum_reflectance_uncertainty=None):
+        try:
+            R0 = np.asarray(spectrum_reflectance, dtype=np.double)
+            if spectrum_reflectance_uncertainty is None:
+                spectrum_reflectance_uncertainty = np.zeros(R0.shape)
+            real_roots = self.real_roots(R0)
+            corrected_reflectance = apply_correction_type(real_roots, self.correction_type)
+            if self.uncertainty_method == "jacobian":
+                corrected_reflectance_uncertainty = self.jacobian_uncertainty(real_roots, R0, spectrum_reflectance_uncertainty)
+            else:
+                corrected_reflectance_uncertainty = corrected_reflectance * spectrum_reflectance_uncertainty / R0
+            return corrected_reflectance, corrected_reflectance_uncertainty
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::apply: {str(e)}") from e
+
+    # apply -> real_roots: the physical root of the series for every point
+    def real_roots(self, R0):
+        try:
+            R0 = np.asarray(R0, dtype=np.double)
+            if self.executor == "threads":
+                real_roots, self.unconverged = self.threads_real_roots(R0)
+            elif self.executor == "processes":
+                real_roots, self.unconverged = self.processes_real_roots(R0)
+            else:
+                real_roots, self.unconverged = self.block_real_roots(R0)
+            return real_roots
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::real_roots: {str(e)}") from e
+
+    # real_roots -> block_real_roots: the roots of a block of the rows (wavelengths) of the grid & its unconverged mask
+    def block_real_roots(self, R0, rows=slice(None)):
+        try:
+            return solve_real_roots(R0, self.solver, self.grid_to_block(self.transmission[rows], R0),
+                                    self.grid_to_block(self.transmission_power[rows], R0), self.grid_to_block(self.coefficients[rows], R0),
+                                    self.newton_tolerance, self.newton_max_iterations)
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::block_real_roots: {str(e)}") from e
+
+    # real_roots -> threads_real_roots: the columns, or the rows if there are fewer columns than workers, split between
+    # the threads of a pool (numpy releases the GIL in the solve); every point is solved as by block_real_roots,
+    # so the roots do not depend on the number of workers
+    def threads_real_roots(self, R0):
+        try:
+            max_workers = self.max_workers or os.cpu_count() or 1
+            real_roots = np.empty(R0.shape)
+            unconverged = np.empty(R0.shape, dtype=bool)
+            if R0.ndim > 1 and R0.shape[1] >= max_workers:
+                parts = [((slice(None), columns), slice(None)) for columns in split_slices(R0.shape[1], max_workers)]
+            else:
+                parts = [((rows,), rows) for rows in split_slices(len(R0), max_workers)]
+
+            def solve_part(part):
+                block, rows = part
+                real_roots[block], unconverged[block] = self.block_real_roots(R0[block], rows)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(solve_part, parts))
+            return real_roots, unconverged
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::threads_real_roots: {str(e)}") from e
+
+    # real_roots -> processes_real_roots: R0 (as rows x columns), the grid quantities and the output in shared memory,
+    # (column, rows) tasks for the persistent pool (every column split in rows if there are fewer columns than workers);
+    # only the names of the blocks are sent to the workers, and every point is solved as by block_real_roots
+    def processes_real_roots(self, R0):
+        shared_memories = {}
+        try:
+            max_workers = self.max_workers or os.cpu_count() or 1
+            block = R0.reshape(len(R0), -1)
+            arrays = {"R0": block, "transmission": self.transmission, "transmission_power": self.transmission_power,
+                      "coefficients": self.coefficients, "real_roots": np.empty(block.shape), "unconverged": np.zeros(block.shape)}
+            for key, array in arrays.items():
+                shared_memories[key] = share_array(array)
+            shared_arrays = {key: (shared_memories[key].name, array.shape) for key, array in arrays.items()}
+            rows_parts = -(-max_workers // block.shape[1])
+            tasks = [(column, rows) for column in range(block.shape[1]) for rows in split_slices(len(block), rows_parts)]
+            columns, rows_list = zip(*tasks)
+            solver_options = (self.solver, self.newton_tolerance, self.newton_max_iterations)
+            process_pool_map(max_workers, solve_shared_task, [shared_arrays] * len(tasks), [solver_options] * len(tasks),
+                             columns, rows_list, chunksize=max(1, len(tasks) // (4 * max_workers)))
+            return (np.ndarray(block.shape, buffer=shared_memories["real_roots"].buf).reshape(R0.shape).copy(),
+                    np.ndarray(block.shape, buffer=shared_memories["unconverged"].buf).reshape(R0.shape) != 0)
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::processes_real_roots: {str(e)}") from e
+        finally:
+            for shared_memory in shared_memories.values():
+                shared_memory.close()
+                shared_memory.unlink()
+
+    # forward window model: the reflectance measured through the windows for a corrected (true) reflectance,
+    # the series of get_polynomial_roots (its closed form for the closed_form solver) at the inverse post-transform;
+    # real_roots(forward(corrected)) gives back the corrected reflectance
+    def forward(self, corrected_reflectance):
+        try:
+            real_roots = invert_correction_type(np.asarray(corrected_reflectance, dtype=np.double), self.correction_type)
+            if self.solver == "closed_form":
+                transmission = self.grid_to_block(self.transmission, real_roots)
+                return self.grid_to_block(self.transmission_power, real_roots) * real_roots / (1 - (1 - transmission) * real_roots)
+            return series_polynomial(real_roots, self.grid_to_block(self.coefficients, real_roots))
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::forward: {str(e)}") from e
+
+    # apply -> jacobian_uncertainty: first-order propagation at the solved roots, dx/dR0 = 1/F_x and dx/dT = -F_T/F_x
+    # (F the window series, or its closed form for the closed_form solver), times the correction type derivative
+    def jacobian_uncertainty(self, real_roots, R0, spectrum_reflectance_uncertainty):
+        try:
+            R0 = np.asarray(R0, dtype=np.double)
+            transmission = self.grid_to_block(self.transmission, R0)
+            if self.solver == "closed_form":
+                transmission_power = self.grid_to_block(self.transmission_power, R0)
+                denominator = (transmission_power + R0 * (1 - transmission)) ** 2
+                root_R0_derivative = transmission_power / denominator
+                root_transmission_derivative = -R0 * (2 * self.windows_quantity * transmission_power / transmission - R0) / denominator
+            else:
+                root_R0_derivative = 1 / series_derivative(real_roots, self.grid_to_block(self.coefficients, R0))
+                root_transmission_derivative = -series_polynomial(real_roots, self.grid_to_block(self.transmission_coefficients, R0)) * root_R0_derivative
+            root_uncertainty = np.hypot(root_R0_derivative * spectrum_reflectance_uncertainty,
+                                        root_transmission_derivative * self.grid_to_block(self.transmission_uncertainty, R0))
+            return np.abs(correction_type_derivative(real_roots, self.correction_type)) * root_uncertainty
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::jacobian_uncertainty: {str(e)}") from e
+
+    # grid array (N, ...) reshaped to broadcast against a reflectance column (N,) or block (N, M)
+    def grid_to_block(self, grid_array, R0):
+        return grid_array.reshape(grid_array.shape[:1] + (1,) * (np.ndim(R0) - 1) + grid_array.shape[1:])
+
+    # largest |closed form - 9-term polynomial| of the corrected reflectance; the 9-term roots are those of the
+    # bracketed "newton" solver, NaN if any of them is not converged (no deviation rather than a wrong one)
+    def closed_form_deviation(self, spectrum_reflectance):
+        try:
+            R0 = np.asarray(spectrum_reflectance, dtype=np.double)
+            transmission, transmission_power = self.grid_to_block(self.transmission, R0), self.grid_to_block(self.transmission_power, R0)
+            closed_form = closed_form_roots(R0, transmission, self.windows_quantity)
+            polynomial, unconverged = solve_real_roots(R0, "newton", transmission, transmission_power, self.grid_to_block(self.coefficients, R0),
+                                                       self.newton_tolerance, self.newton_max_iterations)
+            if np.any(unconverged):
+                return np.nan
+            deviation = np.abs(apply_correction_type(closed_form, self.correction_type) - apply_correction_type(polynomial, self.correction_type))
+            return np.nanmax(deviation) if np.any(np.isfinite(deviation)) else np.nan
+        except Exception as e:
+            raise Exception(f"Critical error in CorrectionPlan::closed_form_deviation: {str(e)}") from e
+
+
+class CorrectionSweep:
+    """
+        Labelled result cube of window_correction_sweep: the corrected spectrum table of every combination of
+        transmission, windows quantity and correction type, cube[transmission, windows quantity, correction type],
+        and the roots they are derived from, real_roots[transmission, windows quantity], with the mask of the roots the
+        newton solver did not converge, unconverged[transmission, windows quantity] (none for the other solvers).
+    """
+    def __init__(self, transmission_labels, windows_quantities, correction_types, corrected_cube, real_roots, unconverged=None):
+        self.class_setter(transmission_labels, windows_quantities, correction_types, corrected_cube, real_roots, unconverged)
+
+    # class setter
+    def class_setter(self, transmission_labels, windows_quantities, correction_types, corrected_cube, real_roots, unconverged=None):
+        self.transmission_labels = list(transmission_labels)
+        self.windows_quantities = list(windows_quantities)
+        self.correction_types = list(correction_types)
+        self.corrected_cube = corrected_cube  # transmissions x windows quantities x correction types x rows x columns
+        self.real_roots = real_roots  # transmissions x windows quantities x rows x reflectance columns
+        self.unconverged = np.zeros(np.shape(real_roots), dtype=bool) if unconverged is None else unconverged
+
+    # (transmission, windows quantity, correction type) of every cube entry, in cube order
+    def combinations(self):
+        return [(transmission_label, windows_quantity, correction_type)
+                for transmission_label in self.transmission_labels
+                for windows_quantity in self.windows_quantities
+                for correction_type in self.correction_types]
+
+    # labels -> cube indexes
+    def index(self, transmission_label, windows_quantity, correction_type):
+        try:
+            return (self.transmission_labels.index(transmission_label), self.windows_quantities.index(windows_quantity),
+                    self.correction_types.index(correction_type))
+        except ValueError as e:
+            raise ValueError(f"no ({transmission_label}, {windows_quantity}, {correction_type}) combination in the sweep") from e
+
+    # the corrected spectrum table of one combination
+    def select(self, transmission_label, windows_quantity, correction_type):
+        return self.corrected_cube[self.index(transmission_label, windows_quantity, correction_type)]
+
+    # the roots of one transmission & windows quantity, for any correction type (see window_correction_from_roots)
+    def roots(self, transmission_label, windows_quantity):
+        return self.real_roots[self.index(transmission_label, windows_quantity, self.correction_types[0])[:2]]
+
+
+# matrix API: an N x M block of reflectance columns (and their N x M uncertainties) sharing one wavelength grid,
+# corrected in one vectorized call
+def window_correction_matrix(spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty,
+                             window_material_wavelengths, window_material_transmission, windows_quantity, correction_type,
+                             solver="batch", uncertainty_method="ratio", window_material_transmission_uncertainty=None,
+                             executor="serial", max_workers=None):
+    try:
+        correction_plan = CorrectionPlan(spectrum_wavelength, window_material_wavelengths, window_material_transmission,
+                                         windows_quantity, correction_type, solver, uncertainty_method,
+                                         window_material_transmission_uncertainty, executor, max_workers)
+        return correction_plan.apply(spectrum_reflectance, spectrum_reflectance_uncertainty)
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_matrix: {str(e)}") from e
+
+
+# forward API: corrected (true) reflectance, a column (N,) or block (N, M), -> reflectance measured through the windows
+# (see CorrectionPlan.forward); build a CorrectionPlan once to call forward repeatedly on the same grid, e.g. in a fit
+def window_forward_model(spectrum_wavelength, corrected_reflectance, window_material_wavelengths, window_material_transmission,
+                         windows_quantity, correction_type, solver="batch"):
+    try:
+        correction_plan = CorrectionPlan(spectrum_wavelength, window_material_wavelengths, window_material_transmission,
+                                         windows_quantity, correction_type, solver)
+        return correction_plan.forward(corrected_reflectance)
+    except Exception as e:
+        raise Exception(f"Critical error in window_forward_model: {str(e)}") from e
+
+
+# reflectance factor columns of a spectrum file: simple files (2-3 columns), raw files (Raw header) and compilations
+def reflectance_columns(columns_number, file_header):
+    try:
+        if columns_number in [2, 3]:  # simple 3-column
+            return [1]
+        elif columns_number in [11, 12, 13] and len(file_header) > 0 and "Raw" in file_header[-1]:  # raw
+            return [3]
+        return [num for num in range(columns_number - 1) if num % 2 != 0]  # compilations
+    except Exception as e:
+        raise Exception(f"Critical error in reflectance_columns: {str(e)}") from e
+
+
+# a whole spectrum table (wavelengths in the first column) corrected on the given reflectance columns;
+# the column next to a reflectance column, if any, is its uncertainty (ratio-scaled, or see CorrectionPlan.jacobian_uncertainty)
+def window_correction_columns(spectrum_data, reflectance_columns_list, window_material_wavelengths, window_material_transmission,
+                              windows_quantity, correction_type, solver="batch", uncertainty_method="ratio",
+                              window_material_transmission_uncertainty=None, executor="serial", max_workers=None):
+    try:
+        real_roots = window_correction_roots(spectrum_data, reflectance_columns_list, window_material_wavelengths,
+                                             window_material_transmission, windows_quantity, solver, executor, max_workers)
+        corrected_spectrum = window_correction_from_roots(spectrum_data, reflectance_columns_list, real_roots, correction_type)
+        if uncertainty_method != "ratio":
+            spectrum_data = np.asarray(spectrum_data, dtype=np.double)
+            correction_plan = CorrectionPlan(spectrum_data[:, 0], window_material_wavelengths, window_material_transmission,
+                                             windows_quantity, correction_type, solver, uncertainty_method,
+                                             window_material_transmission_uncertainty)
+            reflectance_columns_array = np.array(reflectance_columns_list, dtype=int)
+            has_uncertainty = reflectance_columns_array + 1 != spectrum_data.shape[1]
+            uncertainty_columns = reflectance_columns_array[has_uncertainty] + 1
+            corrected_spectrum[:, uncertainty_columns] = correction_plan.jacobian_uncertainty(
+                real_roots[:, has_uncertainty], spectrum_data[:, reflectance_columns_array[has_uncertainty]],
+                spectrum_data[:, uncertainty_columns])
+        return corrected_spectrum
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_columns: {str(e)}") from e
+
+
+# the physical roots (N x M) of the reflectance columns of a spectrum table: the solve, which does not depend
+# on the correction type (see window_correction_from_roots)
+def window_correction_roots(spectrum_data, reflectance_columns_list, window_material_wavelengths, window_material_transmission,
+                            windows_quantity, solver="batch", executor="serial", max_workers=None):
+    try:
+        spectrum_data = np.asarray(spectrum_data, dtype=np.double)
+        correction_plan = CorrectionPlan(spectrum_data[:, 0], window_material_wavelengths, window_material_transmission,
+                                         windows_quantity, CORRECTION_TYPES[0], solver, executor=executor, max_workers=max_workers)
+        return correction_plan.real_roots(spectrum_data[:, np.array(reflectance_columns_list, dtype=int)])
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_roots: {str(e)}") from e
+
+
+# solved roots -> corrected spectrum table for a correction type, without solving again:
+# only the correction type post-transform and the uncertainty ratio
+def window_correction_from_roots(spectrum_data, reflectance_columns_list, real_roots, correction_type):
+    try:
+        corrected_spectrum = np.array(spectrum_data, dtype=np.double)
+        reflectance_columns_array = np.array(reflectance_columns_list, dtype=int)
+        has_uncertainty = reflectance_columns_array + 1 != corrected_spectrum.shape[1]
+        spectrum_reflectance = corrected_spectrum[:, reflectance_columns_array]
+        corrected_reflectance = apply_correction_type(real_roots, correction_type)
+        uncertainty_columns = reflectance_columns_array[has_uncertainty] + 1
+        corrected_spectrum[:, uncertainty_columns] = (corrected_reflectance[:, has_uncertainty] * corrected_spectrum[:, uncertainty_columns]
+                                                      / spectrum_reflectance[:, has_uncertainty])
+        corrected_spectrum[:, reflectance_columns_array] = corrected_reflectance
+        return corrected_spectrum
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_from_roots: {str(e)}") from e
+
+
+# the roots of window_correction_roots, one reflectance column at a time with the plan computed once:
+# yields (number of solved columns, roots) after each column, so a caller can report progress or stop;
+# with block_rows, every column is solved by blocks of block_rows rows (a plan per block, computed once) and a step is
+# yielded after each block too (the number of solved columns is the same until its last block)
+def window_correction_roots_steps(spectrum_data, reflectance_columns_list, window_material_wavelengths, window_material_transmission,
+                                  windows_quantity, solver="batch", executor="serial", max_workers=None, block_rows=None):
+    try:
+        spectrum_data = np.asarray(spectrum_data, dtype=np.double)
+        blocks = [slice(None)]
+        if block_rows and len(spectrum_data) > block_rows:
+            blocks = [slice(start, start + block_rows) for start in range(0, len(spectrum_data), block_rows)]
+        correction_plans = [CorrectionPlan(spectrum_data[rows, 0], window_material_wavelengths, window_material_transmission,
+                                           windows_quantity, CORRECTION_TYPES[0], solver, executor=executor, max_workers=max_workers)
+                            for rows in blocks]
+        real_roots = np.full((len(spectrum_data), len(reflectance_columns_list)), np.nan)
+        for column_count, column in enumerate(reflectance_columns_list):
+            for block_count, (rows, correction_plan) in enumerate(zip(blocks, correction_plans)):
+                real_roots[rows, column_count] = correction_plan.real_roots(spectrum_data[rows, column])
+                yield column_count + (block_count + 1 == len(blocks)), real_roots
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_roots_steps: {str(e)}") from e
+
+
+# every combination of transmissions ({label: (wavelengths, transmission)}), windows quantities and correction types
+# for one spectrum table: each transmission is interpolated once on the spectrum wavelengths, all the transmission &
+# windows quantity roots are solved in one stacked call of the solver (see solve_real_roots) and the correction types
+# are post-transforms of them
+def window_correction_sweep(spectrum_data, reflectance_columns_list, transmission_presets, windows_quantities=(1, 2),
+                            correction_types=CORRECTION_TYPES, solver="batch"):
+    try:
+        if solver not in SOLVERS:
+            raise ValueError(f"unknown solver '{solver}', expected one of {SOLVERS}")
+        for correction_type in correction_types:
+            if correction_type not in CORRECTION_TYPES:
+                raise ValueError(f"unknown correction type '{correction_type}', expected one of {CORRECTION_TYPES}")
+        spectrum_data = np.asarray(spectrum_data, dtype=np.double)
+        R0 = spectrum_data[:, np.array(reflectance_columns_list, dtype=int)]
+        # transmissions x rows
+        transmission = np.array([np.interp(spectrum_data[:, 0], window_material_wavelengths, window_material_transmission)
+                                 for window_material_wavelengths, window_material_transmission in transmission_presets.values()])
+        # transmissions x windows quantities x rows x reflectance columns
+        stacked_R0 = np.broadcast_to(R0, (len(transmission), len(windows_quantities)) + R0.shape)
+        stacked_transmission = transmission[:, np.newaxis, :, np.newaxis]
+        windows_power = 2 * np.array(windows_quantities).reshape(1, -1, 1, 1)
+        coefficients = np.stack([series_coefficients(transmission, windows_quantity) for windows_quantity in windows_quantities], axis=1)
+        real_roots, unconverged = solve_real_roots(stacked_R0, solver, stacked_transmission, stacked_transmission ** windows_power,
+                                                   coefficients[:, :, :, np.newaxis, :])
+        corrected_cube = np.array([[[window_correction_from_roots(spectrum_data, reflectance_columns_list, windows_roots, correction_type)
+                                     for correction_type in correction_types]
+                                    for windows_roots in transmission_roots]
+                                   for transmission_roots in real_roots])
+        return CorrectionSweep(transmission_presets.keys(), windows_quantities, correction_types, corrected_cube, real_roots, unconverged)
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_sweep: {str(e)}") from e
+
+
+# Monte Carlo uncertainty of the correction: draws realizations of the reflectance (normal, sigma = its uncertainty)
+# and of the transmission (normal, sigma = its uncertainty, independent at each wavelength, clipped to (0, 1]),
+# solves all of them at once (bracketed "newton" solver, see newton_real_roots) and returns the percentiles
+# (len(percentiles) x reflectance shape) of the corrected reflectance over the converged draws of each point
+# (NaN if none), with return_unconverged also the number of unconverged (or unbracketed) draws of each point;
+# the draws are processed by blocks of rows of about chunk_points points, a seed makes them reproducible
+def window_correction_monte_carlo(spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty,
+                                  window_material_wavelengths, window_material_transmission, window_material_transmission_uncertainty,
+                                  windows_quantity, correction_type, draws=MONTE_CARLO_DRAWS, percentiles=MONTE_CARLO_PERCENTILES,
+                                  seed=None, chunk_points=MONTE_CARLO_CHUNK, return_unconverged=False):
+    try:
+        R0 = np.asarray(spectrum_reflectance, dtype=np.double)
+        R0_uncertainty = np.zeros(R0.shape) if spectrum_reflectance_uncertainty is None else np.asarray(spectrum_reflectance_uncertainty, dtype=np.double)
+        spectrum_wavelength = np.asarray(spectrum_wavelength, dtype=np.double)
+        transmission = np.interp(spectrum_wavelength, window_material_wavelengths, window_material_transmission)
+        if window_material_transmission_uncertainty is None:
+            transmission_uncertainty = np.zeros(transmission.shape)
+        else:
+            transmission_uncertainty = np.interp(spectrum_wavelength, window_material_wavelengths, window_material_transmission_uncertainty)
+        random_generator = np.random.default_rng(seed)
+        corrected_percentiles = np.full((len(percentiles),) + R0.shape, np.nan)
+        unconverged_draws = np.zeros(R0.shape, dtype=int)
+        columns_number = int(np.prod(R0.shape[1:]))
+        chunk_rows = max(1, chunk_points // (draws * max(columns_number, 1)))
+        for start in range(0, len(R0), chunk_rows):
+            rows = slice(start, start + chunk_rows)
+            R0_draws = R0[rows] + R0_uncertainty[rows] * random_generator.standard_normal((draws,) + R0[rows].shape)
+            transmission_draws = transmission[rows] + transmission_uncertainty[rows] * random_generator.standard_normal((draws, len(R0[rows])))
+            transmission_draws = np.clip(transmission_draws, 1e-6, 1).reshape(transmission_draws.shape + (1,) * (R0.ndim - 1))
+            real_roots, unconverged = solve_real_roots(R0_draws, "newton", transmission_draws, transmission_draws ** (2 * windows_quantity),
+                                                       series_coefficients(transmission_draws, windows_quantity))
+            real_roots[unconverged] = np.nan
+            unconverged_draws[rows] = np.count_nonzero(np.isnan(real_roots), axis=0)
+            if np.any(unconverged_draws[rows]):  # nanpercentile is much slower, only for the blocks with unconverged draws
+                solved = unconverged_draws[rows] < draws
+                corrected_percentiles[:, rows][:, solved] = np.nanpercentile(apply_correction_type(real_roots[:, solved], correction_type),
+                                                                             percentiles, axis=0)
+            else:
+                corrected_percentiles[:, rows] = np.percentile(apply_correction_type(real_roots, correction_type), percentiles, axis=0)
+        if return_unconverged:
+            return corrected_percentiles, unconverged_draws
+        return corrected_percentiles
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_monte_carlo: {str(e)}") from e
+
+
+# window_correction_columns with Monte Carlo uncertainties: the uncertainty column of each reflectance column
+# is half the +-1 sigma percentile interval of window_correction_monte_carlo instead of the ratio-scaled one
+def window_correction_columns_monte_carlo(spectrum_data, reflectance_columns_list, window_material_wavelengths,
+                                          window_material_transmission, window_material_transmission_uncertainty, windows_quantity,
+                                          correction_type, draws=MONTE_CARLO_DRAWS, seed=None, solver="batch"):
+    try:
+        spectrum_data = np.asarray(spectrum_data, dtype=np.double)
+        corrected_spectrum = window_correction_columns(spectrum_data, reflectance_columns_list, window_material_wavelengths,
+                                                       window_material_transmission, windows_quantity, correction_type, solver)
+        reflectance_columns_array = np.array(reflectance_columns_list, dtype=int)
+        reflectance_columns_array = reflectance_columns_array[reflectance_columns_array + 1 != spectrum_data.shape[1]]
+        if len(reflectance_columns_array) == 0:
+            return corrected_spectrum  # no uncertainty column to fill
+        lower, upper = window_correction_monte_carlo(spectrum_data[:, 0], spectrum_data[:, reflectance_columns_array],
+                                                     spectrum_data[:, reflectance_columns_array + 1], window_material_wavelengths,
+                                                     window_material_transmission, window_material_transmission_uncertainty,
+                                                     windows_quantity, correction_type, draws, MONTE_CARLO_PERCENTILES, seed)
+        corrected_spectrum[:, reflectance_columns_array + 1] = (upper - lower) / 2
+        return corrected_spectrum
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_columns_monte_carlo: {str(e)}") from e
+
+
+# stream of DataBlock (see DataPars.iter_blocks) -> stream of corrected DataBlock, one block in memory at a time
+def window_correction_stream(data_blocks, window_material_wavelengths, window_material_transmission, windows_quantity, correction_type,
+                             reflectance_columns_list=None, solver="batch"):
+    try:
+        for data_block in data_blocks:
+            columns_list = reflectance_columns_list or reflectance_columns(data_block.rows.shape[1], data_block.header)
+            yield data_block.with_rows(window_correction_columns(data_block.rows, columns_list,
+                                                                 window_material_wavelengths, window_material_transmission,
+                                                                 windows_quantity, correction_type, solver))
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_stream: {str(e)}") from e
+
+
+# file -> corrected file without holding the whole data in memory; returns the number of rows written
+def window_correction_file_stream(file_path, export_path, window_material_wavelengths, window_material_transmission,
+                                  windows_quantity, correction_type, window_material, block_rows=65536, solver="batch"):
+    try:
+        data_blocks = DataPars(file_path).iter_blocks(block_rows)
+        first_block = next(data_blocks, None)
+        if first_block is None:
+            raise ValueError(f"no data in {file_path}")
+        reflectance_columns_list = reflectance_columns(first_block.rows.shape[1], first_block.header)
+        header_str = export_header(first_block.header, reflectance_columns_list, window_material, windows_quantity, correction_type)
+        corrected_blocks = window_correction_stream(chain([first_block], data_blocks), window_material_wavelengths, window_material_transmission,
+                                                    windows_quantity, correction_type, reflectance_columns_list, solver)
+        return export_blocks(export_path, header_str, corrected_blocks)
+    except Exception as e:
+        raise Exception(f"Critical error in window_correction_file_stream: {str(e)}") from e
+
+
+# series coefficients T^(2n)·(1-T)^(i-1), i = 1..SERIES_TERMS, one row per transmission value
+def series_coefficients(transmission, windows_quantity):
+    try:
+        transmission = np.asarray(transmission, dtype=np.double)
+        powers = np.arange(SERIES_TERMS)
+        return (transmission[..., np.newaxis] ** (2 * windows_quantity)) * ((1 - transmission[..., np.newaxis]) ** powers)
+    except Exception as e:
+        raise Exception(f"Critical error in series_coefficients: {str(e)}") from e
+
+
+# the same matrices np.polynomial.Polynomial.roots() builds, stacked into an N x SERIES_TERMS x SERIES_TERMS array
+def companion_matrices(R0, coefficients):
+    try:
+        full_coefficients = np.concatenate((-np.asarray(R0, dtype=np.double)[..., np.newaxis], coefficients), axis=-1)
+        matrices = np.zeros(full_coefficients.shape[:-1] + (SERIES_TERMS, SERIES_TERMS))
+        matrices[..., np.arange(1, SERIES_TERMS), np.arange(SERIES_TERMS - 1)] = 1
+        matrices[..., :, -1] -= full_coefficients[..., :-1] / full_coefficients[..., -1:]
+        return matrices
+    except Exception as e:
+        raise Exception(f"Critical error in companion_matrices: {str(e)}") from e
+
+
+# reference per-point path over precomputed coefficients: np.polynomial roots, first real root
+def polynomial_real_roots(R0, coefficients):
+    try:
+        real_roots = np.full(np.shape(R0), np.nan)
+        for index in np.ndindex(np.shape(R0)):
+            roots = np.polynomial.Polynomial(np.concatenate(([-R0[index]], coefficients[index]))).roots()
+            for root in roots:
+                if root.imag == 0:
+                    real_roots[index] = root.real
+                    break
+        return real_roots
+    except Exception as e:
+        raise Exception(f"Critical error in polynomial_real_roots: {str(e)}") from e
+
+
+# vectorized get_real_roots: the first real root of the sorted roots is the smallest real one
+def select_real_roots(roots):
+    try:
+        is_real = roots.imag == 0
+        real_roots = np.min(np.where(is_real, roots.real, np.inf), axis=-1)
+        real_roots[~is_real.any(axis=-1)] = np.nan
+        return real_roots
+    except Exception as e:
+        raise Exception(f"Critical error in select_real_roots: {str(e)}") from e
+
+
+# solves every point at once; non-finite reflectances give NaN,
+# degenerate series (T = 0 or T = 1) go through the reference per-point solver
+def batch_real_roots(R0, coefficients):
+    try:
+        R0 = np.asarray(R0, dtype=np.double)
+        real_roots = np.full(R0.shape, np.nan)
+        finite = np.isfinite(R0) & np.all(np.isfinite(coefficients), axis=-1)
+        regular = finite & (coefficients[..., -1] != 0)
+        if np.any(regular):
+            regular_R0, regular_coefficients = R0[regular], coefficients[regular]
+            regular_roots = np.empty(len(regular_R0))
+            for start in range(0, len(regular_R0), BATCH_CHUNK):
+                chunk = slice(start, start + BATCH_CHUNK)
+                roots = np.linalg.eigvals(companion_matrices(regular_R0[chunk], regular_coefficients[chunk]))
+                regular_roots[chunk] = select_real_roots(roots)
+            real_roots[regular] = regular_roots
+        degenerate = finite & ~regular
+        if np.any(degenerate):
+            real_roots[degenerate] = polynomial_real_roots(R0[degenerate], coefficients[degenerate])
+        return real_roots
+    except Exception as e:
+        raise Exception(f"Critical error in batch_real_roots: {str(e)}") from e
+
+
+# per-point kernel of the "compiled" solver, written for numba (scalar loops only): with 0 < T <= 1 and R0 >= 0 the
+# series is increasing & convex for x >= 0, its root is in [0, min_k (R0 / c_k)^(1 / (k + 1))] (see series_upper_bound);
+# Newton steps from the upper end, kept in the bracket (bisection otherwise), until the step is below tolerance
+# relative to the root, then a last Newton step from that root (the criterion only bounds the step before it).
+# The points outside this domain, or not converged in max_iterations steps, are left NaN (see compiled_real_roots)
+def series_bracketed_roots(R0, coefficients, real_roots, max_iterations=100, tolerance=1e-15):
+    for index in prange(R0.shape[0]):
+        real_roots[index] = np.nan
+        physical = R0[index] >= 0 and R0[index] < np.inf and coefficients[index, 0] > 0
+        for term in range(coefficients.shape[1]):
+            physical = physical and coefficients[index, term] >= 0 and coefficients[index, term] < np.inf
+        if not physical:
+            continue
+        lower, upper = 0.0, R0[index] / coefficients[index, 0]
+        for term in range(1, coefficients.shape[1]):
+            if coefficients[index, term] > 0:
+                upper = min(upper, (R0[index] / coefficients[index, term]) ** (1 / (term + 1)))
+        root = upper
+        converged = False
+        for _ in range(max_iterations + 1):
+            # value & derivative of x * sum(c_k x^k) - R0, Horner scheme
+            value, derivative = 0.0, 0.0
+            for term in range(coefficients.shape[1] - 1, -1, -1):
+                derivative = derivative * root + value
+                value = value * root + coefficients[index, term]
+            derivative = value + root * derivative
+            value = root * value - R0[index]
+            if converged:
+                # the last Newton step, from the converged root
+                if value != 0 and derivative > 0:
+                    root -= value / derivative
+                break
+            if value == 0:
+                converged = True
+                break
+            if value > 0:
+                upper = root
+            else:
+                lower = root
+            next_root = root - value / derivative
+            # a Newton step below tolerance (or underflowing to 0) is the root, even on the bound just set to it
+            if abs(next_root - root) <= tolerance * next_root:
+                converged = True
+            elif not lower < next_root < upper:
+                next_root = 0.5 * (lower + upper)
+            root = next_root
+        if converged:
+            real_roots[index] = root
+
+
+# the kernel compiled over whole arrays (parallel loop over the points), None without numba
+compiled_series_roots = njit(parallel=True, cache=True)(series_bracketed_roots) if njit is not None else None
+
+
+# "compiled" solver: the compiled kernel on every point, the points outside its physical domain by batch_real_roots
+# (same roots as the reference solver); batch_real_roots on every point without numba
+def compiled_real_roots(R0, coefficients):
+    try:
+        if compiled_series_roots is None:
+            return batch_real_roots(R0, coefficients)
+        R0_points = np.ascontiguousarray(np.reshape(R0, -1), dtype=np.double)
+        coefficients_points = np.ascontiguousarray(np.reshape(coefficients, (-1, np.shape(coefficients)[-1])), dtype=np.double)
+        real_roots = np.empty(R0_points.shape)
+        compiled_series_roots(R0_points, coefficients_points, real_roots)
+        unsolved = np.isnan(real_roots)
+        if np.any(unsolved):
+            real_roots[unsolved] = batch_real_roots(R0_points[unsolved], coefficients_points[unsolved])
+        return real_roots.reshape(np.shape(R0))
+    except Exception as e:
+        raise Exception(f"Critical error in compiled_real_roots: {str(e)}") from e
+
+
+# roots of reflectance points from their grid quantities (broadcast against R0) & the mask of the points the newton
+# solver did not converge (none for the other solvers): the solve of every executor
+def solve_real_roots(R0, solver, transmission, transmission_power, coefficients, newton_tolerance=NEWTON_TOLERANCE,
+                     newton_max_iterations=NEWTON_ITERATIONS):
+    try:
+        if solver == "closed_form":
+            return R0 / (transmission_power + R0 * (1 - transmission)), np.zeros(np.shape(R0), dtype=bool)
+        if solver == "newton":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                physical = (transmission > 0) & (transmission <= 1)
+                lower = np.where(physical, R0 / (transmission_power + R0 * (1 - transmission)), np.nan)
+                upper = np.where(R0 >= 0, series_upper_bound(R0, coefficients), R0 / transmission_power)
+            return newton_real_roots(R0, coefficients, lower, upper, newton_max_iterations, newton_tolerance)
+        coefficients = np.broadcast_to(coefficients, np.shape(R0) + (SERIES_TERMS,))
+        if solver == "batch":
+            real_roots = batch_real_roots(R0, coefficients)
+        elif solver == "compiled":
+            real_roots = compiled_real_roots(R0, coefficients)
+        else:
+            real_roots = polynomial_real_roots(R0, coefficients)
+        return real_roots, np.zeros(np.shape(R0), dtype=bool)
+    except Exception as e:
+        raise Exception(f"Critical error in solve_real_roots: {str(e)}") from e
+
+
+# persistent pool of the "processes" executor: the workers are started by the first solve and reused by the next ones
+def process_pool(max_workers):
+    if max_workers not in PROCESS_POOLS:
+        PROCESS_POOLS[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+    return PROCESS_POOLS[max_workers]
+
+
+# the tasks of a solve mapped on the persistent pool; a broken pool (a worker died) is dropped, shut down and
+# replaced once to run the tasks again (they only write their own part of the shared outputs), then the error is raised
+def process_pool_map(max_workers, function, *iterables, chunksize=1):
+    for attempt in range(2):
+        executor = process_pool(max_workers)
+        try:
+            return list(executor.map(function, *iterables, chunksize=chunksize))
+        except BrokenProcessPool:
+            if PROCESS_POOLS.get(max_workers) is executor:
+                del PROCESS_POOLS[max_workers]
+            executor.shutdown(wait=False, cancel_futures=True)
+            if attempt:
+                raise
+
+
+# array -> new shared memory block holding a float64 copy of it (close & unlink it when done)
+def share_array(array):
+    shared_memory = SharedMemory(create=True, size=max(array.size, 1) * np.dtype(np.double).itemsize)
+    np.ndarray(array.shape, dtype=np.double, buffer=shared_memory.buf)[...] = array
+    return shared_memory
+
+
+# (shared memory name, shape) -> copy of array[index]; no view of the block outlives it
+def read_shared_array(shared_array, index):
+    shared_memory = SharedMemory(name=shared_array[0])
+    try:
+        return np.ndarray(shared_array[1], dtype=np.double, buffer=shared_memory.buf)[index].copy()
+    finally:
+        shared_memory.close()
+
+
+# (shared memory name, shape) -> array[index] = values
+def write_shared_array(shared_array, index, values):
+    shared_memory = SharedMemory(name=shared_array[0])
+    try:
+        np.ndarray(shared_array[1], dtype=np.double, buffer=shared_memory.buf)[index] = values
+    finally:
+        shared_memory.close()
+
+
+# "processes" executor task, run in a worker: the rows of one column of the shared R0 solved into the shared outputs;
+# shared_arrays: {key: (shared memory name, shape)}, solver_options: (solver, newton tolerance, newton max iterations)
+def solve_shared_task(shared_arrays, solver_options, column, rows):
+    try:
+        real_roots, unconverged = solve_real_roots(read_shared_array(shared_arrays["R0"], (rows, column)), solver_options[0],
+                                                   read_shared_array(shared_arrays["transmission"], rows),
+                                                   read_shared_array(shared_arrays["transmission_power"], rows),
+                                                   read_shared_array(shared_arrays["coefficients"], rows), *solver_options[1:])
+        write_shared_array(shared_arrays["real_roots"], (rows, column), real_roots)
+        write_shared_array(shared_arrays["unconverged"], (rows, column), unconverged)
+    except Exception as e:
+        raise Exception(f"Critical error in solve_shared_task: {str(e)}") from e
+
+
+# length -> at most parts contiguous, non-empty slices covering it
+def split_slices(length, parts):
+    bounds = np.linspace(0, length, min(parts, length) + 1).round().astype(int)
+    return [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+# infinite-order limit of the series: sum T^(2n)·(1-T)^(i-1)·x^i = T^(2n)·x / (1 - (1-T)·x)
+def closed_form_roots(R0, transmission, windows_quantity):
+    try:
+        transmission = np.asarray(transmission, dtype=np.double)
+        return R0 / (transmission ** (2 * windows_quantity) + R0 * (1 - transmission))
+    except Exception as e:
+        raise Exception(f"Critical error in closed_form_roots: {str(e)}") from e
+
+
+# derivatives of the series coefficients with respect to the transmission:
+# d/dT T^(2n)·(1-T)^k = 2n·T^(2n-1)·(1-T)^k - k·T^(2n)·(1-T)^(k-1)
+def series_transmission_coefficients(transmission, windows_quantity):
+    try:
+        transmission = np.asarray(transmission, dtype=np.double)[..., np.newaxis]
+        powers = np.arange(SERIES_TERMS)
+        return (2 * windows_quantity * transmission ** (2 * windows_quantity - 1) * (1 - transmission) ** powers
+                - powers * transmission ** (2 * windows_quantity) * (1 - transmission) ** np.maximum(powers - 1, 0))
+    except Exception as e:
+        raise Exception(f"Critical error in series_transmission_coefficients: {str(e)}") from e
+
+
+# R0 >= 0 & non-negative coefficients: every term is below R0 at the root, x <= (R0 / c_k)^(1 / (k + 1)) for all k;
+# the smallest of these bounds is close to the root even at low transmission, where R0 / T^(2n) (k = 0) is not.
+# For the series coefficients T^(2n)·(1-T)^k, log of the k-th bound is b + (a - b) / (k + 1) with a = log(R0 / T^(2n))
+# and b = -log(1 - T): monotonic in k, the smallest bound is the first or the last one
+def series_upper_bound(R0, coefficients):
+    R0 = np.asarray(R0, dtype=np.double)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.minimum(R0 / coefficients[..., 0], (R0 / coefficients[..., -1]) ** (1 / np.shape(coefficients)[-1]))
+
+
+# "newton" solver, vectorized: with 0 < T <= 1 the series is strictly increasing, its real root is unique and in
+# [closed form, R0 / T^(2n)] (the truncated series is below its infinite limit, for x >= 0 as for x < 0), or in
+# [closed form, series_upper_bound] for R0 >= 0.
+# Newton steps from the lower end, kept in the bracket (bisection otherwise), until the step is below tolerance relative
+# to the root: on the whole (broadcast) arrays while most points are unconverged, then on the unconverged points only.
+# NaN where there is no bracket: non-finite or unordered bounds (non-finite R0, R0 below -T^(2n) / (1 - T)), or NaN
+# bounds (solve_real_roots gives them for T outside ]0, 1]);
+# returns the roots & the mask of the points still unconverged after max_iterations steps (the last iterates)
+def newton_real_roots(R0, coefficients, lower, upper, max_iterations=NEWTON_ITERATIONS, tolerance=NEWTON_TOLERANCE):
+    try:
+        output_shape = np.broadcast_shapes(np.shape(R0), np.shape(lower), np.shape(upper), np.shape(coefficients)[:-1])
+        shape = output_shape or (1,)  # a single point is solved as a 1-point array
+        R0, lower, upper = [np.broadcast_to(np.asarray(array, dtype=np.double), shape) for array in (R0, lower, upper)]
+        active = np.isfinite(lower) & np.isfinite(upper) & (lower <= upper)  # bracketed & not converged yet
+        real_roots = np.where(active, lower, np.nan)
+        iterations = 0
+        # whole arrays: the coefficients are not copied to every point, the converged points are kept as they are
+        while iterations < max_iterations and np.count_nonzero(active) > active.size // 4:
+            next_root, converged, next_lower, next_upper = bracketed_newton_step(real_roots, R0, coefficients, lower, upper, tolerance)
+            real_roots = np.where(active, next_root, real_roots)
+            lower, upper = np.where(active, next_lower, lower), np.where(active, next_upper, upper)
+            active &= ~converged
+            iterations += 1
+        # the few unconverged points left, compacted after every step that converged some of them
+        points = np.nonzero(active)
+        root, R0, lower, upper = real_roots[points], R0[points], lower[points], upper[points]
+        coefficients = np.broadcast_to(coefficients, shape + np.shape(coefficients)[-1:])[points]
+        remaining = np.arange(len(root))
+        for _ in range(iterations, max_iterations):
+            if not len(remaining):
+                break
+            root, converged, lower, upper = bracketed_newton_step(root, R0, coefficients, lower, upper, tolerance)
+            real_roots[tuple(axis_points[remaining] for axis_points in points)] = root
+            if np.any(converged):
+                remaining, root, R0, coefficients, lower, upper = [array[~converged] for array in (remaining, root, R0, coefficients, lower, upper)]
+        unconverged = np.zeros(shape, dtype=bool)
+        unconverged[tuple(axis_points[remaining] for axis_points in points)] = True
+        return real_roots.reshape(output_shape), unconverged.reshape(output_shape)
+    except Exception as e:
+        raise Exception(f"Critical error in newton_real_roots: {str(e)}") from e
+
+
+# one step of newton_real_roots: the bracket narrowed to the root (by the sign of the series), the next root (Newton,
+# or bisection if the step leaves the bracket) & the mask of the points converged by this step
+def bracketed_newton_step(root, R0, coefficients, lower, upper, tolerance):
+    value = series_polynomial(root, coefficients) - R0
+    upper = np.where(value > 0, root, upper)
+    lower = np.where(value < 0, root, lower)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        next_root = root - value / series_derivative(root, coefficients)
+    # a Newton step below tolerance (or underflowing to 0) is the root, even on the bound just set to it
+    converged = (value == 0) | (np.abs(next_root - root) <= tolerance * np.abs(next_root))
+    next_root = np.where(value == 0, root, next_root)
+    next_root = np.where(converged | ((lower < next_root) & (next_root < upper)), next_root, 0.5 * (lower + upper))
+    return next_root, converged, lower, upper
+
+
+# value of the series polynomial (without the -R0 term) at x, Horner scheme (in place: no temporary per term)
+def series_polynomial(x, coefficients):
+    try:
+        value = np.zeros(np.broadcast_shapes(np.shape(x), np.shape(coefficients)[:-1]))
+        for i in range(SERIES_TERMS - 1, -1, -1):
+            value += coefficients[..., i]
+            value *= x
+        return value
+    except Exception as e:
+        raise Exception(f"Critical error in series_polynomial: {str(e)}") from e
+
+
+# derivative of series_polynomial with respect to x
+def series_derivative(x, coefficients):
+    try:
+        value = np.zeros(np.broadcast_shapes(np.shape(x), np.shape(coefficients)[:-1]))
+        for i in range(SERIES_TERMS - 1, -1, -1):
+            value *= x
+            value += (i + 1) * coefficients[..., i]
+        return value
+    except Exception as e:
+        raise Exception(f"Critical error in series_derivative: {str(e)}") from e
+
+
+# vectorized get_corrected_reflectance_value post-transform
+def apply_correction_type(real_roots, correction_type):
+    try:
+        if correction_type == "parasitic reflections":
+            return real_roots
+        return real_roots / (1.0245 - real_roots * 0.10612)
+    except Exception as e:
+        raise Exception(f"Critical error in apply_correction_type: {str(e)}") from e
+
+
+# inverse of apply_correction_type: y = x / (1.0245 - 0.10612·x) <=> x = 1.0245·y / (1 + 0.10612·y)
+def invert_correction_type(corrected_reflectance, correction_type):
+    try:
+        if correction_type == "parasitic reflections":
+            return corrected_reflectance
+        return 1.0245 * corrected_reflectance / (1 + corrected_reflectance * 0.10612)
+    except Exception as e:
+        raise Exception(f"Critical error in invert_correction_type: {str(e)}") from e
+
+
+# derivative of apply_correction_type with respect to the root: d/dx x / (1.0245 - 0.10612·x) = 1.0245 / (1.0245 - 0.10612·x)^2
+def correction_type_derivative(real_roots, correction_type):
+    try:
+        if correction_type == "parasitic reflections":
+            return np.ones(np.shape(real_roots))
+        return 1.0245 / (1.0245 - real_roots * 0.10612) ** 2
+    except Exception as e:
+        raise Exception(f"Critical error in correction_type_derivative: {str(e)}") from e
+
+
 def demo():
     # INPUT
     # spectrum
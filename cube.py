@@ -0,0 +1,215 @@
+# coding: utf-8
+
+"""
+    Hyperspectral cube window correction: corrects imaging spectrometer cubes (rows x columns x bands) tile by tile.
+
+    How to use:
+        python cube.py scene.npy scene_wincor.npy --wavelengths bands.txt --windows 2 --correction extended --jobs 8
+        python cube.py scene.img scene_wincor.img --tile 128 128
+
+    Inputs are .npy cubes (rows x columns x bands, band wavelengths given by --wavelengths, a .npy or text file)
+    or ENVI-style raw cubes with their .hdr header (bsq, bil or bip interleave, band wavelengths in the header).
+    The input and the output (.npy, or ENVI raw in bip interleave for any other extension) are memory-mapped:
+    only the tiles being corrected are in memory, whatever the size of the cube. The window transmission is
+    interpolated once on the band wavelengths and the tiles are corrected by --jobs threads (every core by default).
+"""
+
+# PACKAGES
+import os
+import re
+import sys
+import argparse
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# MODULES
+from core import CorrectionPlan, apply_correction_type
+from batch import CORRECTION_TYPES, TRANSMISSION_PRESETS, load_transmission
+
+# GLOBALS
+CUBE_TILE = (64, 64)  # spatial tile (rows, columns) corrected at once
+# ENVI data type codes -> numpy types
+ENVI_DATA_TYPES = {1: np.uint8, 2: np.int16, 3: np.int32, 4: np.float32, 5: np.float64, 12: np.uint16, 13: np.uint32,
+                   14: np.int64, 15: np.uint64}
+# ENVI interleave -> axes of the stored array giving (rows, columns, bands)
+ENVI_INTERLEAVE_AXES = {"bsq": (1, 2, 0), "bil": (0, 2, 1), "bip": (0, 1, 2)}
+
+
+# ENVI header (.hdr) -> {key: value}, the {...} values as lists of str
+def read_envi_header(header_path):
+    try:
+        with open(header_path, "r", encoding="utf8", errors="replace") as header_file:
+            header_text = header_file.read()
+        if not header_text.lstrip().startswith("ENVI"):
+            raise ValueError(f"{header_path} is not an ENVI header")
+        header = {}
+        for key, braced_value, value in re.findall(r"^\s*([^=\n]+?)\s*=\s*(?:\{([^}]*)\}|(.*))$", header_text, re.MULTILINE):
+            if braced_value:
+                header[key.lower()] = [item.strip() for item in braced_value.split(",") if item.strip()]
+            else:
+                header[key.lower()] = value.strip()
+        return header
+    except Exception as e:
+        raise Exception(f"Critical error in read_envi_header: {str(e)}") from e
+
+
+# raw cube path -> its header path: cube.img -> cube.hdr or cube.img.hdr
+def envi_header_path(cube_path):
+    for header_path in [os.path.splitext(cube_path)[0] + ".hdr", cube_path + ".hdr"]:
+        if os.path.isfile(header_path):
+            return header_path
+    raise ValueError(f"no ENVI header found for {cube_path}")
+
+
+# band wavelengths file: .npy or text, one wavelength per line
+def load_band_wavelengths(wavelengths_path):
+    try:
+        if wavelengths_path.lower().endswith(".npy"):
+            return np.asarray(np.load(wavelengths_path), dtype=np.double).ravel()
+        return np.loadtxt(wavelengths_path, dtype=np.double, ndmin=1).ravel()
+    except Exception as e:
+        raise Exception(f"Critical error in load_band_wavelengths: {str(e)}") from e
+
+
+# cube file -> (memory-mapped rows x columns x bands view, band wavelengths, reflectance scale factor)
+def open_cube(cube_path, band_wavelengths=None):
+    try:
+        if cube_path.lower().endswith(".npy"):
+            cube = np.load(cube_path, mmap_mode="r")
+            scale_factor = 1.0
+        else:
+            header = read_envi_header(envi_header_path(cube_path))
+            interleave = header.get("interleave", "bsq").lower()
+            if interleave not in ENVI_INTERLEAVE_AXES:
+                raise ValueError(f"unknown ENVI interleave '{interleave}'")
+            rows_number, columns_number, bands_number = int(header["lines"]), int(header["samples"]), int(header["bands"])
+            stored_shape = {"bsq": (bands_number, rows_number, columns_number), "bil": (rows_number, bands_number, columns_number),
+                            "bip": (rows_number, columns_number, bands_number)}[interleave]
+            data_type = np.dtype(ENVI_DATA_TYPES[int(header["data type"])])
+            data_type = data_type.newbyteorder(">" if header.get("byte order", "0") == "1" else "<")
+            stored_cube = np.memmap(cube_path, dtype=data_type, mode="r", offset=int(header.get("header offset", "0")),
+                                    shape=stored_shape)
+            cube = stored_cube.transpose(ENVI_INTERLEAVE_AXES[interleave])
+            scale_factor = float(header.get("reflectance scale factor", "1"))
+            if band_wavelengths is None and "wavelength" in header:
+                band_wavelengths = np.array(header["wavelength"], dtype=np.double)
+        if cube.ndim != 3:
+            raise ValueError(f"{cube_path} is not a rows x columns x bands cube")
+        if band_wavelengths is None:
+            raise ValueError(f"no band wavelengths for {cube_path}")
+        band_wavelengths = np.asarray(band_wavelengths, dtype=np.double)
+        if len(band_wavelengths) != cube.shape[2]:
+            raise ValueError(f"{len(band_wavelengths)} band wavelengths for a cube of {cube.shape[2]} bands")
+        return cube, band_wavelengths, scale_factor
+    except Exception as e:
+        raise Exception(f"Critical error in open_cube: {str(e)}") from e
+
+
+# memory-mapped output cube (rows x columns x bands): .npy, or ENVI raw (bip) with its header for any other extension
+def create_output_cube(output_path, cube_shape, data_type, band_wavelengths, description=""):
+    try:
+        data_type = np.dtype(data_type)
+        if output_path.lower().endswith(".npy"):
+            return np.lib.format.open_memmap(output_path, mode="w+", dtype=data_type, shape=cube_shape)
+        envi_data_type = {np.dtype(numpy_type): code for code, numpy_type in ENVI_DATA_TYPES.items()}[data_type]
+        with open(os.path.splitext(output_path)[0] + ".hdr", "w", encoding="utf8") as header_file:
+            header_file.write("ENVI\n"
+                              f"description = {{{description}}}\n"
+                              f"samples = {cube_shape[1]}\n"
+                              f"lines = {cube_shape[0]}\n"
+                              f"bands = {cube_shape[2]}\n"
+                              "header offset = 0\n"
+                              "file type = ENVI Standard\n"
+                              f"data type = {envi_data_type}\n"
+                              "interleave = bip\n"
+                              f"byte order = {0 if sys.byteorder == 'little' else 1}\n"
+                              f"wavelength = {{{', '.join(repr(float(wavelength)) for wavelength in band_wavelengths)}}}\n")
+        return np.memmap(output_path, dtype=data_type, mode="w+", shape=cube_shape)
+    except Exception as e:
+        raise Exception(f"Critical error in create_output_cube: {str(e)}") from e
+
+
+# spatial tiles (row slice, column slice) covering a cube
+def cube_tiles(cube_shape, tile_shape=CUBE_TILE):
+    return [(slice(row, row + tile_shape[0]), slice(column, column + tile_shape[1]))
+            for row in range(0, cube_shape[0], tile_shape[0])
+            for column in range(0, cube_shape[1], tile_shape[1])]
+
+
+# one tile of the input cube -> its corrected tile in the output cube: the pixels of the tile are the
+# reflectance columns of the plan (bands x pixels), so the whole tile is solved at once
+def correct_cube_tile(correction_plan, input_cube, output_cube, tile, scale_factor=1.0):
+    try:
+        input_tile = np.asarray(input_cube[tile], dtype=np.double)
+        spectra = input_tile.reshape(-1, input_tile.shape[2]).T / scale_factor
+        corrected_spectra = apply_correction_type(correction_plan.real_roots(spectra), correction_plan.correction_type)
+        output_cube[tile] = corrected_spectra.T.reshape(input_tile.shape)
+        return input_tile.shape[0] * input_tile.shape[1]
+    except Exception as e:
+        raise Exception(f"Critical error in correct_cube_tile: {str(e)}") from e
+
+
+# input cube -> output cube, both memory-mapped (rows x columns x bands); the transmission is interpolated once
+# on the band wavelengths, the tiles are corrected by jobs threads (every core if None), at most jobs tiles in memory;
+# yields (corrected pixels, pixels) as the tiles are done
+def correct_cube(input_cube, band_wavelengths, output_cube, window_wavelength, window_transmission, windows_quantity, correction_type,
+                 tile_shape=CUBE_TILE, jobs=None, scale_factor=1.0, solver="batch"):
+    try:
+        if band_wavelengths.min() < np.min(window_wavelength) or band_wavelengths.max() > np.max(window_wavelength):
+            raise ValueError("the band wavelengths exceed the transmission wavelengths")
+        correction_plan = CorrectionPlan(band_wavelengths, window_wavelength, window_transmission, windows_quantity,
+                                         correction_type, solver)
+        pixels_number = input_cube.shape[0] * input_cube.shape[1]
+        corrected_pixels = 0
+        tiles = cube_tiles(input_cube.shape, tile_shape)
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+            # numpy releases the GIL in the solve: the threads share the plan & the memory maps
+            for tile_pixels in executor.map(lambda tile: correct_cube_tile(correction_plan, input_cube, output_cube, tile, scale_factor),
+                                            tiles):
+                corrected_pixels += tile_pixels
+                yield corrected_pixels, pixels_number
+        if hasattr(output_cube, "flush"):
+            output_cube.flush()
+    except Exception as e:
+        raise Exception(f"Critical error in correct_cube: {str(e)}") from e
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Window reflection correction of hyperspectral cubes.")
+    parser.add_argument("cube", help="input cube: .npy (rows x columns x bands) or ENVI raw with its .hdr header")
+    parser.add_argument("output", help="output cube: .npy, or ENVI raw (bip) with its .hdr header")
+    parser.add_argument("--wavelengths", default=None, help="band wavelengths file (.npy or text), needed for .npy cubes")
+    parser.add_argument("-t", "--transmission", default=list(TRANSMISSION_PRESETS.keys())[0],
+                        help=f"transmission preset ({', '.join(TRANSMISSION_PRESETS)}) or transmission file")
+    parser.add_argument("-w", "--windows", type=int, choices=[1, 2], default=1, help="windows quantity")
+    parser.add_argument("-c", "--correction", choices=list(CORRECTION_TYPES.keys()), default="parasitic",
+                        help="parasitic: SHINE collimated beam, extended: SHADOWS or SHINE in Gognito mode")
+    parser.add_argument("--tile", type=int, nargs=2, default=list(CUBE_TILE), metavar=("ROWS", "COLUMNS"), help="spatial tile size")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="threads (every core by default)")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    cube_arguments = parse_arguments(arguments)
+    band_wavelengths = load_band_wavelengths(cube_arguments.wavelengths) if cube_arguments.wavelengths else None
+    input_cube, band_wavelengths, scale_factor = open_cube(cube_arguments.cube, band_wavelengths)
+    window_wavelength, window_transmission, window_material = load_transmission(cube_arguments.transmission)
+    correction_type = CORRECTION_TYPES[cube_arguments.correction]
+    output_cube = create_output_cube(cube_arguments.output, input_cube.shape, np.result_type(input_cube.dtype, np.float32),
+                                     band_wavelengths, f"Window reflection correction: material: {window_material}, "
+                                                       f"quantity: {cube_arguments.windows}, type: {correction_type}.")
+    progress_step = max(1, input_cube.shape[0] * input_cube.shape[1] // 20)
+    next_progress = progress_step
+    for corrected_pixels, pixels_number in correct_cube(input_cube, band_wavelengths, output_cube, window_wavelength,
+                                                        window_transmission, cube_arguments.windows, correction_type,
+                                                        tuple(cube_arguments.tile), cube_arguments.jobs, scale_factor):
+        if corrected_pixels >= next_progress or corrected_pixels == pixels_number:
+            print(f"{corrected_pixels} of {pixels_number} pixels corrected")
+            next_progress = corrected_pixels + progress_step
+    print(f"{cube_arguments.cube} -> {cube_arguments.output}")
+    return 0
+
+
+# CUBE RUN
+if __name__ == '__main__':
+    sys.exit(main())
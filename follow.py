@@ -0,0 +1,107 @@
+# coding: utf-8
+
+"""
+    Tail-follow window correction: keeps the correction of a spectrum file up to date while the acquisition appends rows to it.
+
+    How to use:
+        python follow.py spectrum.txt --windows 2 --correction extended --interval 1
+
+    Each refresh parses (DataPars.tail_read_f) and corrects only the rows appended since the previous one and appends
+    them to the export (<stem>_wincor<suffix>, next to the spectrum or in --output-dir), so its cost depends on the
+    number of new rows, not on the size of the file. A truncated or replaced spectrum is corrected again from its start.
+"""
+
+# PACKAGES
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# MODULES
+from tools.data_pars import DataPars
+from tools.export_tools import export_header, export_table, append_rows
+from core import reflectance_columns, window_correction_columns
+from batch import CORRECTION_TYPES, load_transmission, export_path_for, add_correction_arguments
+
+
+class SpectrumFollower:
+    def __init__(self, file_path, window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                 export_path=None):
+        self.class_setter(file_path, window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                          export_path)
+        self.globals()
+
+    def class_setter(self, file_path, window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                     export_path):
+        self.file_path = file_path
+        self.window_wavelength = window_wavelength
+        self.window_transmission = window_transmission
+        self.windows_quantity = windows_quantity
+        self.correction_type = correction_type
+        self.window_material = window_material
+        self.export_path = export_path  # None: no export, the caller uses the refresh results
+
+    def globals(self):
+        self.data_read = DataPars(self.file_path)
+        self.reflectance_columns_list = []
+
+    # new rows -> (DataBlock of the new rows, their correction), None if the file has no data yet;
+    # a block with first_row 0 holds all the rows: the previous ones are to be discarded
+    def refresh(self):
+        try:
+            data_block = self.data_read.tail_read_f()
+            if data_block is None:
+                return None
+            if data_block.first_row == 0:
+                self.reflectance_columns_list = reflectance_columns(data_block.rows.shape[1], data_block.header)
+            if len(data_block.rows) > 0:
+                corrected_rows = window_correction_columns(data_block.rows, self.reflectance_columns_list,
+                                                           self.window_wavelength, self.window_transmission,
+                                                           self.windows_quantity, self.correction_type)
+            else:
+                corrected_rows = np.array(data_block.rows, dtype=np.double)
+            if self.export_path:
+                if data_block.first_row == 0:
+                    header_str = export_header(data_block.header, self.reflectance_columns_list, self.window_material,
+                                               self.windows_quantity, self.correction_type)
+                    export_table(self.export_path, header_str, corrected_rows, data_block.accuracy, data_block.separator)
+                elif len(corrected_rows) > 0:
+                    append_rows(self.export_path, corrected_rows, data_block.accuracy, data_block.separator)
+            return data_block, corrected_rows
+        except Exception as e:
+            raise Exception(f"Critical error in SpectrumFollower::refresh: {str(e)}") from e
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Window reflection correction of a spectrum file growing during the acquisition.")
+    parser.add_argument("spectrum", help="spectrum file to follow")
+    add_correction_arguments(parser)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between two refreshes")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    follow_arguments = parse_arguments(arguments)
+    window_wavelength, window_transmission, window_material = load_transmission(follow_arguments.transmission)
+    if follow_arguments.output_dir:
+        os.makedirs(follow_arguments.output_dir, exist_ok=True)
+    export_path = export_path_for(follow_arguments.spectrum, follow_arguments.output_dir, follow_arguments.suffix)
+    spectrum_follower = SpectrumFollower(follow_arguments.spectrum, window_wavelength, window_transmission, follow_arguments.windows,
+                                         CORRECTION_TYPES[follow_arguments.correction], window_material, export_path)
+    print(f"Following {follow_arguments.spectrum} -> {export_path}, Ctrl+C to stop.")
+    try:
+        while True:
+            refresh_result = spectrum_follower.refresh()
+            if refresh_result is not None and len(refresh_result[1]) > 0:
+                data_block, corrected_rows = refresh_result
+                print(f"{len(corrected_rows)} rows corrected ({data_block.first_row + len(corrected_rows)} in total)")
+            time.sleep(follow_arguments.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# FOLLOW RUN
+if __name__ == '__main__':
+    sys.exit(main())
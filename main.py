@@ -1,11 +1,10 @@
 # coding: utf-8
-import copy
 
 # MODULES
 from PyQt6 import QtWidgets
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import QFileDialog, QApplication, QMessageBox
-from PyQt6.QtCore import Qt, QSettings
+from PyQt6.QtCore import Qt, QSettings, QTimer
 import sys
 import os
 from pathlib import Path
@@ -16,7 +15,11 @@ import pyqtgraph as pg
 from tools.data_pars import DataPars as DataPars
 from tools.array_tools import is_array_empty
 from presets.transmission_sapphire_window import SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION
-from core import CoreWindowCorrection
+from tools.export_tools import export_header, export_table, append_rows
+from core import (CORRECTION_TYPES, reflectance_columns, window_correction_roots, window_correction_from_roots,
+                  window_correction_sweep)
+from workers import CorrectionWorker, FileLoadWorker, start_worker
+from follow import SpectrumFollower
 
 # TEMPLATES
 from templates.mw import Ui_MainWindow as Ui_MainWindow
@@ -24,6 +27,7 @@ from templates.mw import Ui_MainWindow as Ui_MainWindow
 # GLOBALS
 version = "0.1.2"
 copyright = "<a href='https:www.gnu.org/licenses/gpl-3.0.html'>The GNU General Public License v3.0</a>"
+follow_interval_ms = 1000  # refresh period of a followed spectrum file
 author_mail = "<a href='mailto: flex.studia.dev@gmail.com'>flex.studia.dev@gmail.com</a>"
 bug_support_mail = "<a href='mailto: flex.studia.help@gmail.com'>flex.studia.help@gmail.com</a>"
 github_url = "https://github.com/FlexStudia/Spectro_window_correction"
@@ -123,6 +127,10 @@ class CorrectorMainW(QtWidgets.QMainWindow):
                            "Something has gone wrong.\nUnable to calculate"),
             "calc finished": (self.ui.correction_state, self.ui.correction_text_output, "ok",
                               "The calculation has been successfully completed!"),
+            "calc running": (self.ui.correction_state, self.ui.correction_text_output, "question",
+                             "The calculation is in progress..."),
+            "calc cancelled": (self.ui.correction_state, self.ui.correction_text_output, "question",
+                               "The calculation has been cancelled.\nPlease recalculate"),
             # export
             "export expired": (self.ui.export_state, self.ui.export_text_output, "question",
                                "The parameters have changed. The previous result is still available for export."
@@ -136,8 +144,28 @@ class CorrectorMainW(QtWidgets.QMainWindow):
             "export error": (self.ui.export_state, self.ui.export_text_output, "error",
                              "Something has gone wrong.\nUnable to export"),
         }
+        # background correction (worker & its thread while running)
+        self.correction_worker = None
+        self.correction_thread = None
+        # background file loads: their threads by worker while running, the latest worker by action type
+        self.file_load_threads = {}
+        self.current_file_loads = {}
+        # followed spectrum file: rows appended during the acquisition, refreshed by the timer
+        self.spectrum_follower = None
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setInterval(follow_interval_ms)
+        self.follow_timer.timeout.connect(self.on_follow_timer)
+        # solved roots by (spectrum, transmission, windows quantity, reflectance columns): the correction type is only a
+        # post-transform of them, so switching it does not solve again
+        self.roots_cache = {}
+        # every transmission, windows quantity & correction type of the spectrum (see sweep_correction)
+        self.correction_sweep = None
         # OUTPUTS
         self.corrected_spectrum = np.zeros(0)
+        # (window material, windows quantity, correction type) of a sweep combination corrected spectrum,
+        # None: corrected with the current parameters
+        self.export_parameters = None
+        self.export_path = ""
 
     # messages
     def show_dialog(self, message, title, icon, buttons=QMessageBox.StandardButton.Ok):
@@ -315,6 +343,14 @@ class CorrectorMainW(QtWidgets.QMainWindow):
                 self.correction_type = "parasitic reflections"
             else:
                 self.correction_type = "extended correction"
+            # a running solve is valid for any correction type: its result gets the new one
+            if self.correction_thread is not None:
+                return
+            # already solved: the new correction type is derived from the cached roots at once
+            if (self.roots_cache and "error" not in self.ui.correction_state.text()
+                    and self.get_cached_roots(*self.get_correction_inputs()[:3]) is not None):
+                self.calculate_correction()
+                return
             # propagate the change to the calc & export tabs
             self.on_any_parameter_change()
         except Exception as e:
@@ -324,6 +360,9 @@ class CorrectorMainW(QtWidgets.QMainWindow):
     # on_any_parameter_change
     def on_any_parameter_change(self):
         try:
+            # a running calculation & a followed file are for the old parameters
+            self.cancel_correction_worker()
+            self.spectrum_follower = None
             if "ok" in self.ui.correction_state.text():
                 self.warning_system("calc expired")
             if "ok" in self.ui.export_state.text():
@@ -346,12 +385,13 @@ class CorrectorMainW(QtWidgets.QMainWindow):
             # if valid file path
             if os.path.isfile(file_path):
                 settings.setValue(action_type + "_dir", os.path.dirname(file_path)) # update settings
-                self.select_file_action(file_path, action_type) # run further processing
+                self.start_file_load_worker(file_path, action_type) # run further processing in the background
         except Exception as e:
             message = f"Error in select_file_dialog: {e}"
             self.show_error_dialog(self, message)
 
     # init -> set_ui -> set_parameters_tab -> set_spectrum/set_transmission -> select_file_dialog -> select_file_action
+    # (synchronous, the file dialog loads in a worker: start_file_load_worker)
     def select_file_action(self, file_path, action_type):
         def get_file_data(file_path):
             try:
@@ -365,25 +405,92 @@ class CorrectorMainW(QtWidgets.QMainWindow):
             if os.path.isfile(file_path):
                 # file read: get all data & parameters
                 file_content, file_header, file_separator, file_accuracy = get_file_data(file_path)
-                # set label with file nme
-                self.set_file_label(file_path, action_type)
-                # file data processing
-                if not is_array_empty(file_content) or len(file_content) > 1: # there is data
-                    # set globals
-                    self.set_globals_with_loaded_data(action_type, file_content)
-                    # expire calc & export if exist
-                    self.on_any_parameter_change()
-                    # on specific data type load
-                    if action_type == "spectrum loaded":
-                        self.on_spectrum_load(file_path, file_header, file_separator, file_accuracy)
-                    elif action_type == "transmission loaded":
-                        self.on_transmission_load(file_path)
-                else: # there is no data
-                    self.on_no_data_in_file(action_type)
+                # data & parameters to the UI
+                self.apply_loaded_file(file_path, action_type, file_content, file_header, file_separator, file_accuracy)
         except Exception as e:
             message = f"Error in select_file_action: {e}"
             self.show_error_dialog(self, message)
 
+    # init -> set_ui -> set_parameters_tab -> set_spectrum/set_transmission -> select_file_dialog
+    # -> select_file_action/on_file_load_worker_parsed -> apply_loaded_file
+    def apply_loaded_file(self, file_path, action_type, file_content, file_header, file_separator, file_accuracy):
+        try:
+            # set label with file nme
+            self.set_file_label(file_path, action_type)
+            # file data processing
+            if not is_array_empty(file_content) or len(file_content) > 1: # there is data
+                # set globals
+                self.set_globals_with_loaded_data(action_type, file_content)
+                # expire calc & export if exist
+                self.on_any_parameter_change()
+                # on specific data type load
+                if action_type == "spectrum loaded":
+                    self.on_spectrum_load(file_path, file_header, file_separator, file_accuracy)
+                elif action_type == "transmission loaded":
+                    self.on_transmission_load(file_path)
+            else: # there is no data
+                self.on_no_data_in_file(action_type)
+        except Exception as e:
+            message = f"Error in apply_loaded_file: {e}"
+            self.show_error_dialog(self, message)
+
+    # init -> set_ui -> set_parameters_tab -> set_spectrum/set_transmission -> select_file_dialog -> start_file_load_worker:
+    # the file is parsed in a background thread, a newer file of the same type replaces a loading one
+    def start_file_load_worker(self, file_path, action_type):
+        try:
+            if action_type in self.current_file_loads:
+                self.current_file_loads[action_type].cancel()
+            file_load_worker = FileLoadWorker(file_path)
+            file_load_worker.preview.connect(lambda rows, file_header: self.on_file_load_worker_preview(file_load_worker, action_type,
+                                                                                                       rows, file_header))
+            file_load_worker.parsed.connect(lambda *file_data: self.on_file_load_worker_parsed(file_load_worker, file_path, action_type,
+                                                                                              *file_data))
+            file_load_worker.failed.connect(lambda message: self.on_file_load_worker_failed(file_load_worker, action_type, message))
+            file_load_thread = start_worker(file_load_worker, [file_load_worker.parsed, file_load_worker.cancelled,
+                                                               file_load_worker.failed])
+            file_load_thread.finished.connect(lambda: self.on_file_load_thread_finished(file_load_worker, action_type))
+            self.file_load_threads[file_load_worker] = file_load_thread
+            self.current_file_loads[action_type] = file_load_worker
+        except Exception as e:
+            message = f"Error in start_file_load_worker: {e}"
+            self.show_error_dialog(self, message)
+
+    # is the worker the current load of its file type (and not a replaced one)
+    def is_current_file_load(self, file_load_worker, action_type):
+        return self.current_file_loads.get(action_type) is file_load_worker
+
+    # init -> set_ui -> set_parameters_tab -> set_spectrum/set_transmission -> select_file_dialog -> start_file_load_worker
+    # -> on_file_load_worker_preview: the first rows of a spectrum are plotted while the rest is parsed
+    def on_file_load_worker_preview(self, file_load_worker, action_type, rows, file_header):
+        try:
+            if action_type == "spectrum loaded" and self.is_current_file_load(file_load_worker, action_type) and rows.shape[1] > 1:
+                column_to_plot = reflectance_columns(rows.shape[1], file_header)[0]
+                self.initial_spectrum_line.setData(rows[:, 0], rows[:, column_to_plot], connect='finite')
+                self.corrected_spectrum_line.setData(np.zeros(0), np.zeros(0))
+        except Exception as e:
+            message = f"Error in on_file_load_worker_preview: {e}"
+            self.show_error_dialog(self, message)
+
+    # init -> set_ui -> set_parameters_tab -> set_spectrum/set_transmission -> select_file_dialog -> start_file_load_worker
+    # -> on_file_load_worker_parsed
+    def on_file_load_worker_parsed(self, file_load_worker, file_path, action_type, file_content, file_header, file_separator, file_accuracy):
+        if self.is_current_file_load(file_load_worker, action_type):
+            self.apply_loaded_file(file_path, action_type, file_content, file_header, file_separator, file_accuracy)
+
+    # init -> set_ui -> set_parameters_tab -> set_spectrum/set_transmission -> select_file_dialog -> start_file_load_worker
+    # -> on_file_load_worker_failed: the parse error is shown, the loaded data is left as it was
+    def on_file_load_worker_failed(self, file_load_worker, action_type, message):
+        if self.is_current_file_load(file_load_worker, action_type):
+            self.show_error_dialog(f"Error in select_file_action: {message}")
+
+    # init -> set_ui -> set_parameters_tab -> set_spectrum/set_transmission -> select_file_dialog -> start_file_load_worker
+    # -> on_file_load_thread_finished
+    def on_file_load_thread_finished(self, file_load_worker, action_type):
+        # the thread has stopped: the worker & the thread can be released
+        del self.file_load_threads[file_load_worker]
+        if self.is_current_file_load(file_load_worker, action_type):
+            del self.current_file_loads[action_type]
+
     # init -> set_ui -> set_parameters_tab -> set_spectrum/set_transmission -> select_file_dialog -> select_file_action
     # -> set_file_label
     def set_file_label(self, file_path, action_type):
@@ -404,6 +511,8 @@ class CorrectorMainW(QtWidgets.QMainWindow):
                 self.spectrum_data = file_content
             elif action_type == "transmission loaded":
                 self.transmission_data = file_content
+            self.roots_cache = {}  # solved for the previous data
+            self.clear_sweep()
         except Exception as e:
             message = f"Error in set_globals_with_loaded_data: {e}"
             self.show_error_dialog(self, message)
@@ -450,12 +559,8 @@ class CorrectorMainW(QtWidgets.QMainWindow):
         try:
             # initialize the list
             self.reflectance_columns_list = []
-            if len(self.spectrum_data[0]) in [2, 3]: # simple 3-column
-                self.reflectance_columns_list = [1]
-            elif len(self.spectrum_data[0]) in [11, 12, 13] and "Raw" in self.spectrum_file_header[-1]: # raw
-                self.reflectance_columns_list = [3]
-            else: # compilations
-                self.reflectance_columns_list = [num for num in range(len(self.spectrum_data[0]) - 1) if num % 2 != 0]
+            # simple 3-column, raw or compilation
+            self.reflectance_columns_list = reflectance_columns(len(self.spectrum_data[0]), self.spectrum_file_header)
         except Exception as e:
             message = f"Error in fill_reflectance_columns_list: {e}"
             self.show_error_dialog(self, message)
@@ -561,8 +666,18 @@ class CorrectorMainW(QtWidgets.QMainWindow):
     def set_calc_tab(self):
         try:
             # connect calc btn & its style
-            self.ui.correction_calc.clicked.connect(self.calculate_correction)
+            self.ui.correction_calc.clicked.connect(self.start_correction_worker)
             self.ui.correction_calc.setStyleSheet(f"{self.bigger_btn_style}")
+            # progress bar & cancel btn: hidden until a calculation runs
+            self.ui.correction_cancel.clicked.connect(self.cancel_correction_worker)
+            self.ui.correction_progress.setVisible(False)
+            self.ui.correction_cancel.setVisible(False)
+            # follow the spectrum file toggle
+            self.ui.follow_file.toggled.connect(self.on_follow_file_toggle)
+            # sweep btn & its combinations qcb: hidden until a sweep is calculated
+            self.ui.correction_sweep.clicked.connect(self.sweep_correction)
+            self.ui.sweep_combination.setVisible(False)
+            self.ui.sweep_combination.currentIndexChanged.connect(self.on_sweep_combination_change)
             # WS update
             self.warning_system("not ready to calc")
             # hide & connect on change function to graph_plot_options qcb
@@ -574,57 +689,269 @@ class CorrectorMainW(QtWidgets.QMainWindow):
             message = f"Error in set_calc_tab: {e}"
             self.show_error_dialog(self, message)
 
-    # init -> set_ui -> set_calc_tab -> calculate_correction
+    # init -> set_ui -> set_calc_tab -> calculate_correction (synchronous, the calc btn runs it in a worker)
     def calculate_correction(self):
         try:
             if "ok" in self.ui.correction_state.text() or "question" in self.ui.correction_state.text():
-                # output result
-                self.corrected_spectrum = copy.deepcopy(self.spectrum_data)
-                # spectrum wavelength
-                spectrum_wavelength = self.spectrum_data[:, 0]
-                # transmission data
-                if self.ui.transmission_preset.currentText() == "custom":
-                    window_wavelength = self.transmission_data[:, 0]
-                    window_transmission = self.transmission_data[:, 1]
-                    self.window_material = self.ui.transmission_label.text()
-                else:
-                    window_wavelength = self.window_transmission_presets_dict[self.ui.transmission_preset.currentText()][0]
-                    window_transmission = self.window_transmission_presets_dict[self.ui.transmission_preset.currentText()][1]
-                    self.window_material = list(self.window_transmission_presets_dict.keys())[self.ui.transmission_preset.currentIndex()]
-                # windows quantity
-                windows_quantity = self.windows_quantity
-                # correction type
-                correction_type = self.correction_type
-                # reflectance factor columns
-                for reflectance_column in self.reflectance_columns_list:
-                    # reflectance
-                    spectrum_reflectance = self.spectrum_data[:, reflectance_column]
-                    # its uncertainty if available
-                    if reflectance_column + 1 != len(self.spectrum_data[0]):
-                        spectrum_reflectance_uncertainty = self.spectrum_data[:, reflectance_column + 1]
-                    else:
-                        spectrum_reflectance_uncertainty = np.zeros(len(spectrum_reflectance))
-                    # call the core class to calculate the correction
-                    my_window_correction = CoreWindowCorrection(spectrum_wavelength, spectrum_reflectance,
-                                                                spectrum_reflectance_uncertainty,
-                                                                window_wavelength, window_transmission,
-                                                                windows_quantity, correction_type)
-                    my_window_correction.window_correction()
-                    # OUTPUT
-                    self.corrected_spectrum[:, reflectance_column] =  my_window_correction.class_getter_reflectance()
-                    if reflectance_column + 1 != len(self.spectrum_data[0]):
-                        self.corrected_spectrum[:, reflectance_column + 1] = my_window_correction.class_getter_reflectance_uncertainty()
-                # state toggle
-                self.warning_system("calc finished")
-                self.warning_system("export ready")
-                # plot
-                self.on_graph_plot_options_change()
+                # inputs
+                window_wavelength, window_transmission, windows_quantity, correction_type = self.get_correction_inputs()
+                # call the core to solve all the reflectance columns at once (unless already solved)
+                real_roots = self.get_cached_roots(window_wavelength, window_transmission, windows_quantity)
+                if real_roots is None:
+                    real_roots = window_correction_roots(self.spectrum_data, self.reflectance_columns_list,
+                                                         window_wavelength, window_transmission, windows_quantity)
+                    self.store_roots(self.spectrum_data, window_wavelength, window_transmission, windows_quantity, real_roots)
+                # correction type, output, states & plot
+                self.publish_correction(window_correction_from_roots(self.spectrum_data, self.reflectance_columns_list,
+                                                                     real_roots, correction_type))
         except Exception as e:
             self.warning_system("calc error")
             self.warning_system("no calc")
             message = f"Error in calculate_correction: {e}"
             self.show_error_dialog(self, message)
 
+    # init -> set_ui -> set_calc_tab -> calculate_correction/start_correction_worker -> get_correction_inputs
+    def get_correction_inputs(self):
+        # transmission data
+        if self.ui.transmission_preset.currentText() == "custom":
+            window_wavelength = self.transmission_data[:, 0]
+            window_transmission = self.transmission_data[:, 1]
+            self.window_material = self.ui.transmission_label.text()
+        else:
+            window_wavelength = self.window_transmission_presets_dict[self.ui.transmission_preset.currentText()][0]
+            window_transmission = self.window_transmission_presets_dict[self.ui.transmission_preset.currentText()][1]
+            self.window_material = list(self.window_transmission_presets_dict.keys())[self.ui.transmission_preset.currentIndex()]
+        # windows quantity & correction type
+        return window_wavelength, window_transmission, self.windows_quantity, self.correction_type
+
+    # init -> set_ui -> set_calc_tab -> get_cached_roots/store_roots -> roots_cache_key
+    def roots_cache_key(self, spectrum_data, window_wavelength, window_transmission, windows_quantity):
+        # the custom transmission columns are new views at each call: they are identified by the loaded array
+        arrays_ids = [id(array if array.base is None else array.base)
+                      for array in (spectrum_data, window_wavelength, window_transmission)]
+        return (*arrays_ids, windows_quantity, tuple(self.reflectance_columns_list))
+
+    # init -> set_ui -> set_calc_tab -> calculate_correction/start_correction_worker -> get_cached_roots
+    def get_cached_roots(self, window_wavelength, window_transmission, windows_quantity):
+        cache_key = self.roots_cache_key(self.spectrum_data, window_wavelength, window_transmission, windows_quantity)
+        if cache_key in self.roots_cache:
+            return self.roots_cache[cache_key][-1]
+        return None
+
+    # init -> set_ui -> set_calc_tab -> calculate_correction/on_correction_worker_finished -> store_roots
+    def store_roots(self, spectrum_data, window_wavelength, window_transmission, windows_quantity, real_roots):
+        # only the roots of the current spectrum are kept; the entries hold their arrays, so their ids stay unique
+        self.roots_cache = {cache_key: cache_entry for cache_key, cache_entry in self.roots_cache.items()
+                            if cache_entry[0] is self.spectrum_data}
+        cache_key = self.roots_cache_key(spectrum_data, window_wavelength, window_transmission, windows_quantity)
+        self.roots_cache[cache_key] = (spectrum_data, window_wavelength, window_transmission, real_roots)
+
+    # init -> set_ui -> set_calc_tab -> calculate_correction/on_correction_worker_finished -> publish_correction
+    def publish_correction(self, corrected_spectrum):
+        # output result
+        self.corrected_spectrum = corrected_spectrum
+        self.export_parameters = None
+        self.spectrum_follower = None  # a followed file starts again from this result
+        # state toggle
+        self.warning_system("calc finished")
+        self.warning_system("export ready")
+        # plot
+        self.on_graph_plot_options_change()
+
+    # init -> set_ui -> set_calc_tab -> sweep_correction: every combination of transmission (the presets & the loaded
+    # transmission covering the spectrum), windows quantity & correction type in one calculation
+    def sweep_correction(self):
+        try:
+            if self.correction_thread is None and ("ok" in self.ui.correction_state.text()
+                                                   or "question" in self.ui.correction_state.text()):
+                transmission_presets = {window_material: (window_wavelength, window_transmission) for window_material,
+                                        (window_wavelength, window_transmission) in self.window_transmission_presets_dict.items()}
+                if not is_array_empty(self.transmission_data):
+                    transmission_presets[self.ui.transmission_label.text()] = (self.transmission_data[:, 0], self.transmission_data[:, 1])
+                transmission_presets = {window_material: transmission for window_material, transmission in transmission_presets.items()
+                                        if transmission[0].min() <= self.spectrum_data[:, 0].min()
+                                        and self.spectrum_data[:, 0].max() <= transmission[0].max()}
+                windows_quantities = [int(self.ui.windows_quantity.itemText(index)) for index in range(self.ui.windows_quantity.count())]
+                self.correction_sweep = window_correction_sweep(self.spectrum_data, self.reflectance_columns_list, transmission_presets,
+                                                                windows_quantities, CORRECTION_TYPES)
+                # the sweep roots serve the later calculations too
+                for window_material, (window_wavelength, window_transmission) in transmission_presets.items():
+                    for windows_quantity in windows_quantities:
+                        self.store_roots(self.spectrum_data, window_wavelength, window_transmission, windows_quantity,
+                                         self.correction_sweep.roots(window_material, windows_quantity))
+                # combinations qcb, on the current parameters if swept
+                self.get_correction_inputs()
+                combinations = self.correction_sweep.combinations()
+                current_combination = (self.window_material, self.windows_quantity, self.correction_type)
+                self.ui.sweep_combination.blockSignals(True)
+                self.ui.sweep_combination.clear()
+                self.ui.sweep_combination.insertItems(0, [f"{window_material}, {windows_quantity} window(s), {correction_type}"
+                                                          for window_material, windows_quantity, correction_type in combinations])
+                self.ui.sweep_combination.setCurrentIndex(combinations.index(current_combination)
+                                                          if current_combination in combinations else 0)
+                self.ui.sweep_combination.blockSignals(False)
+                self.ui.sweep_combination.setVisible(True)
+                self.on_sweep_combination_change()
+        except Exception as e:
+            self.warning_system("calc error")
+            message = f"Error in sweep_correction: {e}"
+            self.show_error_dialog(self, message)
+
+    # init -> set_ui -> set_calc_tab -> sweep_correction -> on_sweep_combination_change: plot & export another
+    # combination of the sweep without calculating again
+    def on_sweep_combination_change(self):
+        try:
+            if self.correction_sweep is not None and self.ui.sweep_combination.currentIndex() >= 0:
+                sweep_combination = self.correction_sweep.combinations()[self.ui.sweep_combination.currentIndex()]
+                self.publish_correction(self.correction_sweep.select(*sweep_combination))
+                self.export_parameters = sweep_combination
+        except Exception as e:
+            message = f"Error in on_sweep_combination_change: {e}"
+            self.show_error_dialog(self, message)
+
+    # a sweep of the previous spectrum or transmission data
+    def clear_sweep(self):
+        self.correction_sweep = None
+        self.ui.sweep_combination.blockSignals(True)
+        self.ui.sweep_combination.clear()
+        self.ui.sweep_combination.blockSignals(False)
+        self.ui.sweep_combination.setVisible(False)
+
+    # init -> set_ui -> set_calc_tab -> start_correction_worker: the correction in a background thread
+    def start_correction_worker(self):
+        try:
+            if self.correction_thread is None and ("ok" in self.ui.correction_state.text()
+                                                   or "question" in self.ui.correction_state.text()):
+                window_wavelength, window_transmission, windows_quantity, correction_type = self.get_correction_inputs()
+                # already solved: no worker needed
+                if self.get_cached_roots(window_wavelength, window_transmission, windows_quantity) is not None:
+                    self.calculate_correction()
+                    return
+                self.correction_worker = CorrectionWorker(self.spectrum_data, self.reflectance_columns_list,
+                                                          window_wavelength, window_transmission, windows_quantity)
+                self.correction_worker.progress.connect(self.on_correction_worker_progress)
+                self.correction_worker.finished.connect(self.on_correction_worker_finished)
+                self.correction_worker.cancelled.connect(self.on_correction_worker_cancelled)
+                self.correction_worker.failed.connect(self.on_correction_worker_failed)
+                # controls
+                self.ui.correction_calc.setEnabled(False)
+                self.ui.correction_progress.setRange(0, len(self.reflectance_columns_list))
+                self.ui.correction_progress.setValue(0)
+                self.ui.correction_progress.setVisible(True)
+                self.ui.correction_cancel.setVisible(True)
+                self.warning_system("calc running")
+                self.correction_thread = start_worker(self.correction_worker,
+                                                      [self.correction_worker.finished, self.correction_worker.cancelled,
+                                                       self.correction_worker.failed])
+                self.correction_thread.finished.connect(self.on_correction_thread_finished)
+        except Exception as e:
+            self.warning_system("calc error")
+            message = f"Error in start_correction_worker: {e}"
+            self.show_error_dialog(self, message)
+
+    # init -> set_ui -> set_calc_tab -> start_correction_worker -> cancel_correction_worker
+    def cancel_correction_worker(self):
+        if self.correction_worker is not None:
+            self.correction_worker.cancel()
+
+    # init -> set_ui -> set_calc_tab -> start_correction_worker -> on_correction_worker_progress
+    def on_correction_worker_progress(self, column_count, columns_number):
+        self.ui.correction_progress.setValue(column_count)
+
+    # init -> set_ui -> set_calc_tab -> start_correction_worker -> on_correction_worker_finished
+    def on_correction_worker_finished(self, real_roots):
+        try:
+            self.reset_correction_controls()
+            self.store_roots(self.correction_worker.spectrum_data, self.correction_worker.window_material_wavelengths,
+                             self.correction_worker.window_material_transmission, self.correction_worker.windows_quantity,
+                             real_roots)
+            # the current correction type: it may have been changed during the solve
+            self.publish_correction(window_correction_from_roots(self.correction_worker.spectrum_data,
+                                                                 self.correction_worker.reflectance_columns_list,
+                                                                 real_roots, self.correction_type))
+        except Exception as e:
+            self.warning_system("calc error")
+            message = f"Error in on_correction_worker_finished: {e}"
+            self.show_error_dialog(self, message)
+
+    # init -> set_ui -> set_calc_tab -> start_correction_worker -> on_correction_worker_cancelled
+    def on_correction_worker_cancelled(self):
+        self.reset_correction_controls()
+        self.warning_system("calc cancelled")
+
+    # init -> set_ui -> set_calc_tab -> start_correction_worker -> on_correction_worker_failed
+    def on_correction_worker_failed(self, message):
+        self.reset_correction_controls()
+        self.warning_system("calc error")
+        self.show_error_dialog(f"Error in calculate_correction: {message}")
+
+    # init -> set_ui -> set_calc_tab -> start_correction_worker -> reset_correction_controls
+    def reset_correction_controls(self):
+        self.ui.correction_calc.setEnabled(True)
+        self.ui.correction_progress.setVisible(False)
+        self.ui.correction_cancel.setVisible(False)
+
+    # init -> set_ui -> set_calc_tab -> start_correction_worker -> on_correction_thread_finished
+    def on_correction_thread_finished(self):
+        # the thread has stopped: the worker & the thread can be released
+        self.correction_worker = None
+        self.correction_thread = None
+
+    # on close: stop a running calculation before the window (and its thread) is destroyed
+    def closeEvent(self, event):
+        if self.correction_thread is not None:
+            self.correction_worker.cancel()
+            self.correction_thread.quit()
+            self.correction_thread.wait()
+        for file_load_worker, file_load_thread in list(self.file_load_threads.items()):
+            file_load_worker.cancel()
+            file_load_thread.quit()
+            file_load_thread.wait()
+        super(CorrectorMainW, self).closeEvent(event)
+
+    # init -> set_ui -> set_calc_tab -> on_follow_file_toggle
+    def on_follow_file_toggle(self, checked):
+        self.spectrum_follower = None
+        if checked:
+            self.follow_timer.start()
+        else:
+            self.follow_timer.stop()
+
+    # init -> set_ui -> set_calc_tab -> on_follow_file_toggle -> on_follow_timer: the rows appended to the spectrum file
+    # since the last refresh are parsed, corrected, added to the plot and to the last export
+    def on_follow_timer(self):
+        try:
+            if "ok" in self.ui.correction_state.text() and self.spectrum_path:
+                if self.spectrum_follower is None:
+                    window_wavelength, window_transmission, windows_quantity, correction_type = self.get_correction_inputs()
+                    self.spectrum_follower = SpectrumFollower(self.spectrum_path, window_wavelength, window_transmission,
+                                                              windows_quantity, correction_type, self.window_material)
+                refresh_result = self.spectrum_follower.refresh()
+                if refresh_result is None:
+                    return
+                data_block, corrected_rows = refresh_result
+                if data_block.first_row == 0: # first refresh or file rewritten: all the rows
+                    self.spectrum_data = data_block.rows
+                    self.corrected_spectrum = corrected_rows
+                    self.export_parameters = None
+                    self.clear_sweep() # swept on the previous rows
+                    if self.export_path and "ok" in self.ui.export_state.text():
+                        self.export_action(self.export_path)
+                elif len(corrected_rows) > 0: # new rows only
+                    self.spectrum_data = np.concatenate([self.spectrum_data, data_block.rows])
+                    self.corrected_spectrum = np.concatenate([self.corrected_spectrum, corrected_rows])
+                    self.clear_sweep()
+                    if self.export_path and "ok" in self.ui.export_state.text():
+                        append_rows(self.export_path, corrected_rows, self.spectrum_file_accuracy, self.spectrum_file_separator)
+                else:
+                    return
+                self.on_graph_plot_options_change()
+        except Exception as e:
+            self.follow_timer.stop()
+            self.ui.follow_file.setChecked(False)
+            message = f"Error in on_follow_timer: {e}"
+            self.show_error_dialog(message)
+
     # init -> set_ui -> set_calc_tab -> on_graph_plot_options_change
     def on_graph_plot_options_change(self):
         try:
@@ -705,45 +1032,16 @@ class CorrectorMainW(QtWidgets.QMainWindow):
     # init -> set_ui -> set_export_tab -> export_dialog -> export_action
     def export_action(self, export_path):
         try:
-            def get_header():
-                header_str = ""
-                correction_info = (f"Window reflection correction: "
-                                   f"material: {self.window_material}, "
-                                   f"quantity: {self.windows_quantity}, "
-                                   f"type: {self.correction_type}.\n")
-                if len(self.spectrum_file_header) > 0:
-                    for index, line in enumerate(self.spectrum_file_header):
-                        if len(self.reflectance_columns_list) == 1:
-                            if self.reflectance_columns_list[0] != 1:
-                                if index == 1:
-                                    header_str += correction_info # raw files get info as the second line
-                        else:
-                            if index == 0:
-                                header_str += correction_info # compilations get info as the very first line
-                        header_str += line
-                else:
-                    header_str += correction_info # if no header -> info in the first line
-                if len(self.reflectance_columns_list) == 1:
-                    if self.reflectance_columns_list[0] == 1:
-                        header_str += correction_info # simple files get info line after the header
-                return header_str
-
-            def create_export_str():
-                data_to_str = ""
-                # header
-                data_to_str += get_header()
-                # data
-                for line in self.corrected_spectrum:
-                    for column_number, column in enumerate(line):
-                        data_to_str += f"{column:.{self.spectrum_file_accuracy[column_number]}f}"
-                        if column_number != len(line) - 1:
-                            data_to_str += self.spectrum_file_separator
-                    data_to_str += "\n"
-                return data_to_str
-
             if "ok" in self.ui.export_state.text():
-                with open(export_path, 'w+') as file_output:
-                    file_output.write(create_export_str())
+                # header
+                # the current parameters or those of the plotted sweep combination
+                window_material, windows_quantity, correction_type = (self.export_parameters or
+                                                                      (self.window_material, self.windows_quantity, self.correction_type))
+                header_str = export_header(self.spectrum_file_header, self.reflectance_columns_list,
+                                           window_material, windows_quantity, correction_type)
+                # header & data
+                export_table(export_path, header_str, self.corrected_spectrum, self.spectrum_file_accuracy, self.spectrum_file_separator)
+                self.export_path = export_path # a followed file appends its new rows here
                 self.warning_system("export finished")
         except Exception as e:
             self.warning_system("export error")
@@ -176,6 +176,23 @@ class Ui_MainWindow(object):
         self.correction_text_output.setSizePolicy(sizePolicy)
         self.correction_text_output.setObjectName("correction_text_output")
         self.horizontalLayout_3.addWidget(self.correction_text_output)
+        self.correction_progress = QtWidgets.QProgressBar(parent=self.tab_2)
+        self.correction_progress.setMinimumSize(QtCore.QSize(150, 0))
+        self.correction_progress.setProperty("value", 0)
+        self.correction_progress.setObjectName("correction_progress")
+        self.horizontalLayout_3.addWidget(self.correction_progress)
+        self.correction_cancel = QtWidgets.QPushButton(parent=self.tab_2)
+        self.correction_cancel.setObjectName("correction_cancel")
+        self.horizontalLayout_3.addWidget(self.correction_cancel)
+        self.follow_file = QtWidgets.QCheckBox(parent=self.tab_2)
+        self.follow_file.setObjectName("follow_file")
+        self.horizontalLayout_3.addWidget(self.follow_file)
+        self.correction_sweep = QtWidgets.QPushButton(parent=self.tab_2)
+        self.correction_sweep.setObjectName("correction_sweep")
+        self.horizontalLayout_3.addWidget(self.correction_sweep)
+        self.sweep_combination = QtWidgets.QComboBox(parent=self.tab_2)
+        self.sweep_combination.setObjectName("sweep_combination")
+        self.horizontalLayout_3.addWidget(self.sweep_combination)
         self.verticalLayout.addLayout(self.horizontalLayout_3)
         self.label_3 = QtWidgets.QLabel(parent=self.tab_2)
         self.label_3.setMinimumSize(QtCore.QSize(0, 20))
@@ -249,7 +266,11 @@ class Ui_MainWindow(object):
         MainWindow.setTabOrder(self.transmission_select, self.windows_quantity)
         MainWindow.setTabOrder(self.windows_quantity, self.correction_type)
         MainWindow.setTabOrder(self.correction_type, self.correction_calc)
-        MainWindow.setTabOrder(self.correction_calc, self.graph_plot_options)
+        MainWindow.setTabOrder(self.correction_calc, self.correction_cancel)
+        MainWindow.setTabOrder(self.correction_cancel, self.follow_file)
+        MainWindow.setTabOrder(self.follow_file, self.correction_sweep)
+        MainWindow.setTabOrder(self.correction_sweep, self.sweep_combination)
+        MainWindow.setTabOrder(self.sweep_combination, self.graph_plot_options)
         MainWindow.setTabOrder(self.graph_plot_options, self.export_btn)
 
     def retranslateUi(self, MainWindow):
@@ -274,6 +295,12 @@ class Ui_MainWindow(object):
         self.correction_calc.setText(_translate("MainWindow", "Calculate correction"))
         self.correction_state.setText(_translate("MainWindow", "state"))
         self.correction_text_output.setText(_translate("MainWindow", "text output"))
+        self.correction_cancel.setText(_translate("MainWindow", "Cancel"))
+        self.follow_file.setToolTip(_translate("MainWindow", "Correct and plot the rows appended to the spectrum file during the acquisition"))
+        self.follow_file.setText(_translate("MainWindow", "Follow the file"))
+        self.correction_sweep.setToolTip(_translate("MainWindow", "Calculate every combination of transmission, windows quantity and correction type at once"))
+        self.correction_sweep.setText(_translate("MainWindow", "Sweep all"))
+        self.sweep_combination.setToolTip(_translate("MainWindow", "Combination of the sweep to plot and export"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_2), _translate("MainWindow", "2. Correction"))
         self.export_btn.setText(_translate("MainWindow", "Export"))
         self.export_state.setText(_translate("MainWindow", "state"))
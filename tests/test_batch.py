@@ -0,0 +1,83 @@
+# coding: utf-8
+
+# PACKAGES
+import os
+import sys
+import shutil
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+# MODULES
+from batch import main, collect_spectrum_files
+
+
+def read_lines(file_path):
+    with open(file_path) as file:
+        return file.read().splitlines()
+
+
+# batch exports vs the UI exports
+def test_batch_directory_extended_2_window(tmp_path):
+    spectra_dir = tmp_path / "spectra"
+    spectra_dir.mkdir()
+    for name in ["geo.txt", "raw.txt", "simple.txt"]:
+        shutil.copy(os.path.join("tests/files/sources", name), spectra_dir / name)
+    assert main([str(spectra_dir), "--windows", "2", "--correction", "extended", "--jobs", "2"]) == 0
+    for name, expected_result_path in [("geo", "tests/files/main/geo_extended_2_window.txt"),
+                                       ("raw", "tests/files/main/raw_extended_2_window.txt"),
+                                       ("simple", "tests/files/main/3_col_extended_2_window.txt")]:
+        assert read_lines(spectra_dir / f"{name}_wincor.txt") == read_lines(expected_result_path)
+    # the exports are not corrected again
+    assert len(collect_spectrum_files([str(spectra_dir)])) == 3
+
+# threads or processes solving the columns: same exports
+def test_batch_threads_and_processes(tmp_path):
+    for executor_option in ["--threads", "--processes"]:
+        output_dir = tmp_path / executor_option.strip("-")
+        assert main(["tests/files/sources/geo.txt", "-o", str(output_dir), "--windows", "2", "--correction", "extended",
+                     executor_option, "3"]) == 0
+        assert read_lines(output_dir / "geo_wincor.txt") == read_lines("tests/files/main/geo_extended_2_window.txt")
+
+def test_batch_glob_output_dir_and_failures(tmp_path):
+    output_dir = tmp_path / "corrected"
+    assert main(["tests/files/sources/simple*.txt", "tests/files/sources/empty.txt", "-o", str(output_dir)]) == 1
+    assert sorted(os.listdir(output_dir)) == ["simple_2_col_wincor.txt", "simple_wincor.txt"]
+    assert read_lines(output_dir / "simple_wincor.txt") == read_lines("tests/files/main/3_col_simple_1_window.txt")
+
+# files of the same name in different directories: each export in its directory relative to the common one
+def test_batch_output_dir_same_names(tmp_path):
+    for campaign in ["campaign_a", "campaign_b/night"]:
+        (tmp_path / campaign).mkdir(parents=True)
+    shutil.copy("tests/files/sources/simple.txt", tmp_path / "campaign_a" / "spectrum.txt")
+    shutil.copy("tests/files/sources/geo.txt", tmp_path / "campaign_b" / "night" / "spectrum.txt")
+    output_dir = tmp_path / "corrected"
+    assert main([str(tmp_path / "campaign_a"), str(tmp_path / "campaign_b" / "night"), "-o", str(output_dir), "--jobs", "2",
+                 "--windows", "2", "--correction", "extended"]) == 0
+    assert read_lines(output_dir / "campaign_a" / "spectrum_wincor.txt") == read_lines("tests/files/main/3_col_extended_2_window.txt")
+    assert (read_lines(output_dir / "campaign_b" / "night" / "spectrum_wincor.txt") ==
+            read_lines("tests/files/main/geo_extended_2_window.txt"))
+
+def test_batch_monte_carlo_uncertainties(tmp_path):
+    output_dir = tmp_path / "corrected"
+    assert main(["tests/files/sources/simple.txt", "-o", str(output_dir), "--monte-carlo", "200", "--seed", "1"]) == 0
+    export_lines = read_lines(output_dir / "simple_wincor.txt")
+    expected_lines = read_lines("tests/files/main/3_col_simple_1_window.txt")
+    assert "uncertainty: Monte Carlo, 200 draws" in "\n".join(export_lines)
+    assert len(export_lines) == len(expected_lines)
+    # same corrected reflectance, other uncertainties
+    data_lines = [(export_line.split(), expected_line.split()) for export_line, expected_line in zip(export_lines, expected_lines)
+                  if export_line[:1].isdigit()]
+    assert data_lines and all(export_values[:2] == expected_values[:2] for export_values, expected_values in data_lines)
+    assert any(export_values[2] != expected_values[2] for export_values, expected_values in data_lines)
+
+def test_batch_jacobian_uncertainties(tmp_path):
+    output_dir = tmp_path / "corrected"
+    assert main(["tests/files/sources/simple.txt", "-o", str(output_dir), "--jacobian"]) == 0
+    export_lines = read_lines(output_dir / "simple_wincor.txt")
+    assert "uncertainty: first-order propagation" in "\n".join(export_lines)
+    assert len(export_lines) == len(read_lines("tests/files/main/3_col_simple_1_window.txt"))
+
+def file_end():
+    pass
@@ -4,15 +4,23 @@
 import os
 import sys
 import inspect
+import numpy as np
+from concurrent.futures.process import BrokenProcessPool
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
 
 # MODULES
+import core
 from list_compare import list_compare
 from tools.data_pars import DataPars
-from core import CoreWindowCorrection
-from presets.transmission_sapphire_window import SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION
+from core import (CoreWindowCorrection, CorrectionPlan, window_correction_matrix, window_correction_file_stream,
+                  window_correction_columns, window_correction_roots, window_correction_from_roots,
+                  window_correction_roots_steps, window_correction_sweep, window_correction_monte_carlo,
+                  window_correction_columns_monte_carlo, window_forward_model, reflectance_columns, series_bracketed_roots,
+                  solve_real_roots)
+from presets.transmission_sapphire_window import (SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION,
+                                                  SAPPHIRE_WINDOW_TRANSMISSION_ERROR)
 
 
 # full tests
@@ -132,5 +140,546 @@ def test_single_file_window_correction_extended_2_window():
     assert list_compare(corrected_reflectance, expected_result[:, 1], accuracy=10 ** -6)
     assert list_compare(corrected_reflectance_uncertainty, expected_result[:, 2], accuracy=10 ** -6)
 
+def test_batch_solver_matches_polynomial_solver():
+    # INPUT
+    file_path = "resources/Calcite-hydrotherm_BS00-02_bloc1_VfNfc48_i0e30a0_cal.txt"
+    my_data_pars = DataPars(file_path)
+    my_data_pars.file_pars_f()
+    spectrum_to_correct = my_data_pars.file_body
+    spectrum_wavelength = spectrum_to_correct[:, 0]
+    spectrum_reflectance = spectrum_to_correct[:, 1]
+    spectrum_reflectance_uncertainty = spectrum_to_correct[:, 2]
+    window_wavelength = SAPPHIRE_WINDOW_WAVELENGTHS
+    window_transmission = SAPPHIRE_WINDOW_TRANSMISSION
+    for windows_quantity in [1, 2]:
+        for correction_type in ["parasitic reflections", "extended correction"]:
+            # Class EVOCATION
+            results = []
+            for solver in ["polynomial", "batch"]:
+                my_window_correction = CoreWindowCorrection(spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty,
+                                                            window_wavelength, window_transmission,
+                                                            windows_quantity, correction_type, solver=solver)
+                my_window_correction.window_correction()
+                results.append((my_window_correction.class_getter_reflectance(), my_window_correction.class_getter_reflectance_uncertainty()))
+            # ASSERT
+            assert list_compare(results[0][0], results[1][0], accuracy=10 ** -12)
+            assert list_compare(results[0][1], results[1][1], accuracy=10 ** -12)
+
+def test_closed_form_solver_extended_2_window():
+    # INPUT
+    file_path = "resources/!larderellite_32-80_A09-3_90K_c.txt"
+    my_data_pars = DataPars(file_path)
+    my_data_pars.file_pars_f()
+    spectrum_to_correct = my_data_pars.file_body
+    spectrum_wavelength = spectrum_to_correct[:, 0]
+    spectrum_reflectance = spectrum_to_correct[:, 1]
+    spectrum_reflectance_uncertainty = spectrum_to_correct[:, 2]
+    window_wavelength = SAPPHIRE_WINDOW_WAVELENGTHS
+    window_transmission = SAPPHIRE_WINDOW_TRANSMISSION
+    windows_quantity = 2
+    correction_type = "extended correction"
+    # Class EVOCATION
+    my_window_correction = CoreWindowCorrection(spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty,
+                                                window_wavelength, window_transmission,
+                                                windows_quantity, correction_type, solver="closed_form")
+    my_window_correction.window_correction()
+    # OUTPUT
+    corrected_reflectance = my_window_correction.class_getter_reflectance()
+    corrected_reflectance_uncertainty = my_window_correction.class_getter_reflectance_uncertainty()
+    closed_form_deviation = my_window_correction.class_getter_closed_form_deviation()
+    # ASSERT
+    file_path = "tests/files/core/extended_2_window.txt"
+    my_data_pars = DataPars(file_path)
+    my_data_pars.file_pars_f()
+    expected_result = my_data_pars.file_body
+    assert list_compare(corrected_reflectance, expected_result[:, 1], accuracy=10 ** -6)
+    assert list_compare(corrected_reflectance_uncertainty, expected_result[:, 2], accuracy=10 ** -6)
+    assert 0 < closed_form_deviation < 10 ** -6
+
+# closed form deviation at low transmission: measured from the reference 9-term root, NaN if that root is not converged
+def test_closed_form_deviation_low_transmission():
+    correction_plan = CorrectionPlan(np.array([500.0, 600.0]), [400, 700], [0.001, 0.001], 2, "parasitic reflections", "closed_form")
+    R0 = np.array([0.5, 0.2])
+    closed_form_roots = correction_plan.real_roots(R0)
+    expected_roots = core.polynomial_real_roots(R0, correction_plan.coefficients)
+    assert abs(correction_plan.closed_form_deviation(R0) - np.max(np.abs(closed_form_roots - expected_roots))) < 1e-10
+    correction_plan.newton_max_iterations = 2
+    assert np.isnan(correction_plan.closed_form_deviation(R0))
+
+def test_correction_plan_reused_over_files():
+    # INPUT
+    window_wavelength = SAPPHIRE_WINDOW_WAVELENGTHS
+    window_transmission = SAPPHIRE_WINDOW_TRANSMISSION
+    windows_quantity = 1
+    correction_type = "parasitic reflections"
+    correction_plan = None
+    for temperature in ["90K", "100K", "120K"]:
+        file_path = f"resources/files_to_apply_and_to_compare/larderellite_32-80_A09-3_{temperature}_c.txt"
+        my_data_pars = DataPars(file_path)
+        my_data_pars.file_pars_f()
+        spectrum_to_correct = my_data_pars.file_body
+        spectrum_wavelength = spectrum_to_correct[:, 0]
+        spectrum_reflectance = spectrum_to_correct[:, 1]
+        spectrum_reflectance_uncertainty = spectrum_to_correct[:, 2]
+        # the plan is built once: all the files share the same wavelength grid
+        if correction_plan is None:
+            correction_plan = CorrectionPlan(spectrum_wavelength, window_wavelength, window_transmission,
+                                             windows_quantity, correction_type)
+        corrected_reflectance, corrected_reflectance_uncertainty = correction_plan.apply(spectrum_reflectance, spectrum_reflectance_uncertainty)
+        # ASSERT
+        my_window_correction = CoreWindowCorrection(spectrum_wavelength, spectrum_reflectance, spectrum_reflectance_uncertainty,
+                                                    window_wavelength, window_transmission,
+                                                    windows_quantity, correction_type, solver="polynomial")
+        my_window_correction.window_correction()
+        assert list_compare(corrected_reflectance, my_window_correction.class_getter_reflectance(), accuracy=10 ** -12)
+        assert list_compare(corrected_reflectance_uncertainty, my_window_correction.class_getter_reflectance_uncertainty(), accuracy=10 ** -12)
+
+def test_window_correction_matrix_geo_compilation():
+    # INPUT
+    file_path = "resources/NH4-Jarosite_geo_cal.txt"
+    my_data_pars = DataPars(file_path)
+    my_data_pars.file_pars_f()
+    spectrum_to_correct = my_data_pars.file_body
+    spectrum_wavelength = spectrum_to_correct[:, 0]
+    reflectance_columns = list(range(1, len(spectrum_to_correct[0]) - 1, 2))
+    spectrum_reflectance = spectrum_to_correct[:, reflectance_columns]
+    spectrum_reflectance_uncertainty = spectrum_to_correct[:, [column + 1 for column in reflectance_columns]]
+    window_wavelength = SAPPHIRE_WINDOW_WAVELENGTHS
+    window_transmission = SAPPHIRE_WINDOW_TRANSMISSION
+    windows_quantity = 2
+    correction_type = "extended correction"
+    # matrix EVOCATION
+    corrected_reflectance, corrected_reflectance_uncertainty = window_correction_matrix(spectrum_wavelength, spectrum_reflectance,
+                                                                                        spectrum_reflectance_uncertainty,
+                                                                                        window_wavelength, window_transmission,
+                                                                                        windows_quantity, correction_type)
+    # ASSERT: column by column against the reference solver
+    assert corrected_reflectance.shape == spectrum_reflectance.shape
+    for index in range(len(reflectance_columns)):
+        my_window_correction = CoreWindowCorrection(spectrum_wavelength, spectrum_reflectance[:, index], spectrum_reflectance_uncertainty[:, index],
+                                                    window_wavelength, window_transmission,
+                                                    windows_quantity, correction_type, solver="polynomial")
+        my_window_correction.window_correction()
+        assert list_compare(corrected_reflectance[:, index], my_window_correction.class_getter_reflectance(), accuracy=10 ** -12)
+        assert list_compare(corrected_reflectance_uncertainty[:, index], my_window_correction.class_getter_reflectance_uncertainty(), accuracy=10 ** -12)
+
+# streamed file correction vs the GUI export
+def test_window_correction_file_stream_geo(tmp_path):
+    for correction_type, windows_quantity, expected_result_path in [
+        ("parasitic reflections", 1, "tests/files/main/geo_simple_1_window.txt"),
+        ("extended correction", 2, "tests/files/main/geo_extended_2_window.txt")]:
+        export_path = str(tmp_path / "export.txt")
+        rows_written = window_correction_file_stream("tests/files/sources/geo.txt", export_path,
+                                                     SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION,
+                                                     windows_quantity, correction_type, "sapphire window", block_rows=5)
+        with open(export_path) as export_file, open(expected_result_path) as expected_file:
+            expected_lines = expected_file.read().splitlines()
+            assert export_file.read().splitlines() == expected_lines
+        assert rows_written > 0
+
+# column by column solve vs all the columns at once
+def test_window_correction_roots_steps_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    expected_spectrum = window_correction_columns(my_data_pars.file_body, reflectance_columns_list,
+                                                  SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2, "extended correction")
+    steps = list(window_correction_roots_steps(my_data_pars.file_body, reflectance_columns_list,
+                                               SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2))
+    assert [column_count for column_count, _ in steps] == list(range(1, len(reflectance_columns_list) + 1))
+    corrected_spectrum = window_correction_from_roots(my_data_pars.file_body, reflectance_columns_list, steps[-1][1],
+                                                      "extended correction")
+    assert np.allclose(corrected_spectrum, expected_spectrum, rtol=0, atol=1e-12, equal_nan=True)
+    # by blocks of rows: a step after each block, the same roots
+    block_steps = [(column_count, real_roots.copy()) for column_count, real_roots in
+                   window_correction_roots_steps(my_data_pars.file_body, reflectance_columns_list[:2], SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                 SAPPHIRE_WINDOW_TRANSMISSION, 2, block_rows=100)]
+    assert [column_count for column_count, _ in block_steps] == [0, 0, 0, 1, 1, 1, 1, 2]
+    assert np.isnan(block_steps[0][1][100:, 0]).all() and not np.isnan(block_steps[0][1][:100, 0]).any()
+    assert np.array_equal(block_steps[-1][1], steps[-1][1][:, :2], equal_nan=True)
+
+# thread pool: same roots whatever the number of workers, columns or rows split
+def test_window_correction_roots_threads_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    for solver in ["batch", "closed_form"]:
+        for columns_list in [reflectance_columns_list, reflectance_columns_list[:1]]:
+            expected_roots = window_correction_roots(my_data_pars.file_body, columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                     SAPPHIRE_WINDOW_TRANSMISSION, 2, solver)
+            for max_workers in [1, 2, 3, 7]:
+                real_roots = window_correction_roots(my_data_pars.file_body, columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                     SAPPHIRE_WINDOW_TRANSMISSION, 2, solver, "threads", max_workers)
+                assert np.array_equal(real_roots, expected_roots, equal_nan=True)
+    # the GUI worker path: one column at a time, its rows split
+    steps = list(window_correction_roots_steps(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                               SAPPHIRE_WINDOW_TRANSMISSION, 2, executor="threads", max_workers=3))
+    assert np.array_equal(steps[-1][1], window_correction_roots(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                                SAPPHIRE_WINDOW_TRANSMISSION, 2), equal_nan=True)
+    try:
+        window_correction_roots(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                SAPPHIRE_WINDOW_TRANSMISSION, 2, executor="cluster")
+        assert False
+    except Exception as e:
+        assert "unknown executor 'cluster'" in str(e)
+
+# process pool on shared memory: the roots of the per-point solver, whatever the number of workers
+def test_window_correction_roots_processes_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    for solver in ["polynomial", "batch"]:
+        expected_roots = window_correction_roots(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                 SAPPHIRE_WINDOW_TRANSMISSION, 1, solver)
+        for columns_number in [len(reflectance_columns_list), 1]:
+            for max_workers in [1, 3]:
+                real_roots = window_correction_roots(my_data_pars.file_body, reflectance_columns_list[:columns_number],
+                                                     SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 1, solver,
+                                                     "processes", max_workers)
+                assert np.array_equal(real_roots, expected_roots[:, :columns_number], equal_nan=True)
+    # the reference class on the pool: its per-point loop values
+    spectrum_data = my_data_pars.file_body
+    expected_correction = CoreWindowCorrection(spectrum_data[:, 0], spectrum_data[:, 1], spectrum_data[:, 2], SAPPHIRE_WINDOW_WAVELENGTHS,
+                                               SAPPHIRE_WINDOW_TRANSMISSION, 2, "extended correction", "polynomial")
+    expected_correction.window_correction()
+    my_window_correction = CoreWindowCorrection(spectrum_data[:, 0], spectrum_data[:, 1], spectrum_data[:, 2], SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                SAPPHIRE_WINDOW_TRANSMISSION, 2, "extended correction", "polynomial",
+                                                executor="processes", max_workers=2)
+    my_window_correction.window_correction()
+    assert list_compare(my_window_correction.class_getter_reflectance(), expected_correction.class_getter_reflectance(), accuracy=10 ** -12)
+
+# process pool with dead workers: replaced by the next solve; a pool breaking again is dropped and the error raised
+def test_window_correction_roots_processes_broken_pool():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    expected_roots = window_correction_roots(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                             SAPPHIRE_WINDOW_TRANSMISSION, 1)
+    window_correction_roots(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                            SAPPHIRE_WINDOW_TRANSMISSION, 1, executor="processes", max_workers=2)
+    broken_pool = core.PROCESS_POOLS[2]
+    for process in list(broken_pool._processes.values()):
+        process.kill()
+        process.join()
+    real_roots = window_correction_roots(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                         SAPPHIRE_WINDOW_TRANSMISSION, 1, executor="processes", max_workers=2)
+    assert np.array_equal(real_roots, expected_roots, equal_nan=True)
+    assert core.PROCESS_POOLS[2] is not broken_pool
+    try:
+        core.process_pool_map(2, os._exit, [1])
+        assert False, "no error from a pool broken twice"
+    except BrokenProcessPool:
+        pass
+    assert 2 not in core.PROCESS_POOLS
+
+# compiled solver kernel (run here by the interpreter): the reference roots to 1e-10, NaN outside its physical domain
+def test_series_bracketed_roots_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)[:4]
+    R0 = my_data_pars.file_body[:, reflectance_columns_list]
+    for windows_quantity in [1, 2]:
+        correction_plan = CorrectionPlan(my_data_pars.file_body[:, 0], SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION,
+                                         windows_quantity, "parasitic reflections", "polynomial")
+        coefficients = np.repeat(correction_plan.coefficients, R0.shape[1], axis=0)
+        real_roots = np.empty(R0.size)
+        series_bracketed_roots(R0.ravel(), coefficients, real_roots)
+        expected_roots = correction_plan.real_roots(R0).ravel()
+        solved = ~np.isnan(real_roots)
+        assert np.array_equal(solved, ~np.isnan(expected_roots) & (R0.ravel() >= 0))
+        assert np.max(np.abs(real_roots[solved] - expected_roots[solved])) < 1e-10
+
+# compiled solver: with the kernel (the interpreted one stands for numba here) or without it, the reference roots
+def test_window_correction_compiled_solver_geo(monkeypatch):
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    expected_roots = window_correction_roots(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                             SAPPHIRE_WINDOW_TRANSMISSION, 2, "polynomial")
+    for compiled_series_roots in [None, series_bracketed_roots]:
+        monkeypatch.setattr(core, "compiled_series_roots", compiled_series_roots)
+        real_roots = window_correction_roots(my_data_pars.file_body, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                             SAPPHIRE_WINDOW_TRANSMISSION, 2, "compiled")
+        assert np.array_equal(np.isnan(real_roots), np.isnan(expected_roots))
+        assert np.nanmax(np.abs(real_roots - expected_roots)) < 1e-10
+
+# bracketed Newton solver: the reference roots, every point converged
+def test_newton_solver_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    spectrum_data = my_data_pars.file_body
+    reflectance_columns_list = reflectance_columns(spectrum_data.shape[1], my_data_pars.file_header)
+    for windows_quantity in [1, 2]:
+        expected_roots = window_correction_roots(spectrum_data, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                 SAPPHIRE_WINDOW_TRANSMISSION, windows_quantity, "polynomial")
+        real_roots = window_correction_roots(spectrum_data, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                             SAPPHIRE_WINDOW_TRANSMISSION, windows_quantity, "newton")
+        assert np.array_equal(np.isnan(real_roots), np.isnan(expected_roots))
+        assert np.nanmax(np.abs(real_roots - expected_roots)) < 1e-10
+    my_window_correction = CoreWindowCorrection(spectrum_data[:, 0], spectrum_data[:, 1], spectrum_data[:, 2], SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                SAPPHIRE_WINDOW_TRANSMISSION, 2, "extended correction", "newton")
+    my_window_correction.window_correction()
+    assert my_window_correction.class_getter_unconverged_points() == 0
+
+# bracketed Newton solver: unconverged points reported (same mask with any executor), NaN for unphysical inputs only
+def test_newton_solver_unconverged_and_unphysical():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    R0 = my_data_pars.file_body[:, reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)]
+    expected_unconverged = None
+    for executor in ["serial", "threads", "processes"]:
+        correction_plan = CorrectionPlan(my_data_pars.file_body[:, 0], SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2,
+                                         "parasitic reflections", "newton", executor=executor, max_workers=2, newton_max_iterations=1)
+        correction_plan.real_roots(R0)
+        if expected_unconverged is None:
+            expected_unconverged = correction_plan.unconverged
+        assert np.any(correction_plan.unconverged) and np.array_equal(correction_plan.unconverged, expected_unconverged)
+    transmission, transmission_power = 0.85, 0.85 ** 4
+    coefficients = transmission_power * (1 - transmission) ** np.arange(9)
+    R0 = np.array([0.5, 0.0, -0.01, np.nan, np.inf, -10.0])
+    real_roots, unconverged = solve_real_roots(R0, "newton", transmission, transmission_power, coefficients)
+    expected_roots, _ = solve_real_roots(R0, "batch", transmission, transmission_power, coefficients)
+    assert np.allclose(real_roots[:3], expected_roots[:3], rtol=0, atol=1e-12) and not np.any(unconverged)
+    assert np.all(np.isnan(real_roots[3:]))
+    real_roots, _ = solve_real_roots(R0[:1], "newton", 1.2, 1.2 ** 4, 1.2 ** 4 * (-0.2) ** np.arange(9))
+    assert np.isnan(real_roots[0])
+
+# random points at low transmission, 2 windows: reflectances, their 9-term series coefficients & reference roots
+def low_transmission_points(points_number):
+    random_generator = np.random.default_rng(5)
+    transmission = random_generator.uniform(0.02, 1, points_number)
+    R0 = random_generator.uniform(0, 1.2, points_number)
+    coefficients = transmission[:, np.newaxis] ** 4 * (1 - transmission[:, np.newaxis]) ** np.arange(9)
+    return R0, transmission, coefficients, core.polynomial_real_roots(R0, coefficients)
+
+# bracketed Newton solver at low transmission: the reference roots, nothing left unconverged
+def test_newton_solver_low_transmission():
+    R0, transmission, coefficients, expected_roots = low_transmission_points(5000)
+    real_roots, unconverged = solve_real_roots(R0, "newton", transmission, transmission ** 4, coefficients)
+    assert not np.any(unconverged)
+    assert np.max(np.abs(real_roots - expected_roots)) < 1e-10
+    # a Newton step underflowing on the bound just set to the root is the root (it used to bisect away from it)
+    coefficients = 0.0508 ** 4 * 0.9492 ** np.arange(9)
+    real_roots, unconverged = solve_real_roots(np.array([1.0718]), "newton", 0.0508, 0.0508 ** 4, coefficients)
+    expected_roots = core.polynomial_real_roots(np.array([1.0718]), coefficients[np.newaxis])
+    assert not unconverged[0] and abs(real_roots[0] - expected_roots[0]) < 1e-10
+
+# compiled solver kernel (interpreted here) at low transmission: the reference roots, none left for the fallback;
+# with too few iterations the points are left NaN for batch_real_roots, never returned unconverged
+def test_series_bracketed_roots_low_transmission(monkeypatch):
+    R0, _, coefficients, expected_roots = low_transmission_points(2000)
+    real_roots = np.empty(len(R0))
+    series_bracketed_roots(R0, coefficients, real_roots)
+    assert np.max(np.abs(real_roots - expected_roots)) < 1e-10
+    series_bracketed_roots(R0, coefficients, real_roots, max_iterations=2)
+    assert np.any(np.isnan(real_roots))
+    monkeypatch.setattr(core, "compiled_series_roots", lambda *arguments: series_bracketed_roots(*arguments, max_iterations=2))
+    assert np.max(np.abs(core.compiled_real_roots(R0, coefficients) - expected_roots)) < 1e-10
+
+# compiled solver (interpreted kernel) from T = 1e-6 to T = 1, 1 & 2 windows: the reference roots to 1e-10, the roots
+# of the bracketed newton solver to rounding (also at T = 1 - 1e-12, where the eigenvalues of the reference are not)
+def test_window_correction_compiled_solver_extreme_transmission(monkeypatch):
+    monkeypatch.setattr(core, "compiled_series_roots", series_bracketed_roots)
+    random_generator = np.random.default_rng(13)
+    transmission = np.concatenate((10 ** random_generator.uniform(-6, 0, 4000), [1.0, 1 - 1e-12]))
+    R0 = random_generator.uniform(0, 1.3, len(transmission))
+    for windows_quantity in [1, 2]:
+        coefficients = core.series_coefficients(transmission, windows_quantity)
+        real_roots = core.compiled_real_roots(R0, coefficients)
+        assert np.max(np.abs(real_roots[:-1] - core.polynomial_real_roots(R0[:-1], coefficients[:-1]))) < 1e-10
+        newton_roots, _ = solve_real_roots(R0, "newton", transmission, transmission ** (2 * windows_quantity), coefficients)
+        assert np.max(np.abs(real_roots / newton_roots - 1)) < 1e-13
+
+# one solve, both correction types
+def test_window_correction_from_roots_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    real_roots = window_correction_roots(my_data_pars.file_body, reflectance_columns_list,
+                                         SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 1)
+    for correction_type in ["parasitic reflections", "extended correction"]:
+        expected_spectrum = window_correction_columns(my_data_pars.file_body, reflectance_columns_list,
+                                                      SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 1, correction_type)
+        corrected_spectrum = window_correction_from_roots(my_data_pars.file_body, reflectance_columns_list, real_roots,
+                                                          correction_type)
+        assert np.allclose(corrected_spectrum, expected_spectrum, rtol=0, atol=1e-12, equal_nan=True)
+
+# every combination of the sweep vs one correction per combination
+def test_window_correction_sweep_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    transmission_presets = {"sapphire window": (SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION),
+                            "darker window": (SAPPHIRE_WINDOW_WAVELENGTHS, 0.9 * np.asarray(SAPPHIRE_WINDOW_TRANSMISSION))}
+    for solver in ["batch", "closed_form"]:
+        correction_sweep = window_correction_sweep(my_data_pars.file_body, reflectance_columns_list, transmission_presets,
+                                                   [1, 2], ["parasitic reflections", "extended correction"], solver)
+        assert correction_sweep.corrected_cube.shape == (2, 2, 2) + my_data_pars.file_body.shape
+        assert len(correction_sweep.combinations()) == 8
+        for transmission_label, windows_quantity, correction_type in correction_sweep.combinations():
+            window_wavelength, window_transmission = transmission_presets[transmission_label]
+            expected_spectrum = window_correction_columns(my_data_pars.file_body, reflectance_columns_list, window_wavelength,
+                                                          window_transmission, windows_quantity, correction_type, solver)
+            corrected_spectrum = correction_sweep.select(transmission_label, windows_quantity, correction_type)
+            assert np.allclose(corrected_spectrum, expected_spectrum, rtol=0, atol=1e-12, equal_nan=True)
+    try:
+        correction_sweep.select("sapphire window", 3, "parasitic reflections")
+        assert False, "unknown combination selected"
+    except ValueError:
+        pass
+
+# the sweep solves with the solver it is given: newton & compiled roots are the batch ones
+def test_window_correction_sweep_solvers_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    transmission_presets = {"sapphire window": (SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION),
+                            "darker window": (SAPPHIRE_WINDOW_WAVELENGTHS, 0.5 * np.asarray(SAPPHIRE_WINDOW_TRANSMISSION))}
+    expected_sweep = window_correction_sweep(my_data_pars.file_body, reflectance_columns_list, transmission_presets, [1, 2],
+                                             solver="batch")
+    for solver in ["newton", "compiled"]:
+        correction_sweep = window_correction_sweep(my_data_pars.file_body, reflectance_columns_list, transmission_presets, [1, 2],
+                                                   solver=solver)
+        assert not np.any(correction_sweep.unconverged)
+        assert np.array_equal(np.isnan(correction_sweep.real_roots), np.isnan(expected_sweep.real_roots))
+        assert np.nanmax(np.abs(correction_sweep.real_roots - expected_sweep.real_roots)) < 1e-10
+        assert np.allclose(correction_sweep.corrected_cube, expected_sweep.corrected_cube, rtol=0, atol=1e-10, equal_nan=True)
+
+# Monte Carlo without uncertainties: every draw is the deterministic correction
+def test_window_correction_monte_carlo_no_uncertainty():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    spectrum_reflectance = my_data_pars.file_body[:, reflectance_columns_list]
+    for correction_type in ["parasitic reflections", "extended correction"]:
+        expected_reflectance, _ = window_correction_matrix(my_data_pars.file_body[:, 0], spectrum_reflectance, None,
+                                                           SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2, correction_type)
+        corrected_percentiles = window_correction_monte_carlo(my_data_pars.file_body[:, 0], spectrum_reflectance, None,
+                                                              SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, None,
+                                                              2, correction_type, draws=10)
+        for corrected_reflectance in corrected_percentiles:
+            assert np.allclose(corrected_reflectance, expected_reflectance, rtol=0, atol=1e-12, equal_nan=True)
+
+# Monte Carlo at low transmission (the draws down to the 1e-6 clip): the percentiles of the reference roots of the
+# same draws, every draw converged
+def test_window_correction_monte_carlo_low_transmission():
+    spectrum_wavelength = np.linspace(1000, 2000, 20)
+    R0 = np.linspace(0.05, 1.1, 20)
+    draws, seed = 400, 3
+    corrected_percentiles, unconverged_draws = window_correction_monte_carlo(spectrum_wavelength, R0, None, [900, 2100], [0.05, 0.05],
+                                                                             [0.03, 0.03], 2, "parasitic reflections", draws, seed=seed,
+                                                                             return_unconverged=True)
+    random_generator = np.random.default_rng(seed)
+    R0_draws = R0 + 0 * random_generator.standard_normal((draws, len(R0)))
+    transmission_draws = np.clip(0.05 + 0.03 * random_generator.standard_normal((draws, len(R0))), 1e-6, 1)
+    expected_roots = core.batch_real_roots(R0_draws, core.series_coefficients(transmission_draws, 2))
+    assert not np.any(unconverged_draws)
+    assert np.max(np.abs(corrected_percentiles / np.percentile(expected_roots, core.MONTE_CARLO_PERCENTILES, axis=0) - 1)) < 1e-8
+
+# Monte Carlo uncertainties: reproducible with a seed, close to the ratio-scaled ones without transmission uncertainty,
+# larger with it
+def test_window_correction_columns_monte_carlo_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    spectrum_data = my_data_pars.file_body
+    reflectance_columns_list = reflectance_columns(spectrum_data.shape[1], my_data_pars.file_header)
+    uncertainty_columns = [column + 1 for column in reflectance_columns_list]
+    ratio_spectrum = window_correction_columns(spectrum_data, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                               SAPPHIRE_WINDOW_TRANSMISSION, 1, "parasitic reflections")
+    monte_carlo_spectrum = window_correction_columns_monte_carlo(spectrum_data, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                                 SAPPHIRE_WINDOW_TRANSMISSION, None, 1, "parasitic reflections",
+                                                                 draws=2000, seed=7)
+    assert np.array_equal(monte_carlo_spectrum[:, reflectance_columns_list], ratio_spectrum[:, reflectance_columns_list], equal_nan=True)
+    uncertainty_ratio = monte_carlo_spectrum[:, uncertainty_columns] / ratio_spectrum[:, uncertainty_columns]
+    assert abs(np.nanmedian(uncertainty_ratio) - 1) < 0.05
+    assert np.array_equal(monte_carlo_spectrum,
+                          window_correction_columns_monte_carlo(spectrum_data, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                                SAPPHIRE_WINDOW_TRANSMISSION, None, 1, "parasitic reflections",
+                                                                draws=2000, seed=7), equal_nan=True)
+    transmission_spectrum = window_correction_columns_monte_carlo(spectrum_data, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                                  SAPPHIRE_WINDOW_TRANSMISSION, SAPPHIRE_WINDOW_TRANSMISSION_ERROR, 1,
+                                                                  "parasitic reflections", draws=2000, seed=7)
+    assert np.nanmedian(transmission_spectrum[:, uncertainty_columns] / monte_carlo_spectrum[:, uncertainty_columns]) > 1
+
+# first-order uncertainties vs the finite differences of the correction
+def test_window_correction_jacobian_finite_differences():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    spectrum_wavelength = my_data_pars.file_body[:, 0]
+    spectrum_reflectance = my_data_pars.file_body[:, reflectance_columns_list]
+    step = 1e-6
+    for solver in ["batch", "closed_form"]:
+        for correction_type in ["parasitic reflections", "extended correction"]:
+            def corrected(reflectance, transmission):
+                return window_correction_matrix(spectrum_wavelength, reflectance, None, SAPPHIRE_WINDOW_WAVELENGTHS, transmission,
+                                                2, correction_type, solver)[0]
+            R0_derivative = (corrected(spectrum_reflectance + step, SAPPHIRE_WINDOW_TRANSMISSION)
+                             - corrected(spectrum_reflectance - step, SAPPHIRE_WINDOW_TRANSMISSION)) / (2 * step)
+            transmission_derivative = (corrected(spectrum_reflectance, SAPPHIRE_WINDOW_TRANSMISSION + step)
+                                       - corrected(spectrum_reflectance, SAPPHIRE_WINDOW_TRANSMISSION - step)) / (2 * step)
+            _, R0_uncertainty = window_correction_matrix(spectrum_wavelength, spectrum_reflectance, np.ones(spectrum_reflectance.shape),
+                                                         SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2, correction_type,
+                                                         solver, "jacobian")
+            _, transmission_uncertainty = window_correction_matrix(spectrum_wavelength, spectrum_reflectance,
+                                                                   np.zeros(spectrum_reflectance.shape), SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                                   SAPPHIRE_WINDOW_TRANSMISSION, 2, correction_type, solver, "jacobian",
+                                                                   np.ones(len(SAPPHIRE_WINDOW_TRANSMISSION)))
+            assert np.allclose(R0_uncertainty, np.abs(R0_derivative), rtol=1e-6, atol=0, equal_nan=True)
+            assert np.allclose(transmission_uncertainty, np.abs(transmission_derivative), rtol=1e-5, atol=0, equal_nan=True)
+
+# first-order uncertainties: the reference solver gives the batch ones, Monte Carlo agrees for small uncertainties
+def test_window_correction_jacobian_geo():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    spectrum_data = my_data_pars.file_body
+    reflectance_columns_list = reflectance_columns(spectrum_data.shape[1], my_data_pars.file_header)
+    uncertainty_columns = [column + 1 for column in reflectance_columns_list]
+    transmission_uncertainty = 0.1 * SAPPHIRE_WINDOW_TRANSMISSION_ERROR
+    jacobian_spectrum = window_correction_columns(spectrum_data, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                  SAPPHIRE_WINDOW_TRANSMISSION, 1, "extended correction", "batch", "jacobian",
+                                                  transmission_uncertainty)
+    column = reflectance_columns_list[0]
+    my_window_correction = CoreWindowCorrection(spectrum_data[:, 0], spectrum_data[:, column], spectrum_data[:, column + 1],
+                                                SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 1, "extended correction",
+                                                "polynomial", "jacobian", transmission_uncertainty)
+    my_window_correction.window_correction()
+    assert np.allclose(my_window_correction.class_getter_reflectance_uncertainty(), jacobian_spectrum[:, column + 1],
+                       rtol=1e-9, atol=0, equal_nan=True)
+    monte_carlo_spectrum = window_correction_columns_monte_carlo(spectrum_data, reflectance_columns_list, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                                 SAPPHIRE_WINDOW_TRANSMISSION, transmission_uncertainty, 1,
+                                                                 "extended correction", draws=2000, seed=3)
+    uncertainty_ratio = monte_carlo_spectrum[:, uncertainty_columns] / jacobian_spectrum[:, uncertainty_columns]
+    assert abs(np.nanmedian(uncertainty_ratio) - 1) < 0.02
+
+# forward model then correction gives back the input: measured spectra & synthetic reflectances
+def test_window_forward_model_round_trip():
+    my_data_pars = DataPars("tests/files/sources/geo.txt")
+    my_data_pars.file_pars_f()
+    reflectance_columns_list = reflectance_columns(my_data_pars.file_body.shape[1], my_data_pars.file_header)
+    spectrum_wavelength = my_data_pars.file_body[:, 0]
+    synthetic_reflectance = np.random.default_rng(0).uniform(0.01, 0.95, (len(spectrum_wavelength), 40))
+    for solver in ["batch", "closed_form"]:
+        for windows_quantity in [1, 2]:
+            for correction_type in ["parasitic reflections", "extended correction"]:
+                for true_reflectance in [my_data_pars.file_body[:, reflectance_columns_list], synthetic_reflectance]:
+                    measured_reflectance = window_forward_model(spectrum_wavelength, true_reflectance, SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                                SAPPHIRE_WINDOW_TRANSMISSION, windows_quantity, correction_type, solver)
+                    corrected_reflectance, _ = window_correction_matrix(spectrum_wavelength, measured_reflectance, None,
+                                                                        SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION,
+                                                                        windows_quantity, correction_type, solver)
+                    assert np.allclose(corrected_reflectance, true_reflectance, rtol=1e-10, atol=0, equal_nan=True)
+
+# the forward model is the series of the reference solver
+def test_window_forward_model_reference_series():
+    my_window_correction = CoreWindowCorrection(np.array([1000.0]), np.array([0.5]), np.array([0.0]), SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                SAPPHIRE_WINDOW_TRANSMISSION, 2, "parasitic reflections", "polynomial")
+    transmission = np.interp(1000.0, SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION)
+    for true_reflectance in [0.05, 0.3, 0.8]:
+        measured_reflectance = window_forward_model(np.array([1000.0]), np.array([true_reflectance]), SAPPHIRE_WINDOW_WAVELENGTHS,
+                                                    SAPPHIRE_WINDOW_TRANSMISSION, 2, "parasitic reflections")
+        roots = my_window_correction.get_polynomial_roots(measured_reflectance[0], transmission)
+        assert abs(my_window_correction.get_corrected_reflectance_value(roots) - true_reflectance) < 1e-12
+
 def file_end():
     pass
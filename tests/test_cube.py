@@ -0,0 +1,60 @@
+# coding: utf-8
+
+# PACKAGES
+import os
+import sys
+import inspect
+import numpy as np
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+# MODULES
+from cube import main, open_cube, read_envi_header
+from core import window_forward_model, window_correction_matrix
+from presets.transmission_sapphire_window import SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION
+
+
+# a rows x columns x bands cube measured through the windows, and its true reflectance
+def synthetic_cube(windows_quantity, correction_type):
+    band_wavelengths = np.arange(400.0, 2500.0, 50.0)
+    true_cube = np.random.default_rng(1).uniform(0.05, 0.9, (7, 5, len(band_wavelengths)))
+    measured_spectra = window_forward_model(band_wavelengths, true_cube.reshape(-1, len(band_wavelengths)).T,
+                                            SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, windows_quantity, correction_type)
+    return band_wavelengths, measured_spectra.T.reshape(true_cube.shape), true_cube
+
+
+# .npy cube, tiles not dividing the cube, 2 threads: the true reflectance is back
+def test_cube_npy_round_trip(tmp_path):
+    band_wavelengths, measured_cube, true_cube = synthetic_cube(2, "extended correction")
+    np.save(tmp_path / "scene.npy", measured_cube)
+    np.savetxt(tmp_path / "bands.txt", band_wavelengths)
+    assert main([str(tmp_path / "scene.npy"), str(tmp_path / "scene_wincor.npy"), "--wavelengths", str(tmp_path / "bands.txt"),
+                 "--windows", "2", "--correction", "extended", "--tile", "3", "2", "--jobs", "2"]) == 0
+    corrected_cube = np.load(tmp_path / "scene_wincor.npy")
+    assert corrected_cube.dtype == np.float64
+    assert np.allclose(corrected_cube, true_cube, rtol=1e-10, atol=0)
+
+# ENVI int16 bsq cube with a reflectance scale factor -> ENVI float32 bip cube
+def test_cube_envi(tmp_path):
+    band_wavelengths, measured_cube, _ = synthetic_cube(1, "parasitic reflections")
+    stored_cube = np.round(measured_cube * 10000).astype("<i2")
+    stored_cube.transpose(2, 0, 1).tofile(tmp_path / "scene.img")
+    with open(tmp_path / "scene.hdr", "w") as header_file:
+        header_file.write("ENVI\n"
+                          "samples = 5\nlines = 7\nbands = 42\nheader offset = 0\n"
+                          "data type = 2\ninterleave = bsq\nbyte order = 0\nreflectance scale factor = 10000\n"
+                          "wavelength = {\n" + ",\n".join(str(wavelength) for wavelength in band_wavelengths) + "}\n")
+    input_cube, cube_wavelengths, scale_factor = open_cube(str(tmp_path / "scene.img"))
+    assert input_cube.shape == (7, 5, 42) and scale_factor == 10000
+    assert np.array_equal(input_cube, stored_cube) and np.array_equal(cube_wavelengths, band_wavelengths)
+    assert main([str(tmp_path / "scene.img"), str(tmp_path / "scene_wincor.img")]) == 0
+    output_cube, output_wavelengths, _ = open_cube(str(tmp_path / "scene_wincor.img"))
+    assert read_envi_header(str(tmp_path / "scene_wincor.hdr"))["interleave"] == "bip"
+    assert output_cube.dtype == np.float32 and np.array_equal(output_wavelengths, band_wavelengths)
+    expected_spectra, _ = window_correction_matrix(band_wavelengths, stored_cube.reshape(-1, 42).T / 10000, None,
+                                                   SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 1, "parasitic reflections")
+    assert np.allclose(output_cube, expected_spectra.T.reshape(7, 5, 42), rtol=1e-6, atol=0)
+
+def file_end():
+    pass
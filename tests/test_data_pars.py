@@ -0,0 +1,163 @@
+# coding: utf-8
+
+# PACKAGES
+import os
+import sys
+import glob
+import inspect
+import numpy as np
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+# MODULES
+from tools.data_pars import DataPars
+
+
+def data_pars_outputs(data_pars):
+    return (data_pars.file_body, data_pars.file_header, data_pars.file_accuracy, data_pars.file_garbage,
+            data_pars.file_separator, data_pars.file_data_start_line)
+
+
+def outputs_are_identical(outputs_1, outputs_2):
+    if outputs_1[0].shape != outputs_2[0].shape or outputs_1[0].tobytes() != outputs_2[0].tobytes():
+        return False
+    if outputs_1[1:3] != outputs_2[1:3] or outputs_1[4:] != outputs_2[4:]:
+        return False
+    if len(outputs_1[3]) != len(outputs_2[3]):
+        return False
+    for garbage_1, garbage_2 in zip(outputs_1[3], outputs_2[3]):
+        if garbage_1[0] != garbage_2[0] or str(garbage_1[1]) != str(garbage_2[1]):
+            return False
+    return True
+
+
+# fast block parser vs line-by-line parser
+def test_fast_pars_identical_to_line_by_line():
+    files_list = glob.glob("tests/files/sources/*.txt") + glob.glob("resources/*.txt")
+    for file_path in files_list:
+        for nan_to_garbage in [False, True]:
+            fast_data_pars = DataPars(file_path, nan_to_garbage=nan_to_garbage)
+            fast_data_pars.file_pars_f()
+            line_data_pars = DataPars(file_path, nan_to_garbage=nan_to_garbage, fast_pars=False)
+            line_data_pars.file_pars_f()
+            assert outputs_are_identical(data_pars_outputs(fast_data_pars), data_pars_outputs(line_data_pars))
+            assert fast_data_pars.file_body.flags["C_CONTIGUOUS"] and fast_data_pars.file_body.dtype == np.double
+
+def test_fast_pars_falls_back_on_garbage(tmp_path):
+    file_path = tmp_path / "garbage.txt"
+    lines = ["header line\n", "wavelength,reflectance\n"] + [f"{1000 + i},0.{i:04d}\n" for i in range(20)]
+    lines[10] = "1008,not a number\n"
+    lines[15] = "\n"
+    lines[17] = ",1015,0.0013\n"
+    file_path.write_text("".join(lines))
+    for nan_to_garbage in [False, True]:
+        fast_data_pars = DataPars(str(file_path), nan_to_garbage=nan_to_garbage)
+        fast_data_pars.file_pars_f()
+        line_data_pars = DataPars(str(file_path), nan_to_garbage=nan_to_garbage, fast_pars=False)
+        line_data_pars.file_pars_f()
+        assert outputs_are_identical(data_pars_outputs(fast_data_pars), data_pars_outputs(line_data_pars))
+        assert len(fast_data_pars.file_garbage) == 3
+
+# parse cache
+def test_parse_cache_warm_load_identical(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    for file_path in ["tests/files/sources/raw.txt", "tests/files/sources/geo.txt", "tests/files/sources/empty.txt"]:
+        reference_data_pars = DataPars(file_path)
+        reference_data_pars.file_pars_f()
+        for _ in range(2):  # cold then warm
+            cached_data_pars = DataPars(file_path, cache_dir=cache_dir)
+            cached_data_pars.file_pars_f()
+            assert outputs_are_identical(data_pars_outputs(cached_data_pars), data_pars_outputs(reference_data_pars))
+
+def test_parse_cache_invalidated_on_change(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    file_path = tmp_path / "spectrum.txt"
+    file_path.write_text("wavelength\treflectance\n1000\t0.5\n1010\t0.6\n")
+    data_pars = DataPars(str(file_path), cache_dir=cache_dir)
+    data_pars.file_pars_f()
+    file_path.write_text("wavelength\treflectance\n1000\t0.7\n1010\t0.8\n1020\t0.9\n")
+    data_pars = DataPars(str(file_path), cache_dir=cache_dir)
+    data_pars.file_pars_f()
+    assert data_pars.file_body.shape == (3, 2)
+    assert data_pars.file_body[0][1] == 0.7
+
+def test_parse_cache_eviction(tmp_path):
+    cache_dir = tmp_path / "cache"
+    for file_path in ["tests/files/sources/raw.txt", "tests/files/sources/geo.txt", "tests/files/sources/simple.txt"]:
+        data_pars = DataPars(file_path, cache_dir=str(cache_dir), cache_max_bytes=100 * 1024)
+        data_pars.file_pars_f()
+        assert sum(os.path.getsize(path) for path in cache_dir.iterdir()) <= 100 * 1024
+
+# memory-mapped chunked parser vs text-mode parser
+def test_memory_map_identical_to_text_mode():
+    files_list = glob.glob("tests/files/sources/*.txt") + glob.glob("resources/*.txt")
+    for file_path in files_list:
+        for nan_to_garbage in [False, True]:
+            mapped_data_pars = DataPars(file_path, nan_to_garbage=nan_to_garbage, memory_map=True)
+            mapped_data_pars.chunk_bytes = 4096  # many chunks even on small files
+            mapped_data_pars.file_pars_f()
+            text_data_pars = DataPars(file_path, nan_to_garbage=nan_to_garbage)
+            text_data_pars.file_pars_f()
+            assert outputs_are_identical(data_pars_outputs(mapped_data_pars), data_pars_outputs(text_data_pars))
+
+# streaming blocks vs whole-file parse
+def test_iter_blocks_identical_to_file_body(tmp_path):
+    files_list = glob.glob("tests/files/sources/*.txt") + glob.glob("resources/*.txt")
+    garbage_path = tmp_path / "garbage.txt"
+    garbage_path.write_text("wavelength\treflectance\n1000\t0.5\n1010\tn/a\n1020\t0.7\nend of data\n1030\t0.8\n")
+    files_list.append(str(garbage_path))
+    for file_path in files_list:
+        data_pars = DataPars(file_path)
+        data_pars.file_pars_f()
+        data_blocks = list(DataPars(file_path).iter_blocks(block_rows=7))
+        if data_pars.file_body.size == 0:  # no data -> no blocks
+            assert data_blocks == []
+            continue
+        assert np.array_equal(np.concatenate([data_block.rows for data_block in data_blocks]), data_pars.file_body)
+        for data_block in data_blocks:
+            assert data_block.header == data_pars.file_header
+            assert data_block.separator == data_pars.file_separator
+            assert data_block.accuracy == data_pars.file_accuracy
+
+# header longer than the detection sample: the sample grows until the data appears
+def test_iter_blocks_header_longer_than_sample(tmp_path):
+    file_path = tmp_path / "long_header.txt"
+    file_path.write_text("".join(f"acquisition note {i}\n" for i in range(DataPars.sample_lines + 44)) +
+                         "".join(f"{1000 + i}\t{0.5 + i * 0.001:.3f}\t0.01\n" for i in range(50)))
+    data_pars = DataPars(str(file_path))
+    data_pars.file_pars_f()
+    assert data_pars.file_body.shape == (50, 3)
+    streaming_data_pars = DataPars(str(file_path))
+    data_blocks = list(streaming_data_pars.iter_blocks(block_rows=20))
+    assert np.array_equal(np.concatenate([data_block.rows for data_block in data_blocks]), data_pars.file_body)
+    assert streaming_data_pars.file_header == data_pars.file_header
+    assert streaming_data_pars.file_data_start_line == data_pars.file_data_start_line
+
+# incremental parsing of a growing file vs whole-file parse
+def test_tail_read_identical_to_file_body(tmp_path):
+    with open("tests/files/sources/geo.txt", "rb") as source_file:
+        content = source_file.read()
+    file_path = tmp_path / "growing.txt"
+    data_pars = DataPars(str(file_path))
+    rows_list = []
+    for end in [300, 2000, 2001, 5000, 5003, len(content) // 2, len(content)]:  # cuts inside the lines too
+        file_path.write_bytes(content[:end])
+        data_block = data_pars.tail_read_f()
+        if data_block is None:  # the header only so far
+            assert not rows_list
+            continue
+        assert data_block.first_row == sum(len(rows) for rows in rows_list)
+        rows_list.append(data_block.rows)
+    reference_data_pars = DataPars("tests/files/sources/geo.txt")
+    reference_data_pars.file_pars_f()
+    assert np.array_equal(np.concatenate(rows_list), reference_data_pars.file_body)
+    assert data_pars.file_header == reference_data_pars.file_header
+    # truncated file: parsed again from its start
+    file_path.write_bytes(content[:len(content) // 2])
+    data_block = data_pars.tail_read_f()
+    assert data_block.first_row == 0
+    assert np.array_equal(data_block.rows, reference_data_pars.file_body[:len(data_block.rows)])
+
+def file_end():
+    pass
@@ -0,0 +1,46 @@
+# coding: utf-8
+
+# PACKAGES
+import os
+import sys
+import inspect
+import numpy as np
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+# MODULES
+from tools.export_tools import format_rows, write_rows
+
+
+# per-cell f-string formatting (the former export writer)
+def format_rows_per_cell(rows, file_accuracy, file_separator):
+    data_to_str = ""
+    for line in rows:
+        for column_number, column in enumerate(line):
+            data_to_str += f"{column:.{file_accuracy[column_number]}f}"
+            if column_number != len(line) - 1:
+                data_to_str += file_separator
+        data_to_str += "\n"
+    return data_to_str
+
+
+# compiled row format vs per-cell formatting
+def test_format_rows_identical_to_per_cell():
+    rng = np.random.default_rng(0)
+    rows = rng.normal(scale=1000, size=(1000, 5))
+    rows[0] = [0.0, -0.0, np.nan, np.inf, -np.inf]
+    rows[1] = [0.5, 1.5, 2.5, -0.00049, 1e300]
+    for file_accuracy, file_separator in [([0, 1, 3, 6, 12], "\t"), ([4, 4, 4, 4, 4, 4], ","), ([2, 2, 2, 2, 2], " % ")]:
+        expected_str = format_rows_per_cell(rows, file_accuracy, file_separator)
+        assert format_rows(rows, file_accuracy, file_separator) == expected_str
+
+def test_write_rows_chunks(tmp_path):
+    rows = np.random.default_rng(1).random((1000, 3))
+    export_path = tmp_path / "export.txt"
+    with open(export_path, "w") as file_output:
+        write_rows(file_output, rows, [3, 5, 5], "\t", chunk_rows=7)
+    assert export_path.read_text() == format_rows_per_cell(rows, [3, 5, 5], "\t")
+
+def file_end():
+    pass
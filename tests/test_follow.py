@@ -0,0 +1,59 @@
+# coding: utf-8
+
+# PACKAGES
+import os
+import sys
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+# MODULES
+from follow import SpectrumFollower
+from tools.data_pars import DataPars
+from presets.transmission_sapphire_window import SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION
+
+
+def read_lines(file_path):
+    with open(file_path) as file:
+        return file.read().splitlines()
+
+
+# export of a spectrum written in several steps vs the UI export of the whole spectrum
+def test_follower_export_of_growing_file(tmp_path):
+    with open("tests/files/sources/raw.txt", "rb") as source_file:
+        content = source_file.read()
+    file_path = tmp_path / "raw.txt"
+    export_path = tmp_path / "raw_wincor.txt"
+    spectrum_follower = SpectrumFollower(str(file_path), SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2,
+                                         "extended correction", "sapphire window", str(export_path))
+    corrected_rows_number = 0
+    for end in [len(content) // 3, len(content) // 3 + 7, 2 * len(content) // 3, len(content)]:
+        file_path.write_bytes(content[:end])
+        data_block, corrected_rows = spectrum_follower.refresh()
+        assert data_block.first_row == corrected_rows_number
+        corrected_rows_number += len(corrected_rows)
+    assert read_lines(export_path) == read_lines("tests/files/main/raw_extended_2_window.txt")
+
+# spectrum with a header longer than the layout detection sample: followed from its first data rows
+def test_follower_long_header(tmp_path):
+    with open("tests/files/sources/raw.txt", "rb") as source_file:
+        content = source_file.read()
+    long_header = "".join(f"# acquisition note {i}\n" for i in range(300)).encode()
+    file_path = tmp_path / "raw.txt"
+    spectrum_follower = SpectrumFollower(str(file_path), SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2,
+                                         "extended correction", "sapphire window")
+    file_path.write_bytes(long_header)
+    assert spectrum_follower.refresh() is None
+    corrected_rows_number = 0
+    for end in [len(content) // 2, len(content)]:
+        file_path.write_bytes(long_header + content[:end])
+        data_block, corrected_rows = spectrum_follower.refresh()
+        assert data_block.first_row == corrected_rows_number and len(corrected_rows) > 0
+        corrected_rows_number += len(corrected_rows)
+    data_pars = DataPars(str(file_path))
+    data_pars.file_pars_f()
+    assert corrected_rows_number == len(data_pars.file_body)
+
+def file_end():
+    pass
@@ -92,13 +92,16 @@ def test_warning_system_no_problem_max_test():
     assert assert_verif("transmission loaded")
     assert assert_verif("calc finished")
     assert assert_verif("export ready")
-    # parameters change: correction type
+    # parameters change: correction type -> derived from the solved roots, no recalculation needed
     win.ui.correction_type.setCurrentIndex(correction_type_index)
     assert assert_verif("spectrum loaded")
     assert assert_verif("transmission loaded")
-    assert assert_verif("calc expired")
-    assert assert_verif("export expired")
+    assert assert_verif("calc finished")
+    assert assert_verif("export ready")
+    derived_spectrum = win.corrected_spectrum
+    win.roots_cache = {}
     win.calculate_correction()
+    assert np.allclose(win.corrected_spectrum, derived_spectrum, rtol=0, atol=1e-12, equal_nan=True)
     assert assert_verif("spectrum loaded")
     assert assert_verif("transmission loaded")
     assert assert_verif("calc finished")
@@ -672,5 +675,206 @@ def test_temp_file_extended_2_window():
     assert filecmp.cmp(expected_result_path, export_file_path, shallow=False)
     win.close()
 
+# background correction worker
+def wait_for_correction_worker(win):
+    for _ in range(1000):
+        test_app.processEvents()
+        if win.correction_thread is None:
+            return
+        win.correction_thread.wait(10)
+    raise TimeoutError("the correction worker did not finish")
+
+def test_geo_file_worker_extended_2_window():
+    # inputs
+    spectrum_file_path = "tests/files/sources/geo.txt"
+    # app run
+    win = CorrectorMainW()
+    # spectrum set
+    win.select_file_action(spectrum_file_path, "spectrum loaded")
+    # transmission set
+    win.ui.transmission_preset.setCurrentIndex(0)
+    # windows_quantity & correction_type set
+    win.ui.windows_quantity.setCurrentIndex(0)
+    win.ui.windows_quantity.setCurrentIndex(1)
+    win.ui.correction_type.setCurrentIndex(0)
+    win.ui.correction_type.setCurrentIndex(1)
+    # calc in the worker & state verif
+    win.ui.correction_calc.click()
+    assert not win.ui.correction_calc.isEnabled()
+    wait_for_correction_worker(win)
+    assert win.ui.correction_calc.isEnabled()
+    assert win.ui.correction_progress.value() == len(win.reflectance_columns_list)
+    assert win.ui.correction_text_output.text() == "The calculation has been successfully completed!"
+    # export
+    export_file_path = "tests/files/main/export.txt"
+    win.export_action(export_file_path)
+    # expected result load & assert
+    expected_result_path = "tests/files/main/geo_extended_2_window.txt"
+    assert filecmp.cmp(expected_result_path, export_file_path, shallow=False)
+    win.close()
+
+def test_worker_cancel():
+    win = CorrectorMainW()
+    win.select_file_action("tests/files/sources/geo.txt", "spectrum loaded")
+    win.ui.transmission_preset.setCurrentIndex(0)
+    win.start_correction_worker()
+    win.cancel_correction_worker()
+    wait_for_correction_worker(win)
+    assert win.ui.correction_calc.isEnabled()
+    assert win.ui.correction_text_output.text() == "The calculation has been cancelled.\nPlease recalculate"
+    assert "ok" not in win.ui.export_state.text()
+    win.close()
+
+# a single reflectance column, solved by blocks of rows: cancelled in its first block; not cancelled, the whole roots
+def test_correction_worker_cancel_single_column():
+    data_pars = DataPars("tests/files/sources/simple.txt")
+    data_pars.file_pars_f()
+    expected_roots = window_correction_roots(data_pars.file_body, [1], SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2)
+    for cancel in [True, False]:
+        correction_worker = CorrectionWorker(data_pars.file_body, [1], SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 2,
+                                             block_rows=50)
+        progress, ends = [], []
+        correction_worker.progress.connect(lambda column_count, columns_number: progress.append(column_count))
+        if cancel:
+            correction_worker.progress.connect(correction_worker.cancel)
+        correction_worker.finished.connect(lambda real_roots: ends.append(real_roots))
+        correction_worker.cancelled.connect(lambda: ends.append("cancelled"))
+        correction_worker.run()
+        if cancel:
+            assert progress == [0] and ends == ["cancelled"]
+        else:
+            assert progress == [0] * (len(data_pars.file_body) // 50) + [1]
+            assert np.array_equal(ends[0], expected_roots, equal_nan=True)
+
+# background file load worker
+def wait_for_file_load_workers(win):
+    for _ in range(1000):
+        test_app.processEvents()
+        if not win.file_load_threads:
+            return
+        for file_load_thread in list(win.file_load_threads.values()):
+            file_load_thread.wait(10)
+    raise TimeoutError("the file load workers did not finish")
+
+def test_file_load_worker_preview_and_parsed():
+    file_load_worker = FileLoadWorker("tests/files/sources/geo.txt", preview_rows=10)
+    previews, parsed = [], []
+    file_load_worker.preview.connect(lambda rows, file_header: previews.append(rows))
+    file_load_worker.parsed.connect(lambda *file_data: parsed.append(file_data))
+    file_load_worker.run()
+    data_pars = DataPars("tests/files/sources/geo.txt")
+    data_pars.file_pars_f()
+    assert len(previews) == 1 and np.array_equal(previews[0], data_pars.file_body[:10])
+    file_content, file_header, file_separator, file_accuracy = parsed[0]
+    assert np.array_equal(file_content, data_pars.file_body)
+    assert file_header == data_pars.file_header
+    assert file_separator == data_pars.file_separator
+    assert file_accuracy == data_pars.file_accuracy
+
+# layouts the streamed preview cannot detect on its sample: the parsed data is the one of file_pars_f
+def test_file_load_worker_whole_file_layout(tmp_path):
+    long_header_path = tmp_path / "long_header.txt"
+    long_header_path.write_text("".join(f"acquisition note {i}\n" for i in range(300)) +
+                                "".join(f"{1000 + i}\t{0.5 + i * 0.001:.3f}\t0.01\n" for i in range(50)))
+    numeric_header_path = tmp_path / "numeric_header.txt"
+    numeric_header_path.write_text("".join(f"{i}\t{i * 2}\n" for i in range(200)) +
+                                   "".join(f"{1000 + i}\t{0.5 + i * 0.0001:.4f}\t0.01\n" for i in range(1000)))
+    for file_path, body_shape in [(long_header_path, (50, 3)), (numeric_header_path, (1000, 3))]:
+        file_load_worker = FileLoadWorker(str(file_path))
+        parsed = []
+        file_load_worker.parsed.connect(lambda *file_data: parsed.append(file_data))
+        file_load_worker.run()
+        assert parsed[0][0].shape == body_shape
+
+# a parse error is shown, not taken for an empty file
+def test_file_load_worker_failed():
+    win = CorrectorMainW()
+    error_messages = []
+    win.show_error_dialog = lambda message, title="Error!": error_messages.append(message)
+    win.start_file_load_worker("tests/files/sources/missing.txt", "spectrum loaded")
+    wait_for_file_load_workers(win)
+    assert len(error_messages) == 1 and "missing.txt" in error_messages[0]
+    assert win.ui.spectrum_label.text() != "missing.txt"
+    win.close()
+
+def test_geo_file_loaded_in_worker_simple_1_window():
+    win = CorrectorMainW()
+    # a second spectrum replaces the one being loaded
+    win.start_file_load_worker("tests/files/sources/simple.txt", "spectrum loaded")
+    win.start_file_load_worker("tests/files/sources/geo.txt", "spectrum loaded")
+    wait_for_file_load_workers(win)
+    assert win.ui.spectrum_label.text() == "geo.txt"
+    assert "ok" in win.ui.spectrum_state.text()
+    # transmission, windows_quantity & correction_type set
+    win.ui.transmission_preset.setCurrentIndex(0)
+    win.ui.windows_quantity.setCurrentIndex(1)
+    win.ui.correction_type.setCurrentIndex(1)
+    win.ui.windows_quantity.setCurrentIndex(0)
+    win.ui.correction_type.setCurrentIndex(0)
+    # calc & export
+    win.calculate_correction()
+    export_file_path = "tests/files/main/export.txt"
+    win.export_action(export_file_path)
+    assert filecmp.cmp("tests/files/main/geo_simple_1_window.txt", export_file_path, shallow=False)
+    win.close()
+
+# followed spectrum file
+def test_geo_file_sweep():
+    win = CorrectorMainW()
+    win.select_file_action("tests/files/sources/geo.txt", "spectrum loaded")
+    win.ui.transmission_preset.setCurrentIndex(0)
+    win.ui.windows_quantity.setCurrentIndex(1)
+    win.ui.windows_quantity.setCurrentIndex(0)
+    win.ui.correction_type.setCurrentIndex(1)
+    win.ui.correction_type.setCurrentIndex(0)
+    # one sweep: 1 transmission x 2 windows quantities x 2 correction types, the current parameters plotted
+    win.sweep_correction()
+    assert win.ui.sweep_combination.count() == 4
+    assert win.ui.sweep_combination.currentText() == "sapphire window, 1 window(s), parasitic reflections"
+    assert win.ui.correction_text_output.text() == "The calculation has been successfully completed!"
+    export_file_path = "tests/files/main/export.txt"
+    win.export_action(export_file_path)
+    assert filecmp.cmp("tests/files/main/geo_simple_1_window.txt", export_file_path, shallow=False)
+    # other combinations: plotted & exported without calculating again
+    expected_results = {"sapphire window, 2 window(s), parasitic reflections": "tests/files/main/geo_simple_2_window.txt",
+                        "sapphire window, 1 window(s), extended correction": "tests/files/main/geo_extended_1_window.txt",
+                        "sapphire window, 2 window(s), extended correction": "tests/files/main/geo_extended_2_window.txt"}
+    for combination_text, expected_result_path in expected_results.items():
+        win.ui.sweep_combination.setCurrentText(combination_text)
+        win.export_action(export_file_path)
+        assert filecmp.cmp(expected_result_path, export_file_path, shallow=False)
+    # the sweep roots serve a later calculation
+    win.ui.windows_quantity.setCurrentIndex(1)
+    assert win.get_cached_roots(*win.get_correction_inputs()[:3]) is not None
+    # a new spectrum clears the sweep
+    win.select_file_action("tests/files/sources/simple.txt", "spectrum loaded")
+    assert win.correction_sweep is None and win.ui.sweep_combination.count() == 0
+    win.close()
+
+
+def test_follow_file_appends_new_rows(tmp_path):
+    with open("tests/files/sources/simple.txt", "rb") as source_file:
+        content = source_file.read()
+    spectrum_file_path = tmp_path / "simple.txt"
+    spectrum_file_path.write_bytes(content[:len(content) // 2])
+    win = CorrectorMainW()
+    win.select_file_action(str(spectrum_file_path), "spectrum loaded")
+    win.ui.transmission_preset.setCurrentIndex(0)
+    win.ui.windows_quantity.setCurrentIndex(1)
+    win.ui.windows_quantity.setCurrentIndex(0)
+    win.ui.correction_type.setCurrentIndex(1)
+    win.ui.correction_type.setCurrentIndex(0)
+    win.calculate_correction()
+    export_file_path = str(tmp_path / "simple_wincor.txt")
+    win.export_action(export_file_path)
+    # the acquisition goes on
+    win.ui.follow_file.setChecked(True)
+    win.on_follow_timer()
+    spectrum_file_path.write_bytes(content)
+    win.on_follow_timer()
+    assert filecmp.cmp("tests/files/main/3_col_simple_1_window.txt", export_file_path, shallow=False)
+    assert len(win.corrected_spectrum) == len(win.spectrum_data) == 294
+    win.close()
+
 def file_end():
     pass
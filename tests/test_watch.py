@@ -0,0 +1,89 @@
+# coding: utf-8
+
+# PACKAGES
+import os
+import sys
+import json
+import time
+import shutil
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+# MODULES
+from watch import SpectrumWatcher
+from presets.transmission_sapphire_window import SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION
+
+
+def read_lines(file_path):
+    with open(file_path) as file:
+        return file.read().splitlines()
+
+
+def new_watcher(acquisition_dir):
+    return SpectrumWatcher([str(acquisition_dir)], SAPPHIRE_WINDOW_WAVELENGTHS, SAPPHIRE_WINDOW_TRANSMISSION, 1,
+                           "parasitic reflections", "sapphire window", settle_seconds=1, use_inotify=False)
+
+
+# steps the watcher (with a simulated clock) until nothing is pending or running
+def watch_until_idle(spectrum_watcher, now):
+    for _ in range(1000):
+        spectrum_watcher.step(now)
+        if not (spectrum_watcher.pending or spectrum_watcher.queued or spectrum_watcher.running):
+            return now
+        now += 0.5
+        time.sleep(0.01)
+    raise TimeoutError("the watcher did not get idle")
+
+
+# polling watch: settling, correction, persistent record
+def test_watch_corrects_settled_files_once(tmp_path):
+    acquisition_dir = tmp_path / "acquisition"
+    acquisition_dir.mkdir()
+    shutil.copy("tests/files/sources/geo.txt", acquisition_dir / "geo.txt")
+    spectrum_watcher = new_watcher(acquisition_dir)
+    spectrum_watcher.start()
+    try:
+        spectrum_watcher.step(0)
+        assert list(spectrum_watcher.pending) == [os.path.normpath(str(acquisition_dir / "geo.txt"))]
+        spectrum_watcher.step(0.5)  # not settled yet
+        assert not spectrum_watcher.running and not spectrum_watcher.processed
+        watch_until_idle(spectrum_watcher, 1)
+    finally:
+        spectrum_watcher.stop()
+    assert read_lines(acquisition_dir / "geo_wincor.txt") == read_lines("tests/files/main/geo_simple_1_window.txt")
+    with open(acquisition_dir / ".wincor_watch.json") as record_file:
+        assert len(json.load(record_file)) == 1
+    # restart: the processed file is not corrected again, a new one is
+    os.remove(acquisition_dir / "geo_wincor.txt")
+    shutil.copy("tests/files/sources/simple.txt", acquisition_dir / "simple.txt")
+    spectrum_watcher = new_watcher(acquisition_dir)
+    spectrum_watcher.start()
+    try:
+        watch_until_idle(spectrum_watcher, 0)
+    finally:
+        spectrum_watcher.stop()
+    assert not os.path.exists(acquisition_dir / "geo_wincor.txt")
+    assert read_lines(acquisition_dir / "simple_wincor.txt") == read_lines("tests/files/main/3_col_simple_1_window.txt")
+
+# a queued file removed before its submission is dropped, the watch goes on with the next one
+def test_watch_queued_file_removed(tmp_path):
+    acquisition_dir = tmp_path / "acquisition"
+    acquisition_dir.mkdir()
+    shutil.copy("tests/files/sources/simple.txt", acquisition_dir / "simple.txt")
+    spectrum_watcher = new_watcher(acquisition_dir)
+    spectrum_watcher.start()
+    try:
+        spectrum_watcher.queued.extend([os.path.normpath(str(acquisition_dir / "removed.txt")),
+                                        os.path.normpath(str(acquisition_dir / "simple.txt"))])
+        spectrum_watcher.step(0)
+        assert not spectrum_watcher.queued
+        assert [file_path for file_path, _ in spectrum_watcher.running.values()] == [os.path.normpath(str(acquisition_dir / "simple.txt"))]
+        watch_until_idle(spectrum_watcher, 0.5)
+    finally:
+        spectrum_watcher.stop()
+    assert list(spectrum_watcher.processed) == [os.path.normpath(str(acquisition_dir / "simple.txt"))]
+
+def file_end():
+    pass
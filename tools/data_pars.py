@@ -12,10 +12,14 @@
     Anomalous data is stored in a separate class variable to allow some further analysis and consideration if needed.
 """
 
+import io
 import os
 import re
+import mmap
+from itertools import chain, islice
 import numpy as np
 from collections import Counter
+from tools.parse_cache import ParseCache, DEFAULT_CACHE_MAX_BYTES
 
 """
     How to use:
@@ -23,6 +27,17 @@ from collections import Counter
         file_path: A string containing the path to the file to be parsed (obligatory).
         line_start_from_0: An integer starting from 0 to set the starting line of the file if needed (normally not necessary).
         nan_to_garbage: A boolean with False default value for whether remove rows with nan in data_read.file_garbage or let them get into data_read.file_body as np.nan
+        fast_pars: A boolean with True default value for whether to try the bulk block parser first (the line-by-line parser is the fallback)
+        cache_dir: A string with None default value, the directory of an on-disk parse cache (see tools/parse_cache.py), no cache if None
+        cache_max_bytes: An integer, the size limit of the parse cache (512 MB by default)
+        memory_map: A boolean with False default value for whether to memory-map the file and parse its data block in chunks (for very large files)
+        # STREAMING CALL (files larger than RAM)
+        for data_block in data_read.iter_blocks(block_rows):  # 65536 rows by default
+            data_block.rows  # A NumPy array of floats (float64), at most block_rows lines by column
+            data_block.first_row, data_block.garbage  # index of the first row in the data block, anomalous lines of this block
+            data_block.header, data_block.separator, data_block.accuracy  # file metadata, the same for all the blocks
+        # INCREMENTAL CALL (files growing during an acquisition)
+        data_block = data_read.tail_read_f()  # all the rows on the first call, then only the rows appended since the previous call
         # CALL
         from data_reading import DataPars as DataPars
         data_read =  DataPars(file_path) # data_read =  DataPars(file_path, line_start_from_0, nan_to_garbage) or data_read =  DataPars(file_path, line_start_from_0)
@@ -38,7 +53,45 @@ from collections import Counter
         At the end of this file there are two demo-functions.
 """
 
-__version__ = "3.1.0"
+__version__ = "3.6.0"
+
+
+class DataBlock:
+    """
+        A block of consecutive data rows yielded by DataPars.iter_blocks, with the file metadata needed to process
+        and export it on its own.
+    """
+
+    def __init__(self, rows, first_row, garbage, header, separator, accuracy, data_start_line):
+        """
+        :param rows: np.ndarray
+            The data rows of the block (float64, rows by columns).
+        :param first_row: int
+            The index of the first row of the block among all the data rows of the file.
+        :param garbage: list
+            The anomalous lines of the block, as in DataPars.file_garbage (line indexes in the file).
+        :param header: list of str
+            The file header.
+        :param separator: str
+            The file separator.
+        :param accuracy: list of int
+            The number of decimal signs of each column.
+        :param data_start_line: int
+            The line, starting from 0, where the data block of the file starts.
+        """
+        self.rows = rows
+        self.first_row = first_row
+        self.garbage = garbage
+        self.header = header
+        self.separator = separator
+        self.accuracy = accuracy
+        self.data_start_line = data_start_line
+
+    def with_rows(self, rows):
+        """
+            Returns a block with the same metadata and new rows (a processed version of this block).
+        """
+        return DataBlock(rows, self.first_row, self.garbage, self.header, self.separator, self.accuracy, self.data_start_line)
 
 
 class DataPars:
@@ -56,18 +109,43 @@ class DataPars:
         DataPars also determines the accuracy of the original data. So it can be reused from file_accuracy to keep the initial accuracy, for example.
     """
 
-    def __init__(self, file_path, file_start=0, nan_to_garbage=False):
+    # number of lines, from file_start, used by the fast path to detect the header and the data block pattern
+    sample_lines = 256
+    # ASCII characters allowed in a data block parsed by the fast path: digits, float words (nan, inf, infinity) and separators
+    fast_block_characters = np.isin(np.arange(256), np.frombuffer(b"0123456789eE+-.nNaAiIfFtTyY \t,\n", dtype=np.uint8))
+
+    # size in bytes of the data chunks parsed at once in the memory_map mode
+    chunk_bytes = 8 * 1024 ** 2
+
+    def __init__(self, file_path, file_start=0, nan_to_garbage=False, fast_pars=True,
+                 cache_dir=None, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, memory_map=False):
         """
             Initialize the DataPars object with file_path, and file_start.
         :param file_path: str
             The path to the file to be processed.
         :param file_start: int
             The starting point in the file, default is 0.
+        :param fast_pars: bool
+            Whether to try the bulk block parser before the line-by-line one, default is True.
+        :param cache_dir: str or None
+            The directory of the on-disk parse cache, default is None (no cache).
+        :param cache_max_bytes: int
+            The size limit of the parse cache.
+        :param memory_map: bool
+            Whether to memory-map the file and parse its data block in chunks, default is False.
         """
         # INPUTS
         self.file_path = file_path
         self.file_start = file_start
         self.nan_to_garbage = nan_to_garbage
+        self.fast_pars = fast_pars
+        self.parse_cache = ParseCache(cache_dir, cache_max_bytes) if cache_dir else None
+        self.memory_map = memory_map
+        # TAIL (see tail_read_f): byte offset & line index after the last parsed complete line, data rows parsed so far
+        self.tail_offset = None
+        self.tail_line = 0
+        self.tail_rows = 0
+        self.tail_file_id = None  # device & inode: a replaced file is parsed again from its start
         # Initialize all other attributes with default values.
         self.init_class_outputs()
 
@@ -168,11 +246,11 @@ class DataPars:
 
     def indexes_to_clear_f(self, max_length):
         """
-            Indexes the elements that need to be cleared based on their type and content.
+            Marks the elements that need to be cleared based on their type and content.
 
-            This function scans the parsed_content list to identify elements that need to be cleared.
-            It checks if the elements are not numpy arrays of the specified max_length or if they
-            contain NaN values when nan_to_garbage is True. The function also determines the boundaries
+            This function scans the parsed_content list once to identify elements that need to be cleared:
+            elements that are not numpy arrays of the specified max_length or, when nan_to_garbage is True,
+            that contain NaN values. The function also determines the boundaries
             where the headers end and where the data starts.
 
         :param max_length: int
@@ -180,38 +258,33 @@ class DataPars:
 
         :return: tuple
             A tuple containing:
-            - A list of indexes for elements deemed invalid or requiring clearance.
+            - A boolean mask over parsed_content, True for elements deemed invalid or requiring clearance.
             - The index where the parsed content's headers section ends.
             - The index where the parsed content's data section starts.
         """
         try:
-            indexes_to_clean = []
-            index_header_ends, index_data_starts = -1, -1
-            for i, element in enumerate(self.parsed_content):
-                if not isinstance(element, np.ndarray) or len(element) != max_length:
-                    indexes_to_clean.append(i)
-                elif self.nan_to_garbage and np.isnan(element).any():  # NaN action is possible here
-                    indexes_to_clean.append(i)
-                    if index_header_ends == -1:
-                        index_header_ends = i
-                else:
-                    if index_header_ends == -1:
-                        index_header_ends = i
-                    if index_data_starts == -1:
-                        index_data_starts = i
-            return indexes_to_clean, index_header_ends, index_data_starts
+            lines_length = np.fromiter((len(element) if isinstance(element, np.ndarray) else -1 for element in self.parsed_content),
+                                       dtype=np.intp, count=len(self.parsed_content))
+            rows_of_max_length = lines_length == max_length
+            rows_to_clean = ~rows_of_max_length
+            if self.nan_to_garbage and np.any(rows_of_max_length):  # NaN action is possible here
+                rows_with_nan = np.isnan(np.stack(list(self.parsed_content[rows_of_max_length]))).any(axis=1)
+                rows_to_clean[np.flatnonzero(rows_of_max_length)[rows_with_nan]] = True
+            index_header_ends = int(np.argmax(rows_of_max_length)) if np.any(rows_of_max_length) else -1
+            index_data_starts = int(np.argmax(~rows_to_clean)) if not np.all(rows_to_clean) else -1
+            return rows_to_clean, index_header_ends, index_data_starts
         except Exception as e:
             raise Exception(f"Critical error in DataPars:indexes_to_clear_f: {str(e)}") from e
 
-    def header_garbage_and_start_line_f(self, indexes_to_clean, index_header_ends, file_content):
+    def header_garbage_and_start_line_f(self, rows_to_clean, index_header_ends, file_content):
         """
-            Processes header and garbage data from the provided file content based on indexes.
+            Processes header and garbage data from the provided file content based on the rows to clean.
 
-            This function separates the header and garbage data from the file content using the provided indexes.
+            This function separates the header and garbage data from the file content using the provided mask.
             It updates the `file_header` and `file_garbage` attributes accordingly.
 
-        :param indexes_to_clean: list[int]
-        	List of indexes to be processed.
+        :param rows_to_clean: np.ndarray of bool
+        	Mask of the parsed_content elements to be processed.
         :param index_header_ends: int
         	Index indicating the end of the header section.
         :param file_content: list[str]
@@ -224,7 +297,7 @@ class DataPars:
             # start line
             self.file_data_start_line = index_header_ends
             # header & garbage
-            for index in indexes_to_clean:
+            for index in np.flatnonzero(rows_to_clean).tolist():
                 if index < index_header_ends:
                     self.file_header.append(file_content[index])
                 else:
@@ -254,21 +327,36 @@ class DataPars:
             for i in range(len(self.parsed_content)):
                 if i >= index_data_starts:
                     if not self.nan_to_garbage or (self.nan_to_garbage and not np.isnan(self.parsed_content[i]).any()):
-                        for s in re.split(self.separator_pattern, file_content[i].strip()):
-                            if "." in s:
-                                if "E" in s or "e" in s:
-                                    self.file_accuracy.append(s.strip().lower().find("e") - s.strip().find(".") - 1)
-                                else:
-                                    self.file_accuracy.append(len(s.strip()) - s.strip().find(".") - 1)
-                            else:
-                                self.file_accuracy.append(0)
-                        match_separator = re.search(self.separator_pattern, file_content[i].strip())
-                        if match_separator:
-                            self.file_separator = match_separator[0]
+                        self.accuracy_and_separator_from_line(file_content[i])
                         break
         except Exception as e:
             raise Exception(f"Critical error in DataPars:accuracy_and_separator_f: {str(e)}") from e
 
+    def accuracy_and_separator_from_line(self, line):
+        """
+            Determines accuracy and separator from a single data line.
+
+        :param line: str
+            The first valid line of the data block.
+
+        :return: None
+            The function returns nothing, but updates file_accuracy and file_separator attributes.
+        """
+        try:
+            for s in re.split(self.separator_pattern, line.strip()):
+                if "." in s:
+                    if "E" in s or "e" in s:
+                        self.file_accuracy.append(s.strip().lower().find("e") - s.strip().find(".") - 1)
+                    else:
+                        self.file_accuracy.append(len(s.strip()) - s.strip().find(".") - 1)
+                else:
+                    self.file_accuracy.append(0)
+            match_separator = re.search(self.separator_pattern, line.strip())
+            if match_separator:
+                self.file_separator = match_separator[0]
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:accuracy_and_separator_from_line: {str(e)}") from e
+
     def assign_no_data_content(self, file_content):
         """
             Assign initial no-data content to the file-related variables.
@@ -290,15 +378,14 @@ class DataPars:
         except Exception as e:
             raise Exception(f"Critical error in DataPars:assign_no_data_content: {str(e)}") from e
 
-    def assign_file_body(self, indexes_to_clean, max_length):
+    def assign_file_body(self, rows_to_clean, max_length):
         """
-            Assigns and cleans the file body based on specified indexes and maximum length.
+            Assigns and cleans the file body based on the rows to clean and maximum length.
 
-            This method initializes the file_body attribute by creating a NumPy array,
-            then iterates through the parsed content to populate the array, excluding specified indexes.
-            The NumPy array is set up with predefined dimensions and data type.
-        :param indexes_to_clean: list
-                A list of integers representing indexes that need to be excluded from the file_body.
+            This method selects the rows of the parsed content that are kept
+            and stacks them into the file_body NumPy array in a single operation.
+        :param rows_to_clean: np.ndarray of bool
+                A mask over parsed_content, True for the rows that need to be excluded from the file_body.
         :param max_length: int
                 An integer specifying the maximum length of each line in the file_body.
 
@@ -306,16 +393,383 @@ class DataPars:
                 The function returns nothing, but modifies the `file_body` attribute of the instance.
         """
         try:
-            self.file_body = np.empty([len(self.parsed_content) - len(indexes_to_clean), max_length], dtype=np.double)
-            index = 0
-            for i, line in enumerate(self.parsed_content):
-                if i not in indexes_to_clean:
-                    for j, data in enumerate(line):
-                        self.file_body[index][j] = data
-                    index += 1
+            rows_to_keep = self.parsed_content[~rows_to_clean]
+            if len(rows_to_keep) == 0:
+                self.file_body = np.empty([0, max_length], dtype=np.double)
+            else:
+                self.file_body = np.stack(list(rows_to_keep)).astype(np.double, copy=False)
         except Exception as e:
             raise Exception(f"Critical error in DataPars:assign_file_body: {str(e)}") from e
 
+    def sample_data_start(self, file_content, sample_lines=None):
+        """
+            Detects the data block pattern on a prefix sample of the file.
+
+            The first sample_lines lines (from file_start) are parsed line-by-line, the most frequent line length
+            is taken as the data block width and the first line of that width as the data start.
+
+        :param file_content: list of str
+            Each element represents a line from the file.
+        :param sample_lines: int or None
+            The number of lines of the sample, the class sample_lines if None.
+
+        :return: tuple
+            The data start index and the data block width, or (-1, 0) if the sample contains no data.
+            lines_length_collection holds the line lengths counted on the sample.
+        """
+        try:
+            self.parse_file_content(file_content[:self.file_start + (sample_lines or self.sample_lines)])
+            if len(self.lines_length_collection.keys()) == 0:
+                return -1, 0
+            max_qty, max_length = self.most_frequent_line_length()
+            for i, element in enumerate(self.parsed_content):
+                if isinstance(element, np.ndarray) and len(element) == max_length:
+                    return i, max_length
+            return -1, 0
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:sample_data_start: {str(e)}") from e
+
+    def parse_data_block(self, block_lines, max_length):
+        """
+            Parses a clean block of data lines in bulk into one contiguous float64 array.
+
+            The block is accepted only when the result is guaranteed to be the one of the line-by-line parser:
+            no empty lines, no characters other than numbers and separators, no leading or trailing comma,
+            exactly max_length values on every line and, with nan_to_garbage, no NaN at all.
+
+        :param block_lines: list of str
+            The data lines.
+        :param max_length: int
+            The expected number of values per line.
+
+        :return: np.ndarray or None
+            The parsed block, or None if the block has to go through the line-by-line parser.
+        """
+        try:
+            block_text = "".join(block_lines)
+            try:
+                block_codes = np.frombuffer(block_text.encode("ascii"), dtype=np.uint8)
+            except UnicodeEncodeError:
+                return None
+            if not self.fast_block_characters[block_codes].all():
+                return None
+            for line in block_lines:
+                stripped_line = line.strip()
+                if not stripped_line or stripped_line[0] == "," or stripped_line[-1] == ",":
+                    return None
+            if "," in block_text:
+                block_text = block_text.replace(",", " ")
+            try:
+                block = np.loadtxt(io.StringIO(block_text), dtype=np.double, comments=None, ndmin=2)
+            except ValueError:
+                return None
+            if block.shape != (len(block_lines), max_length):
+                return None
+            if self.nan_to_garbage and np.isnan(block).any():
+                return None
+            return block
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:parse_data_block: {str(e)}") from e
+
+    def fast_pars_f(self, file_content):
+        """
+            Fast path of file_pars_f: header and separator from a prefix sample, then the data block in bulk.
+
+            Works for files with one clean data block after the header (no garbage rows). The outputs are
+            exactly those of the line-by-line parser; any other file is left to it.
+
+        :param file_content: list of str
+            Each element represents a line from the file.
+
+        :return: bool
+            True if the file has been parsed, False if the line-by-line parser must be used.
+        """
+        try:
+            data_start, max_length = self.sample_data_start(file_content)
+            if data_start == -1:
+                return False
+            # the data block must be the most frequent line length of the whole file, not only of the sample
+            header_lengths = Counter(len(element) for element in self.parsed_content[:data_start] if isinstance(element, np.ndarray))
+            if len(file_content) - data_start <= max(header_lengths.values(), default=0):
+                return False
+            block = self.parse_data_block(file_content[data_start:], max_length)
+            if block is None:
+                return False
+            self.file_header = file_content[:data_start]
+            self.file_data_start_line = data_start
+            self.accuracy_and_separator_from_line(file_content[data_start])
+            self.file_body = block
+            return True
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:fast_pars_f: {str(e)}") from e
+
+    def mapped_prefix(self, mapped):
+        """
+            Splits the beginning of a memory-mapped file into lines, as read_file would do.
+
+            The prefix holds the first file_start + sample_lines lines. Its lines are decoded with universal newlines,
+            like the text-mode reading of read_file; the byte offset of every line is kept.
+
+        :param mapped: mmap.mmap
+            The memory-mapped file.
+
+        :return: tuple or None
+            The decoded prefix lines and the byte offsets of their starts (one more for the prefix end),
+            or None if the file has lone carriage returns (old Mac line endings) and must be read as text.
+        """
+        try:
+            prefix_end = 0
+            for _ in range(self.file_start + self.sample_lines):
+                newline = mapped.find(b"\n", prefix_end)
+                if newline == -1:
+                    prefix_end = len(mapped)
+                    break
+                prefix_end = newline + 1
+            prefix_bytes = mapped[:prefix_end]
+            if prefix_bytes.count(b"\r") != prefix_bytes.count(b"\r\n"):
+                return None
+            raw_lines = prefix_bytes.splitlines(keepends=True)
+            offsets = np.concatenate(([0], np.cumsum([len(raw_line) for raw_line in raw_lines], dtype=np.int64)))
+            prefix_lines = io.TextIOWrapper(io.BytesIO(prefix_bytes), encoding="utf8").readlines()
+            return prefix_lines, offsets
+        except UnicodeDecodeError:
+            return None
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:mapped_prefix: {str(e)}") from e
+
+    def mapped_pars_f(self):
+        """
+            Memory-mapped variant of the fast path: the file is never read as a whole.
+
+            The header and the data block pattern are detected on the mapped prefix, the number of data rows is
+            counted on the mapped bytes, and the data block is parsed in chunks of about chunk_bytes directly
+            into the preallocated file_body. Peak memory stays close to the size of file_body.
+
+        :return: bool
+            True if the file has been parsed, False if it must go through the text-mode parsers.
+        """
+        try:
+            if os.path.getsize(self.file_path) == 0:
+                return False
+            with open(self.file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                prefix = self.mapped_prefix(mapped)
+                if prefix is None:
+                    return False
+                prefix_lines, offsets = prefix
+                data_start, max_length = self.sample_data_start(prefix_lines)
+                if data_start == -1:
+                    return False
+                # rows of the data block: lines from the data start to the end of the file
+                data_offset = int(offsets[data_start])
+                rows_number = 0
+                for chunk_start in range(data_offset, len(mapped), self.chunk_bytes):
+                    rows_number += mapped[chunk_start:chunk_start + self.chunk_bytes].count(b"\n")
+                if mapped[-1:] != b"\n":
+                    rows_number += 1
+                header_lengths = Counter(len(element) for element in self.parsed_content[:data_start] if isinstance(element, np.ndarray))
+                if rows_number <= max(header_lengths.values(), default=0):
+                    return False
+                # the data block, chunk by chunk, each chunk ending on a line end
+                file_body = np.empty([rows_number, max_length], dtype=np.double)
+                row, chunk_start = 0, data_offset
+                while chunk_start < len(mapped):
+                    chunk_end = min(chunk_start + self.chunk_bytes, len(mapped))
+                    if chunk_end < len(mapped):  # extended to the end of the line
+                        newline = mapped.find(b"\n", chunk_end - 1)
+                        chunk_end = newline + 1 if newline != -1 else len(mapped)
+                    chunk_text = mapped[chunk_start:chunk_end].decode("utf8").replace("\r\n", "\n")
+                    if "\r" in chunk_text:
+                        return False
+                    chunk_lines = chunk_text.splitlines(keepends=True)
+                    block = self.parse_data_block(chunk_lines, max_length)
+                    if block is None or row + len(block) > rows_number:
+                        return False
+                    file_body[row:row + len(block)] = block
+                    row += len(block)
+                    chunk_start = chunk_end
+                if row != rows_number:
+                    return False
+            self.file_header = prefix_lines[:data_start]
+            self.file_data_start_line = data_start
+            self.accuracy_and_separator_from_line(prefix_lines[data_start])
+            self.file_body = file_body
+            return True
+        except UnicodeDecodeError:
+            return False
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:mapped_pars_f: {str(e)}") from e
+
+    def parse_block_lines(self, block_lines, first_line, max_length):
+        """
+            Line-by-line parsing of a block of data lines, for the blocks with anomalous lines.
+
+        :param block_lines: list of str
+            The lines of the block.
+        :param first_line: int
+            The line index, in the file, of the first line of the block.
+        :param max_length: int
+            The number of values of a data line.
+
+        :return: tuple
+            The data rows (np.ndarray) and the anomalous lines (list of (line index, line or parsed values)).
+        """
+        try:
+            rows, garbage = [], []
+            for i, line in enumerate(block_lines, start=first_line):
+                try:
+                    line_to_vector = np.array(re.split(self.separator_pattern, line.strip()), dtype=np.double)
+                except ValueError:
+                    garbage.append((i, line))
+                    continue
+                if len(line_to_vector) != max_length:
+                    garbage.append((i, line))
+                elif self.nan_to_garbage and np.isnan(line_to_vector).any():
+                    garbage.append((i, line_to_vector))
+                else:
+                    rows.append(line_to_vector)
+            if len(rows) == 0:
+                return np.empty([0, max_length], dtype=np.double), garbage
+            return np.stack(rows), garbage
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:parse_block_lines: {str(e)}") from e
+
+    def iter_blocks(self, block_rows=65536):
+        """
+            Streams the data block of the file: yields DataBlock objects of at most block_rows lines.
+
+            The header, separator and accuracy are detected on the prefix sample (as in the fast path) before
+            the first block is yielded and are set in the class variables too; file_body is not built, so the file
+            is never held in memory as a whole. Clean blocks are parsed in bulk, blocks with anomalous lines
+            line-by-line; their anomalous lines are in the block garbage and are collected in file_garbage.
+            A file without data yields nothing and gets its whole content as header.
+
+        :param block_rows: int
+            The maximum number of lines of a block, default is 65536.
+
+        :return: generator of DataBlock
+        """
+        try:
+            if not os.path.isfile(self.file_path):
+                raise FileNotFoundError(f"The file {self.file_path} does not exist.")
+            with open(self.file_path, "r", encoding="utf8") as file:
+                yield from self.iter_line_blocks(file, block_rows)
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:iter_blocks: {str(e)}") from e
+
+    def iter_line_blocks(self, lines, block_rows=65536):
+        """
+            Streams the data block of text lines (an open text file or any iterator of lines), see iter_blocks.
+
+        :param lines: iterator of str
+            The lines of the file.
+        :param block_rows: int
+            The maximum number of lines of a block, default is 65536.
+
+        :return: generator of DataBlock
+        """
+        try:
+            lines = iter(lines)
+            self.init_class_outputs()
+            # the sample is doubled until it holds more data lines than header lines of a same length
+            # (a header longer than sample_lines) or holds the whole file
+            prefix_lines = list(islice(lines, self.file_start + self.sample_lines))
+            while True:
+                data_start, max_length = self.sample_data_start(prefix_lines, len(prefix_lines))
+                header_lengths = Counter(len(element) for element in self.parsed_content[:max(data_start, 0)]
+                                         if isinstance(element, np.ndarray))
+                if data_start != -1 and len(prefix_lines) - data_start > max(header_lengths.values(), default=0):
+                    break
+                more_lines = list(islice(lines, len(prefix_lines)))
+                if not more_lines:
+                    break
+                prefix_lines += more_lines
+            if data_start == -1:
+                self.assign_no_data_content(prefix_lines + list(lines))
+                return
+            self.file_header = prefix_lines[:data_start]
+            self.file_data_start_line = data_start
+            self.accuracy_and_separator_from_line(prefix_lines[data_start])
+            data_lines = chain(prefix_lines[data_start:], lines)
+            first_line, first_row = data_start, 0
+            while True:
+                block_lines = list(islice(data_lines, block_rows))
+                if not block_lines:
+                    break
+                rows = self.parse_data_block(block_lines, max_length)
+                garbage = []
+                if rows is None:
+                    rows, garbage = self.parse_block_lines(block_lines, first_line, max_length)
+                    self.file_garbage.extend(garbage)
+                yield DataBlock(rows, first_row, garbage, self.file_header, self.file_separator, self.file_accuracy, data_start)
+                first_line += len(block_lines)
+                first_row += len(rows)
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:iter_line_blocks: {str(e)}") from e
+
+    @staticmethod
+    def complete_lines(content):
+        """
+            The complete (newline terminated) lines of a bytes content, decoded as a text file would be.
+
+        :param content: bytes
+            The content, possibly ending with a line still being written.
+
+        :return: tuple
+            The lines (list of str) and the number of bytes they take.
+        """
+        complete_length = content.rfind(b"\n") + 1
+        return list(io.TextIOWrapper(io.BytesIO(content[:complete_length]), encoding="utf8")), complete_length
+
+    def tail_read_f(self):
+        """
+            Incremental parsing of a growing file: each call parses only the complete lines appended since the previous one.
+
+            The first call (and any call after the file has been truncated or replaced, or while it has no data yet)
+            parses all the complete lines and detects the layout (header, separator, accuracy, columns);
+            the next calls parse the appended lines with that layout, from the remembered byte offset, so their cost
+            depends on the number of new lines only. A last line still being written is left for the next call.
+            file_body is not updated: the new rows are in the returned block.
+
+        :return: DataBlock or None
+            The new rows (first_row 0: all the rows, the previous ones are to be discarded),
+            None if the file has no data yet.
+        """
+        try:
+            if not os.path.isfile(self.file_path):
+                raise FileNotFoundError(f"The file {self.file_path} does not exist.")
+            with open(self.file_path, "rb") as file:
+                file_stat = os.fstat(file.fileno())
+                file_id = (file_stat.st_dev, file_stat.st_ino)
+                if self.tail_offset is not None and file_id == self.tail_file_id and file_stat.st_size >= self.tail_offset:
+                    file.seek(self.tail_offset)
+                    lines, lines_bytes = self.complete_lines(file.read())
+                    columns_number = len(self.file_accuracy)
+                    rows, garbage = np.empty([0, columns_number], dtype=np.double), []
+                    if lines:
+                        rows = self.parse_data_block(lines, columns_number)
+                        if rows is None:
+                            rows, garbage = self.parse_block_lines(lines, self.tail_line, columns_number)
+                            self.file_garbage.extend(garbage)
+                    data_block = DataBlock(rows, self.tail_rows, garbage, self.file_header, self.file_separator,
+                                           self.file_accuracy, self.file_data_start_line)
+                    self.tail_offset += lines_bytes
+                    self.tail_line += len(lines)
+                    self.tail_rows += len(rows)
+                    return data_block
+                # first call, truncated or replaced file: all the complete lines
+                lines, lines_bytes = self.complete_lines(file.read())
+            data_blocks = list(self.iter_line_blocks(iter(lines), max(len(lines), 1)))
+            if not data_blocks:
+                self.tail_offset = None
+                return None
+            self.tail_offset = lines_bytes
+            self.tail_file_id = file_id
+            self.tail_line = len(lines)
+            self.tail_rows = len(data_blocks[0].rows)
+            return data_blocks[0]
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:tail_read_f: {str(e)}") from e
+
     def file_pars_f(self):
         """
         	Parses the content of a file based on various heuristics to separate data blocks from headers and garbage.
@@ -335,30 +789,56 @@ class DataPars:
             if os.path.isfile(self.file_path):
                 # reset class variables
                 self.init_class_outputs()
-                # read the file
-                file_content = self.read_file()
-                # apply "first-approach" file parsing and collect line lengths in self.lines_length_collection
-                self.parse_file_content(file_content)
-                # If self.lines_length_collection is empty, then the file has no blocks of data
-                # So, we put all its content into the self.file_header
-                if len(self.lines_length_collection.keys()) == 0:  # No numbers found
-                    self.assign_no_data_content(file_content)
-                # Otherwise we proceed to the "second-approach" file parsing
-                else:
-                    # we assume that lines with the data must have the most frequent length
-                    # so, we search for it
-                    max_qty, max_length = self.most_frequent_line_length()
-                    # all lines with length different to max_length is not the data block
-                    # so, we put their indexes apart in indexes_to_clean to avoid them later
-                    # also we determine where the header is ended and the data is started
-                    indexes_to_clean, index_header_ends, index_data_starts = self.indexes_to_clear_f(max_length)
-                    # now we can determine header & garbage
-                    self.header_garbage_and_start_line_f(indexes_to_clean, index_header_ends, file_content)
-                    # as well as accuracy & separator
-                    self.accuracy_and_separator_f(index_data_starts, file_content)
-                    # finally, the data block is self.parsed_content without data on indexes_to_clean indexes
-                    self.assign_file_body(indexes_to_clean, max_length)
+                # warm load from the parse cache if the file is unchanged
+                if self.parse_cache and self.parse_cache.load(self, __version__):
+                    return
+                self.file_pars_content()
+                if self.parse_cache:
+                    self.parse_cache.store(self, __version__)
             else:
                 raise FileNotFoundError(f"The file {self.file_path} does not exist.")
         except Exception as e:
             raise Exception(f"Critical error in DataPars:file_pars_f: {str(e)}") from e
+
+    def file_pars_content(self):
+        """
+            Reads and parses the file: fast block parser first, line-by-line parser otherwise.
+
+        :return: None
+             The function returns nothing, but modifies class attributes to store header, data, and related parsing information.
+        """
+        try:
+            # memory-mapped fast path: the file is not read into memory as a whole
+            if self.memory_map and self.fast_pars and self.mapped_pars_f():
+                return
+            self.init_class_outputs()
+            # read the file
+            file_content = self.read_file()
+            # fast path: clean data block parsed in bulk
+            if self.fast_pars and self.fast_pars_f(file_content):
+                return
+            # reset what the fast path may have left
+            self.init_class_outputs()
+            # apply "first-approach" file parsing and collect line lengths in self.lines_length_collection
+            self.parse_file_content(file_content)
+            # If self.lines_length_collection is empty, then the file has no blocks of data
+            # So, we put all its content into the self.file_header
+            if len(self.lines_length_collection.keys()) == 0:  # No numbers found
+                self.assign_no_data_content(file_content)
+            # Otherwise we proceed to the "second-approach" file parsing
+            else:
+                # we assume that lines with the data must have the most frequent length
+                # so, we search for it
+                max_qty, max_length = self.most_frequent_line_length()
+                # all lines with length different to max_length is not the data block
+                # so, we mark them in the rows_to_clean mask to avoid them later
+                # also we determine where the header is ended and the data is started
+                rows_to_clean, index_header_ends, index_data_starts = self.indexes_to_clear_f(max_length)
+                # now we can determine header & garbage
+                self.header_garbage_and_start_line_f(rows_to_clean, index_header_ends, file_content)
+                # as well as accuracy & separator
+                self.accuracy_and_separator_f(index_data_starts, file_content)
+                # finally, the data block is self.parsed_content without the rows_to_clean rows
+                self.assign_file_body(rows_to_clean, max_length)
+        except Exception as e:
+            raise Exception(f"Critical error in DataPars:file_pars_content: {str(e)}") from e
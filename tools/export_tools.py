@@ -0,0 +1,217 @@
+# coding: utf-8
+
+"""
+    This module contains the tools to export corrected spectra.
+
+    The export keeps the original file: its header (with one added line describing the window correction),
+    its separator and the accuracy of each column. The data can be exported at once or block by block
+    (see DataPars.iter_blocks), so a file larger than the memory can be written.
+"""
+
+# PACKAGES
+import numpy as np
+
+
+def export_header(file_header, reflectance_columns_list, window_material, windows_quantity, correction_type, uncertainty_method=None):
+    """
+        Builds the header of an exported file: the original header with the window correction line.
+
+        Simple files get the correction line after their header, raw files as the second line
+        and compilations as the very first line.
+
+    :param file_header: list of str
+        The header lines of the original file.
+    :param reflectance_columns_list: list of int
+        The corrected reflectance columns.
+    :param window_material: str
+        The window material (preset name or transmission file name).
+    :param windows_quantity: int
+        The number of windows.
+    :param correction_type: str
+        The correction type.
+    :param uncertainty_method: str or None
+        How the uncertainties were computed, if not by the default ratio scaling (e.g. "Monte Carlo, 1000 draws").
+
+    :return: str
+        The header of the exported file.
+    """
+    try:
+        header_str = ""
+        correction_info = (f"Window reflection correction: "
+                           f"material: {window_material}, "
+                           f"quantity: {windows_quantity}, "
+                           f"type: {correction_type}"
+                           + (f", uncertainty: {uncertainty_method}" if uncertainty_method else "") + ".\n")
+        if len(file_header) > 0:
+            for index, line in enumerate(file_header):
+                if len(reflectance_columns_list) == 1:
+                    if reflectance_columns_list[0] != 1:
+                        if index == 1:
+                            header_str += correction_info  # raw files get info as the second line
+                else:
+                    if index == 0:
+                        header_str += correction_info  # compilations get info as the very first line
+                header_str += line
+        else:
+            header_str += correction_info  # if no header -> info in the first line
+        if len(reflectance_columns_list) == 1:
+            if reflectance_columns_list[0] == 1:
+                header_str += correction_info  # simple files get info line after the header
+        return header_str
+    except Exception as e:
+        raise Exception(f"Critical error in export_header: {str(e)}") from e
+
+
+# number of rows formatted at once by write_rows
+EXPORT_CHUNK_ROWS = 4096
+
+
+def rows_format(file_accuracy, file_separator, columns_number):
+    """
+        Compiles the %-format of a data row once: each column with its accuracy, columns joined by the separator.
+
+        "%.{n}f" and f"{value:.{n}f}" format floats identically, so the exported text does not depend on the writer.
+
+    :param file_accuracy: list of int
+        The number of decimal signs of each column.
+    :param file_separator: str
+        The separator between columns.
+    :param columns_number: int
+        The number of columns of the rows.
+
+    :return: str
+        The format of one row, line end included.
+    """
+    try:
+        if len(file_accuracy) < columns_number:
+            raise ValueError(f"{columns_number} columns to format but the accuracy of {len(file_accuracy)} columns only")
+        separator = file_separator.replace("%", "%%")
+        return separator.join(f"%.{accuracy}f" for accuracy in file_accuracy[:columns_number]) + "\n"
+    except Exception as e:
+        raise Exception(f"Critical error in rows_format: {str(e)}") from e
+
+
+def format_rows(rows, file_accuracy, file_separator):
+    """
+        Formats data rows as text, each column with its original accuracy.
+
+    :param rows: np.ndarray
+        The data rows (rows by columns).
+    :param file_accuracy: list of int
+        The number of decimal signs of each column.
+    :param file_separator: str
+        The separator between columns.
+
+    :return: str
+        The rows as text, one line per row.
+    """
+    try:
+        if len(rows) == 0:
+            return ""
+        row_format = rows_format(file_accuracy, file_separator, len(rows[0]))
+        return (row_format * len(rows)) % tuple(np.asarray(rows, dtype=np.double).ravel().tolist())
+    except Exception as e:
+        raise Exception(f"Critical error in format_rows: {str(e)}") from e
+
+
+def write_rows(file_output, rows, file_accuracy, file_separator, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+        Writes data rows to an open text file in chunks of chunk_rows rows: the row format is compiled once
+        and only one chunk is held as text at a time.
+
+    :param file_output: text file
+        The file to write to.
+    :param rows: np.ndarray
+        The data rows (rows by columns).
+    :param file_accuracy: list of int
+        The number of decimal signs of each column.
+    :param file_separator: str
+        The separator between columns.
+    :param chunk_rows: int
+        The number of rows formatted at once.
+
+    :return: None
+    """
+    try:
+        if len(rows) == 0:
+            return
+        rows = np.asarray(rows, dtype=np.double)
+        row_format = rows_format(file_accuracy, file_separator, rows.shape[1])
+        for chunk_start in range(0, len(rows), chunk_rows):
+            chunk = rows[chunk_start:chunk_start + chunk_rows]
+            file_output.write((row_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+    except Exception as e:
+        raise Exception(f"Critical error in write_rows: {str(e)}") from e
+
+
+def export_table(export_path, header_str, rows, file_accuracy, file_separator):
+    """
+        Writes an exported file: the header then the data rows (see write_rows).
+
+    :param export_path: str
+        The path of the exported file.
+    :param header_str: str
+        The header of the exported file (see export_header).
+    :param rows: np.ndarray
+        The data rows (rows by columns).
+    :param file_accuracy: list of int
+        The number of decimal signs of each column.
+    :param file_separator: str
+        The separator between columns.
+
+    :return: None
+    """
+    try:
+        with open(export_path, "w+") as file_output:
+            file_output.write(header_str)
+            write_rows(file_output, rows, file_accuracy, file_separator)
+    except Exception as e:
+        raise Exception(f"Critical error in export_table: {str(e)}") from e
+
+
+def append_rows(export_path, rows, file_accuracy, file_separator):
+    """
+        Appends data rows to an exported file (see export_table), e.g. the rows appended to a growing spectrum.
+
+    :param export_path: str
+        The path of the exported file.
+    :param rows: np.ndarray
+        The data rows (rows by columns).
+    :param file_accuracy: list of int
+        The number of decimal signs of each column.
+    :param file_separator: str
+        The separator between columns.
+
+    :return: None
+    """
+    try:
+        with open(export_path, "a") as file_output:
+            write_rows(file_output, rows, file_accuracy, file_separator)
+    except Exception as e:
+        raise Exception(f"Critical error in append_rows: {str(e)}") from e
+
+
+def export_blocks(export_path, header_str, data_blocks):
+    """
+        Writes an exported file block by block: only one block is formatted in memory at a time.
+
+    :param export_path: str
+        The path of the exported file.
+    :param header_str: str
+        The header of the exported file (see export_header).
+    :param data_blocks: iterable of DataBlock
+        The blocks to write, with their accuracy and separator.
+
+    :return: int
+        The number of data rows written.
+    """
+    try:
+        rows_number = 0
+        with open(export_path, "w+") as file_output:
+            file_output.write(header_str)
+            for data_block in data_blocks:
+                write_rows(file_output, data_block.rows, data_block.accuracy, data_block.separator)
+                rows_number += len(data_block.rows)
+        return rows_number
+    except Exception as e:
+        raise Exception(f"Critical error in export_blocks: {str(e)}") from e
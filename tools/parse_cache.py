@@ -0,0 +1,202 @@
+# coding: utf-8
+
+"""
+    This module contains an on-disk cache for the results of DataPars.
+
+    Each parsed file gets two entries in the cache directory: the data block as a .npy file,
+    which is memory-mapped on load, and a .json file with the header, separator, accuracy, garbage
+    and data start line together with what identifies the source file (size, mtime and content hash).
+    An entry is used only if all three still match; the cache is size-bounded, the least recently used
+    entries are evicted first.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+"""
+    How to use:
+        # CALL (through DataPars)
+        from tools.data_pars import DataPars
+        data_read = DataPars(file_path, cache_dir="path/to/cache")  # cache_max_bytes=... to change the size limit
+        data_read.file_pars_f()  # the first call parses and stores, next calls load from the cache while the file is unchanged
+        # CALL (directly)
+        from tools.parse_cache import ParseCache
+        cache = ParseCache("path/to/cache")
+        if not cache.load(data_read):
+            data_read.file_pars_f()
+            cache.store(data_read)
+"""
+
+__version__ = "1.0.0"
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+
+class ParseCache:
+    """
+        The ParseCache class stores and restores the outputs of a DataPars object.
+
+        Entries are keyed by the absolute file path and the parsing options (file_start, nan_to_garbage and
+        the DataPars version) and validated against the file size, mtime and content hash.
+        Loaded bodies are copy-on-write memory maps: they can be modified without touching the cache.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        """
+            Initialize the ParseCache object with cache_dir and max_bytes.
+        :param cache_dir: str
+            The directory where the cache entries are stored, created if needed.
+        :param max_bytes: int
+            The maximum total size of the cache entries, default is 512 MB.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def entry_paths(self, data_pars, parser_version):
+        """
+            Builds the paths of the cache entry of a file.
+
+        :param data_pars: DataPars
+            The DataPars object whose file is cached.
+        :param parser_version: str
+            The DataPars version, a new version never reuses older entries.
+
+        :return: tuple
+            The paths of the .npy body file and of the .json metadata file.
+        """
+        try:
+            key_source = f"{os.path.abspath(data_pars.file_path)}|{data_pars.file_start}|{data_pars.nan_to_garbage}|{parser_version}"
+            key = hashlib.sha1(key_source.encode("utf8")).hexdigest()
+            return os.path.join(self.cache_dir, key + ".npy"), os.path.join(self.cache_dir, key + ".json")
+        except Exception as e:
+            raise Exception(f"Critical error in ParseCache:entry_paths: {str(e)}") from e
+
+    @staticmethod
+    def file_signature(file_path):
+        """
+            Computes what identifies the content of a file: size, mtime and blake2b content hash.
+
+        :param file_path: str
+            The path to the file.
+
+        :return: dict
+            The file size, mtime (in ns) and content hash.
+        """
+        try:
+            file_stat = os.stat(file_path)
+            content_hash = hashlib.blake2b(digest_size=20)
+            with open(file_path, "rb") as file:
+                for chunk in iter(lambda: file.read(1024 ** 2), b""):
+                    content_hash.update(chunk)
+            return {"size": file_stat.st_size, "mtime_ns": file_stat.st_mtime_ns, "hash": content_hash.hexdigest()}
+        except Exception as e:
+            raise Exception(f"Critical error in ParseCache:file_signature: {str(e)}") from e
+
+    def load(self, data_pars, parser_version=""):
+        """
+            Fills the outputs of data_pars from the cache if there is a valid entry for its file.
+
+            A missing, stale or unreadable entry is a cache miss.
+
+        :param data_pars: DataPars
+            The DataPars object to fill.
+        :param parser_version: str
+            The DataPars version.
+
+        :return: bool
+            True if the outputs have been loaded from the cache, False otherwise.
+        """
+        try:
+            body_path, meta_path = self.entry_paths(data_pars, parser_version)
+            if not os.path.isfile(meta_path) or not os.path.isfile(body_path):
+                return False
+            with open(meta_path, "r", encoding="utf8") as file:
+                meta = json.load(file)
+            file_stat = os.stat(data_pars.file_path)
+            if meta["source"]["size"] != file_stat.st_size or meta["source"]["mtime_ns"] != file_stat.st_mtime_ns:
+                return False
+            if meta["source"]["hash"] != self.file_signature(data_pars.file_path)["hash"]:
+                return False
+            # zero-size arrays cannot be memory-mapped
+            if meta["body_size"] == 0:
+                data_pars.file_body = np.load(body_path)
+            else:
+                data_pars.file_body = np.load(body_path, mmap_mode="c")
+            data_pars.file_header = meta["header"]
+            data_pars.file_accuracy = meta["accuracy"]
+            data_pars.file_garbage = [(garbage["index"], garbage["line"]) if "line" in garbage
+                                      else (garbage["index"], np.array(garbage["values"], dtype=np.double))
+                                      for garbage in meta["garbage"]]
+            data_pars.file_separator = meta["separator"]
+            data_pars.file_data_start_line = meta["data_start_line"]
+            # last access for the eviction order
+            os.utime(meta_path)
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def store(self, data_pars, parser_version=""):
+        """
+            Stores the outputs of data_pars in the cache and evicts old entries if the cache is too big.
+
+            Entries are written to temporary files first and then renamed, so a reader never sees a partial entry.
+            A cache that cannot be written (read-only or full disk) is ignored.
+
+        :param data_pars: DataPars
+            The parsed DataPars object.
+        :param parser_version: str
+            The DataPars version.
+
+        :return: None
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            body_path, meta_path = self.entry_paths(data_pars, parser_version)
+            body = np.ascontiguousarray(data_pars.file_body, dtype=np.double)
+            meta = {
+                "source": self.file_signature(data_pars.file_path),
+                "body_size": int(body.size),
+                "header": list(data_pars.file_header),
+                "accuracy": [int(accuracy) for accuracy in data_pars.file_accuracy],
+                "garbage": [{"index": int(index), "line": garbage} if isinstance(garbage, str)
+                            else {"index": int(index), "values": np.asarray(garbage, dtype=np.double).tolist()}
+                            for index, garbage in data_pars.file_garbage],
+                "separator": data_pars.file_separator,
+                "data_start_line": int(data_pars.file_data_start_line),
+            }
+            with open(body_path + ".tmp", "wb") as file:
+                np.save(file, body)
+            os.replace(body_path + ".tmp", body_path)
+            with open(meta_path + ".tmp", "w", encoding="utf8") as file:
+                json.dump(meta, file)
+            os.replace(meta_path + ".tmp", meta_path)
+            self.evict()
+        except OSError:
+            return
+
+    def evict(self):
+        """
+            Removes the least recently used entries until the cache fits in max_bytes.
+
+        :return: None
+        """
+        try:
+            entries = []
+            for file_name in os.listdir(self.cache_dir):
+                if file_name.endswith(".json"):
+                    meta_path = os.path.join(self.cache_dir, file_name)
+                    body_path = meta_path[:-len(".json")] + ".npy"
+                    entry_size = os.path.getsize(meta_path) + (os.path.getsize(body_path) if os.path.isfile(body_path) else 0)
+                    entries.append((os.path.getmtime(meta_path), entry_size, meta_path, body_path))
+            total_size = sum(entry[1] for entry in entries)
+            for _, entry_size, meta_path, body_path in sorted(entries):
+                if total_size <= self.max_bytes:
+                    break
+                for path in (meta_path, body_path):
+                    if os.path.isfile(path):
+                        os.remove(path)
+                total_size -= entry_size
+        except OSError:
+            return
@@ -0,0 +1,252 @@
+# coding: utf-8
+
+"""
+    Watch-folder window correction: corrects the spectra as the spectrometer writes them in acquisition directories.
+
+    How to use:
+        python watch.py acquisition_dir other_acquisition_dir --windows 2 --correction extended --jobs 2
+
+    New and rewritten spectrum files (.txt, .csv, .tsv) are corrected once they stop changing for --settle seconds
+    (or as soon as they are closed after writing where inotify is available: pip install inotify_simple; the
+    directories are polled every --poll seconds otherwise). The exports are written as by batch.py. The processed
+    files are recorded in a JSON file (--record), so a restarted watch only corrects new or changed files.
+"""
+
+# PACKAGES
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# optional inotify (Linux): event driven instead of polling
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# MODULES
+from batch import (CORRECTION_TYPES, OUTPUT_SUFFIX, SPECTRUM_EXTENSIONS, collect_spectrum_files, load_transmission, export_path_for,
+                   set_batch_parameters, correct_file_job, add_correction_arguments)
+
+# GLOBALS
+RECORD_NAME = ".wincor_watch.json"  # default processed files record, in the first watched directory
+
+
+# worker process initializer: Ctrl+C stops the watch, the workers finish their current file
+def set_watch_worker(*batch_arguments):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    set_batch_parameters(*batch_arguments)
+
+
+class SpectrumWatcher:
+    def __init__(self, directories, window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                 record_path=None, jobs=1, output_dir=None, output_suffix=OUTPUT_SUFFIX, settle_seconds=0.5, poll_seconds=0.25,
+                 use_inotify=True):
+        self.class_setter(directories, window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                          record_path, jobs, output_dir, output_suffix, settle_seconds, poll_seconds, use_inotify)
+        self.globals()
+
+    def class_setter(self, directories, window_wavelength, window_transmission, windows_quantity, correction_type, window_material,
+                     record_path, jobs, output_dir, output_suffix, settle_seconds, poll_seconds, use_inotify):
+        self.directories = [os.path.normpath(directory) for directory in directories]
+        self.batch_arguments = (window_wavelength, window_transmission, windows_quantity, correction_type, window_material)
+        self.record_path = record_path or os.path.join(self.directories[0], RECORD_NAME)
+        self.jobs = max(jobs, 1)
+        self.output_dir = output_dir
+        self.output_suffix = output_suffix
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.use_inotify = use_inotify and INotify is not None
+
+    def globals(self):
+        self.processed = self.load_record()  # path -> {"size", "mtime_ns", "export" or "error"}
+        self.pending = {}  # path -> (size, mtime_ns, time the signature was first seen)
+        self.closed = set()  # paths closed after writing (inotify): no need to wait for them to settle
+        self.changed = None  # paths changed since the last step (inotify), None: all the directories to scan
+        self.queued = []  # ready paths waiting for a free worker
+        self.running = {}  # future -> (path, signature)
+        self.executor = None
+        self.inotify = None
+        self.watch_directories = {}  # inotify watch descriptor -> directory
+
+    # processed files record
+    def load_record(self):
+        try:
+            if os.path.isfile(self.record_path):
+                with open(self.record_path, "r", encoding="utf8") as record_file:
+                    return json.load(record_file)
+            return {}
+        except (OSError, ValueError):
+            return {}  # unreadable record -> everything is new
+
+    def save_record(self):
+        try:
+            temporary_path = self.record_path + ".tmp"
+            with open(temporary_path, "w", encoding="utf8") as record_file:
+                json.dump(self.processed, record_file, indent=1)
+            os.replace(temporary_path, self.record_path)  # atomic: a killed watch never leaves a half-written record
+        except Exception as e:
+            raise Exception(f"Critical error in SpectrumWatcher::save_record: {str(e)}") from e
+
+    @staticmethod
+    def file_signature(file_path):
+        file_stat = os.stat(file_path)
+        return file_stat.st_size, file_stat.st_mtime_ns
+
+    def is_processed(self, file_path, signature):
+        record = self.processed.get(file_path)
+        return record is not None and (record["size"], record["mtime_ns"]) == signature
+
+    def is_busy(self, file_path):
+        return file_path in self.queued or any(path == file_path for path, _ in self.running.values())
+
+    # start & stop
+    def start(self):
+        try:
+            if self.output_dir:
+                os.makedirs(self.output_dir, exist_ok=True)
+            self.executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=set_watch_worker, initargs=self.batch_arguments)
+            if self.use_inotify:
+                self.inotify = INotify()
+                watch_flags = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE | inotify_flags.MODIFY
+                for directory in self.directories:
+                    self.watch_directories[self.inotify.add_watch(directory, watch_flags)] = directory
+        except Exception as e:
+            raise Exception(f"Critical error in SpectrumWatcher::start: {str(e)}") from e
+
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.collect_finished()
+            self.executor = None
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    # one watch step: new files, settled files to the workers, finished corrections to the record
+    def step(self, now=None):
+        try:
+            now = time.monotonic() if now is None else now
+            self.update_pending(now)
+            self.submit_queued()
+            self.collect_finished()
+        except Exception as e:
+            raise Exception(f"Critical error in SpectrumWatcher::step: {str(e)}") from e
+
+    # the files to look at: all the spectra of the directories when polling (and on the first step),
+    # only the changed & still pending ones with inotify
+    def candidate_files(self):
+        if self.inotify is None or self.changed is None:
+            candidates = collect_spectrum_files(self.directories, self.output_suffix)
+        else:
+            candidates = sorted(self.changed | set(self.pending))
+        if self.inotify is not None:
+            self.changed = set()
+        return candidates
+
+    def update_pending(self, now):
+        for file_path in self.candidate_files():
+            try:
+                signature = self.file_signature(file_path)
+            except OSError:
+                self.pending.pop(file_path, None)  # removed meanwhile
+                continue
+            if self.is_processed(file_path, signature) or self.is_busy(file_path):
+                continue
+            pending_signature = self.pending.get(file_path)
+            if pending_signature is None or pending_signature[:2] != signature:
+                self.pending[file_path] = (*signature, now)  # new or still being written
+            elif file_path in self.closed or now - pending_signature[2] >= self.settle_seconds:
+                del self.pending[file_path]
+                self.closed.discard(file_path)
+                self.queued.append(file_path)
+
+    def submit_queued(self):
+        # bounded: no more corrections in flight than workers, the others wait in the queue
+        while self.queued and len(self.running) < self.jobs:
+            file_path = self.queued.pop(0)
+            try:
+                signature = self.file_signature(file_path)
+            except OSError:
+                continue  # removed or renamed since it was queued
+            export_path = export_path_for(file_path, self.output_dir, self.output_suffix)
+            future = self.executor.submit(correct_file_job, file_path, export_path)
+            self.running[future] = (file_path, signature)
+
+    def collect_finished(self):
+        finished_futures = [future for future in self.running if future.done()]
+        for future in finished_futures:
+            file_path, signature = self.running.pop(future)
+            record = {"size": signature[0], "mtime_ns": signature[1]}
+            try:
+                future.result()
+                record["export"] = export_path_for(file_path, self.output_dir, self.output_suffix)
+                print(f"{file_path} -> {record['export']}")
+            except Exception as e:
+                record["error"] = str(e)  # not retried until the file changes
+                print(f"{file_path}: {e}", file=sys.stderr)
+            self.processed[file_path] = record
+            if self.changed is not None:
+                self.changed.add(file_path)  # looked at again: it may have changed during the correction
+        if finished_futures:
+            self.save_record()
+
+    # waits for the next step: inotify events (or the poll period), sooner while files settle or corrections run
+    def wait(self):
+        timeout = self.poll_seconds
+        if self.pending:
+            timeout = min(timeout, self.settle_seconds / 4)
+        if self.inotify is None:
+            time.sleep(timeout)
+            return
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            if event.name and event.wd in self.watch_directories:
+                stem, extension = os.path.splitext(event.name)
+                if extension.lower() not in SPECTRUM_EXTENSIONS or stem.endswith(self.output_suffix):
+                    continue
+                file_path = os.path.normpath(os.path.join(self.watch_directories[event.wd], event.name))
+                self.changed.add(file_path)
+                if inotify_flags.CLOSE_WRITE in inotify_flags.from_mask(event.mask):
+                    self.closed.add(file_path)
+
+    def run(self):
+        self.start()
+        try:
+            while True:
+                self.step()
+                self.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Window reflection correction of the spectra written in acquisition directories.")
+    parser.add_argument("directories", nargs="+", help="acquisition directories to watch")
+    add_correction_arguments(parser)
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes")
+    parser.add_argument("--record", default=None, help=f"processed files record (default: {RECORD_NAME} in the first directory)")
+    parser.add_argument("--settle", type=float, default=0.5, help="seconds without change before a file is corrected")
+    parser.add_argument("--poll", type=float, default=0.25, help="seconds between two directory scans")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    watch_arguments = parse_arguments(arguments)
+    window_wavelength, window_transmission, window_material = load_transmission(watch_arguments.transmission)
+    spectrum_watcher = SpectrumWatcher(watch_arguments.directories, window_wavelength, window_transmission, watch_arguments.windows,
+                                       CORRECTION_TYPES[watch_arguments.correction], window_material, watch_arguments.record,
+                                       watch_arguments.jobs, watch_arguments.output_dir, watch_arguments.suffix,
+                                       watch_arguments.settle, watch_arguments.poll)
+    print(f"Watching {', '.join(spectrum_watcher.directories)} ({'inotify' if spectrum_watcher.use_inotify else 'polling'}), Ctrl+C to stop.")
+    spectrum_watcher.run()
+    return 0
+
+
+# WATCH RUN
+if __name__ == '__main__':
+    sys.exit(main())
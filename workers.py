@@ -0,0 +1,102 @@
+# coding: utf-8
+
+# PACKAGES
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+# MODULES
+from tools.data_pars import DataPars
+from core import window_correction_roots_steps
+
+# GLOBALS
+PREVIEW_ROWS = 4096  # rows streamed for the preview of a loading file
+CORRECTION_BLOCK_ROWS = 16384  # rows of a reflectance column solved between two cancel checks of the correction worker
+
+
+# solve of the reflectance columns of a spectrum (the roots, for any correction type: see window_correction_from_roots),
+# run in a QThread by the UI (see start_worker); each column is solved by blocks of block_rows rows, each block
+# by a thread pool (see CorrectionPlan)
+class CorrectionWorker(QObject):
+    progress = pyqtSignal(int, int)  # solved columns, columns to solve
+    finished = pyqtSignal(object)  # roots (rows by reflectance columns)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)  # error message
+
+    def __init__(self, spectrum_data, reflectance_columns_list, window_material_wavelengths, window_material_transmission,
+                 windows_quantity, block_rows=CORRECTION_BLOCK_ROWS):
+        super(CorrectionWorker, self).__init__()
+        self.spectrum_data = spectrum_data
+        self.reflectance_columns_list = list(reflectance_columns_list)
+        self.window_material_wavelengths = window_material_wavelengths
+        self.window_material_transmission = window_material_transmission
+        self.windows_quantity = windows_quantity
+        self.block_rows = block_rows
+        self.cancel_requested = False
+
+    # called from the UI thread: the worker stops before its next block of rows
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            real_roots = None
+            columns_number = len(self.reflectance_columns_list)
+            for column_count, real_roots in window_correction_roots_steps(self.spectrum_data, self.reflectance_columns_list,
+                                                                          self.window_material_wavelengths,
+                                                                          self.window_material_transmission, self.windows_quantity,
+                                                                          executor="threads", block_rows=self.block_rows):
+                self.progress.emit(column_count, columns_number)
+                if self.cancel_requested:
+                    self.cancelled.emit()
+                    return
+            self.finished.emit(real_roots)
+        except Exception as e:
+            self.failed.emit(f"Critical error in CorrectionWorker::run: {str(e)}")
+
+
+# parsing of a spectrum or transmission file, run in a QThread by the UI (see start_worker):
+# the first rows are streamed and sent as a preview, then the whole file is parsed by file_pars_f
+# (the layout detected on all of it, as the synchronous load does) and sent
+class FileLoadWorker(QObject):
+    preview = pyqtSignal(object, object)  # first rows, file header
+    parsed = pyqtSignal(object, object, object, object)  # data, file header, file separator, file accuracy
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)  # error message
+
+    def __init__(self, file_path, preview_rows=PREVIEW_ROWS):
+        super(FileLoadWorker, self).__init__()
+        self.file_path = file_path
+        self.preview_rows = preview_rows
+        self.cancel_requested = False
+
+    # called from the UI thread: the worker stops before its next block
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            for data_block in DataPars(self.file_path).iter_blocks(self.preview_rows):
+                self.preview.emit(data_block.rows, data_block.header)
+                break
+            if self.cancel_requested:
+                self.cancelled.emit()
+                return
+            data_pars = DataPars(self.file_path)
+            data_pars.file_pars_f()
+            if self.cancel_requested:
+                self.cancelled.emit()
+                return
+            self.parsed.emit(data_pars.file_body, data_pars.file_header, data_pars.file_separator, data_pars.file_accuracy)
+        except Exception as e:
+            self.failed.emit(f"Critical error in FileLoadWorker::run: {str(e)}")
+
+
+# moves a worker to a new QThread and starts it; the thread quits on any of the worker end signals
+# (keep the references to both until the thread finished signal)
+def start_worker(worker, end_signals):
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    for end_signal in end_signals:
+        end_signal.connect(thread.quit)
+    thread.start()
+    return thread